@@ -1,114 +1,344 @@
-import torch
-import torch.nn.functional as F
-import numpy as np
-
-from agents.base_agent import BaseAgent
-from networks.q_network import QNetwork
-from replay.replay_buffer import ReplayBuffer
-
-class DQNAgent(BaseAgent):
-    def __init__(
-            self,
-            obs_dim, 
-            action_dim, 
-            lr=1e-4,
-            gamma=0.99,
-            epsilon_start=1.0,
-            epsilon_end=0.05,
-            epsilon_decay=0.995,
-            buffer_capacity=100000,
-            batch_size=64,
-            target_update_freq=1000,
-            device=None,
-    ):
-        super().__init__(obs_dim, action_dim, device)
-
-        self.gamma = gamma
-        self.batch_size = batch_size
-        self.target_update_freq = target_update_freq
-
-        self.epsilon = epsilon_start
-        self.epsilon_end = epsilon_end
-        self.epsilon_decay = epsilon_decay
-        
-        # networks
-        self.q_net = QNetwork(obs_dim, action_dim).to(self.device)
-        self.target_q_net = QNetwork(obs_dim, action_dim).to(self.device)
-        self.target_q_net.load_state_dict(self.q_net.state_dict())
-        self.target_q_net.eval()
-
-        self.optimizer = torch.optim.Adam(self.q_net.parameters(), lr=lr)
-
-        #replay buffer
-        self.replay_buffer = ReplayBuffer(capacity=buffer_capacity, device=self.device)
-
-        self.train_steps = 0
-
-
-    def select_action(self, observation, explore=True):
-        if explore and np.random.rand() < self.epsilon:
-            return np.random.randint(self.action_dim)
-        
-        with torch.no_grad():
-            obs = torch.tensor(observation, dtype=torch.float32, device=self.device).view(1,-1)
-            obs = obs[:, : self.obs_dim]
-            q_values = self.q_net(obs)
-            return int(torch.argmax(q_values, dim=1).item())
-    
-
-    def store_transition(self, obs, action, reward, next_obs, done):
-        assert hasattr(self, "replay_buffer"), "Replay buffer not initialized"
-        self.replay_buffer.push(obs, action, reward, next_obs, done)
-
-    
-    def train_step(self):
-        if len(self.replay_buffer) < self.batch_size:
-            return None
-        obs, actions, rewards, next_obs, dones = self.replay_buffer.sample(self.batch_size)
-        obs = obs[:, : self.obs_dim]
-        next_obs = next_obs[:, : self.obs_dim]
-        
-        # --- Shape safety (critical for RL stability) ---
-        obs = obs.view(obs.size(0), -1)
-        next_obs = next_obs.view(next_obs.size(0), -1)
-        q_values = self.q_net(obs).gather(1, actions.unsqueeze(1)).squeeze(1)
-
-        with torch.no_grad():
-            next_q_values = self.target_q_net(next_obs).max(dim=1)[0]
-            targets = rewards + (1.0-dones)*self.gamma*next_q_values
-        
-        loss = F.mse_loss(q_values, targets)
-
-        self.optimizer.zero_grad()
-        loss.backward()
-        torch.nn.utils.clip_grad_norm_(self.q_net.parameters(), 1.0)
-        self.optimizer.step()
-        self._update_target()
-        self._decay_epsilon()
-
-        return {
-            "loss" : float(loss.item()),
-            "epsilon": float(self.epsilon),
-        }
-    
-    def _update_target(self):
-        self.train_steps
-        if self.train_steps%self.target_update_freq == 0:
-            self.target_q_net.load_state_dict(self.q_net.state_dict())
-            
-    def _decay_epsilon(self):
-        self.epsilon = max(self.epsilon_end, self.epsilon*self.epsilon_decay)
-
-    def save(self, path):
-        torch.save({
-            "q_net": self.q_net.state_dict(),
-            "target_q_net" : self.target_q_net.state_dict(),
-            "epsilon" : self.epsilon,
-        }, path)
-
-    def load(self, path):
-        checkpoint = torch.load(path, map_location=self.device)
-        self.q_net.load_state_dict(checkpoint["q_net"])
-        self.target_q_net.load_state_dict(checkpoint["target_q_net"])
-        self.epsilon = checkpoint.get("epsilon", self.epsilon)
-
+import copy
+import random
+from contextlib import nullcontext
+import torch
+import torch.nn.functional as F
+import numpy as np
+
+from agents.base_agent import BaseAgent
+from networks.q_network import QNetwork, quantize_dynamic_int8
+from replay.replay_buffer import ReplayBuffer, ArrayReplayBuffer
+from replay.prioritized_replay_buffer import PrioritizedReplayBuffer
+from replay.mmap_replay_buffer import MemmapReplayBuffer
+from replay.episode_replay_buffer import EpisodeReplayBuffer
+from replay.prefetcher import PrefetchSampler
+from profiling.profiler import NULL_PROFILER
+
+class DQNAgent(BaseAgent):
+    def __init__(
+            self,
+            obs_dim, 
+            action_dim, 
+            lr=1e-4,
+            gamma=0.99,
+            epsilon_start=1.0,
+            epsilon_end=0.05,
+            epsilon_decay=0.995,
+            buffer_capacity=100000,
+            batch_size=64,
+            target_update_freq=1000,
+            device=None,
+            buffer_type="deque",
+            pin_memory=False,
+            prefetch=0,
+            buffer_dir=None,
+            tau=0.0,
+            fused=False,
+            compile_step=False,
+            n_step=1,
+            replay_streams=1,
+            precision="fp32",
+            hidden_dims=(128, 128),
+    ):
+        super().__init__(obs_dim, action_dim, device)
+
+        self.gamma = gamma
+        self.batch_size = batch_size
+        self.target_update_freq = target_update_freq
+        # tau > 0: Polyak averaging of the target every step instead of a hard copy every target_update_freq steps
+        self.tau = tau
+
+        # "bf16": forward passes of train_step under bfloat16 autocast, loss and master weights stay float32
+        if precision not in ("fp32", "bf16"):
+            raise ValueError(f"Unknown precision : {precision}")
+        self.precision = precision
+        # set by quantize(): int8 inference-only network, float weights kept for fingerprints
+        self.quantized = False
+        self.fp32_state_dict = None
+
+        self.epsilon = epsilon_start
+        self.epsilon_end = epsilon_end
+        self.epsilon_decay = epsilon_decay
+        
+        # networks
+        self.hidden_dims = tuple(hidden_dims)
+        self.q_net = QNetwork(obs_dim, action_dim, hidden_dims=self.hidden_dims).to(self.device)
+        self.target_q_net = QNetwork(obs_dim, action_dim, hidden_dims=self.hidden_dims).to(self.device)
+        self.target_q_net.load_state_dict(self.q_net.state_dict())
+        self.target_q_net.eval()
+
+        # multi-tensor (foreach) or single-kernel (fused) Adam instead of a python loop over parameters
+        self.optimizer = torch.optim.Adam(self.q_net.parameters(), lr=lr, **({"fused": True} if fused else {"foreach": True}))
+        # flat parameter lists for in-place foreach target syncs and gradient clipping
+        self._online_params = list(self.q_net.parameters())
+        self._target_params = list(self.target_q_net.parameters())
+        # called with the online parameters between backward and the optimizer step (data-parallel gradient all-reduce)
+        self.grad_sync = None
+        # reusable target buffers, (re)allocated on first use and whenever the batch shape changes
+        self._not_done = None
+        self._targets = None
+        # optionally capture forward, target and loss as one compiled graph (backward included via AOTAutograd)
+        self._loss_fn = torch.compile(self._td_loss) if compile_step else self._td_loss
+
+        #replay buffer
+        self.replay_buffer = self._build_replay_buffer(buffer_type, buffer_capacity, pin_memory, buffer_dir, n_step, replay_streams)
+        self.prioritized = isinstance(self.replay_buffer, PrioritizedReplayBuffer)
+        # episodic replay samples n-step returns with per-transition bootstrap discounts in place of done flags
+        self.episodic = isinstance(self.replay_buffer, EpisodeReplayBuffer)
+        self.prefetcher = None
+        if prefetch > 0:
+            self.enable_prefetch(depth=prefetch, pin_memory=pin_memory)
+
+        self.train_steps = 0
+        # hot-path instrumentation, swapped for an enabled Profiler by the training / evaluation loops
+        self.profiler = NULL_PROFILER
+
+
+    def _build_replay_buffer(self, buffer_type, capacity, pin_memory, buffer_dir=None, n_step=1, replay_streams=1):
+        if n_step != 1 and buffer_type != "episode":
+            # only the episodic buffer computes n-step returns, the others would silently train on 1-step targets
+            raise ValueError(f"n_step={n_step} requires buffer_type 'episode', got '{buffer_type}'")
+        if buffer_type == "deque":
+            return ReplayBuffer(capacity=capacity, device=self.device)
+        elif buffer_type == "array":
+            return ArrayReplayBuffer(capacity=capacity, device=self.device, pin_memory=pin_memory)
+        elif buffer_type == "prioritized":
+            return PrioritizedReplayBuffer(capacity=capacity, device=self.device, pin_memory=pin_memory)
+        elif buffer_type == "mmap":
+            if buffer_dir is None:
+                raise ValueError("buffer_type 'mmap' requires buffer_dir")
+            return MemmapReplayBuffer(capacity=capacity, device=self.device, directory=buffer_dir, pin_memory=pin_memory)
+        elif buffer_type == "episode":
+            return EpisodeReplayBuffer(capacity=capacity, device=self.device, gamma=self.gamma, n_step=n_step, num_streams=replay_streams, pin_memory=pin_memory)
+        else:
+            raise ValueError(f"Unknown buffer type : {buffer_type}")
+
+    def enable_prefetch(self, depth=2, pin_memory=False):
+        # keep `depth` minibatches sampled ahead in a background thread
+        if self.prefetcher is None:
+            self.prefetcher = PrefetchSampler(self.replay_buffer, self.batch_size, depth=depth, pin_memory=pin_memory, device=self.device)
+
+    def disable_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    def _buffer_lock(self):
+        # replay writes must not race the prefetch thread's sampling
+        return self.prefetcher.lock if self.prefetcher is not None else nullcontext()
+
+    def _sample_batch(self):
+        if self.prefetcher is not None:
+            return self.prefetcher.sample()
+        return self.replay_buffer.sample(self.batch_size)
+
+    def select_action(self, observation, explore=True):
+        if explore and np.random.rand() < self.epsilon:
+            return np.random.randint(self.action_dim)
+        
+        with torch.no_grad():
+            obs = torch.tensor(observation, dtype=torch.float32, device=self.device).view(1,-1)
+            obs = obs[:, : self.obs_dim]
+            q_values = self.q_net(obs)
+            return int(torch.argmax(q_values, dim=1).item())
+    
+
+    def select_actions(self, observations, explore=True):
+        # epsilon-greedy over a whole batch: one forward pass, one vectorized random mask
+        with torch.no_grad():
+            obs = torch.as_tensor(np.asarray(observations), dtype=torch.float32, device=self.device)
+            obs = obs.view(obs.size(0), -1)[:, : self.obs_dim]
+            actions = torch.argmax(self.q_net(obs), dim=1).cpu().numpy()
+
+        if explore:
+            random_mask = np.random.rand(actions.shape[0]) < self.epsilon
+            actions[random_mask] = np.random.randint(self.action_dim, size=int(random_mask.sum()))
+        return actions
+
+    def store_transition(self, obs, action, reward, next_obs, done, truncated=False):
+        assert hasattr(self, "replay_buffer"), "Replay buffer not initialized"
+        with self._buffer_lock():
+            if self.episodic:
+                # truncation closes the stored episode without making its last transition terminal
+                self.replay_buffer.push(obs, action, reward, next_obs, done, truncated=truncated)
+            else:
+                self.replay_buffer.push(obs, action, reward, next_obs, done)
+
+    def store_transitions(self, obs, actions, rewards, next_obs, dones, truncated=None, streams=None):
+        # batched variant used with vectorized environments. streams: producer (sub-env) id of each transition
+        with self._buffer_lock():
+            if self.episodic:
+                self.replay_buffer.push_batch(obs, actions, rewards, next_obs, dones, truncated=truncated, streams=streams)
+            else:
+                self.replay_buffer.push_batch(obs, actions, rewards, next_obs, dones)
+
+    
+    def train_step(self):
+        if self.quantized:
+            raise RuntimeError("a quantized agent is inference only")
+        if len(self.replay_buffer) < self.batch_size:
+            return None
+        prof = self.profiler
+
+        with prof.phase("sample"):
+            batch = self._sample_batch()
+        obs, actions, rewards, next_obs, dones = batch[:5]
+        # importance weights correct the bias introduced by non-uniform sampling
+        weights = batch[5] if self.prioritized else None
+
+        with prof.phase("forward"), torch.autocast(self.device.type, dtype=torch.bfloat16, enabled=self.precision == "bf16"):
+            loss, td_errors = self._loss_fn(obs, actions, rewards, next_obs, dones, weights)
+
+        with prof.phase("backward"):
+            self.optimizer.zero_grad()
+            loss.backward()
+
+        if self.grad_sync is not None:
+            with prof.phase("allreduce"):
+                self.grad_sync(self._online_params)
+
+        with prof.phase("optimizer"):
+            torch.nn.utils.clip_grad_norm_(self._online_params, 1.0)
+            self.optimizer.step()
+
+        if self.prioritized:
+            with prof.phase("priority_update"), self._buffer_lock():
+                self.replay_buffer.update_priorities(batch[6], td_errors.detach().cpu().numpy())
+
+        self.train_steps += 1
+        with prof.phase("target_update"):
+            self._update_target()
+        self._decay_epsilon()
+        prof.count("updates")
+        prof.count("samples", self.batch_size)
+
+        # the loss stays a detached tensor: converting it (a device sync) is left to whoever logs it
+        return {
+            "loss" : loss.detach(),
+            "epsilon": self.epsilon,
+        }
+
+    def _td_loss(self, obs, actions, rewards, next_obs, dones, weights=None):
+        # --- Shape safety (critical for RL stability) ---
+        obs = obs[:, : self.obs_dim].reshape(obs.size(0), -1)
+        next_obs = next_obs[:, : self.obs_dim].reshape(next_obs.size(0), -1)
+        # Q values leave autocast regions as float32 so targets and the loss are always computed in full precision
+        q_values = self.q_net(obs).gather(1, actions.unsqueeze(1)).squeeze(1).float()
+
+        with torch.no_grad():
+            targets = self._td_targets(rewards, dones, self._next_q_values(next_obs).float())
+
+        td_errors = targets - q_values
+        if weights is not None:
+            loss = (weights * td_errors.pow(2)).mean()
+        else:
+            loss = F.mse_loss(q_values, targets)
+        return loss, td_errors
+
+    def _td_targets(self, rewards, dones, next_q_values):
+        # with episodic replay `rewards` are n-step returns and `dones` already the bootstrap discounts gamma^m * (1 - done)
+        if torch.compiler.is_compiling():
+            # the compiler fuses this into one kernel, persistent buffers would only add mutations to the graph
+            if self.episodic:
+                return rewards + dones * next_q_values
+            return rewards + (1.0 - dones) * self.gamma * next_q_values
+        if self._targets is None or self._targets.shape != rewards.shape or self._targets.device != rewards.device:
+            self._not_done = torch.empty_like(rewards)
+            self._targets = torch.empty_like(rewards)
+        if self.episodic:
+            return torch.addcmul(rewards, dones, next_q_values, out=self._targets)
+        # (1 - done) * gamma written as gamma - gamma * done, exact for done in {0, 1}
+        torch.mul(dones, -self.gamma, out=self._not_done).add_(self.gamma)
+        return torch.addcmul(rewards, self._not_done, next_q_values, out=self._targets)
+
+    def _next_q_values(self, next_obs):
+        # bootstrap value of the next state: max over the target network
+        return self.target_q_net(next_obs).max(dim=1)[0]
+    
+    def _update_target(self):
+        # in-place parameter copies, no state dict rebuilt per sync
+        if self.tau > 0:
+            with torch.no_grad():
+                torch._foreach_lerp_(self._target_params, self._online_params, self.tau)
+        elif self.train_steps%self.target_update_freq == 0:
+            with torch.no_grad():
+                torch._foreach_copy_(self._target_params, self._online_params)
+            
+    def _decay_epsilon(self):
+        self.epsilon = max(self.epsilon_end, self.epsilon*self.epsilon_decay)
+
+    def quantize(self):
+        # swap the online network for a dynamic int8 copy for evaluation (CPU only, no further training)
+        self.fp32_state_dict = {k: v.detach().cpu().clone() for k, v in self.q_net.state_dict().items()}
+        self.q_net = quantize_dynamic_int8(self.q_net)
+        self.device = torch.device("cpu")
+        self.quantized = True
+        return self
+
+    def save(self, path):
+        # disk-backed replay persists its cursor alongside the weights for warm restarts
+        if hasattr(self.replay_buffer, "flush"):
+            with self._buffer_lock():
+                self.replay_buffer.flush()
+        torch.save({
+            "q_net": self.q_net.state_dict(),
+            "target_q_net" : self.target_q_net.state_dict(),
+            "epsilon" : self.epsilon,
+            "hidden_dims": self.hidden_dims,
+        }, path)
+
+    def training_state(self, include_replay=True):
+        # complete snapshot for exact resume: weights, optimizer moments, schedules and RNG streams.
+        # everything is copied so the result can be serialized from another thread while training continues
+        state = {
+            "q_net": {k: v.detach().clone() for k, v in self.q_net.state_dict().items()},
+            "target_q_net": {k: v.detach().clone() for k, v in self.target_q_net.state_dict().items()},
+            "optimizer": copy.deepcopy(self.optimizer.state_dict()),
+            "epsilon": self.epsilon,
+            "train_steps": self.train_steps,
+            "rng": {
+                "python": random.getstate(),
+                "numpy": np.random.get_state(),
+                "torch": torch.get_rng_state(),
+                "cuda": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+            },
+        }
+        if include_replay:
+            with self._buffer_lock():
+                state["replay_buffer"] = self.replay_buffer.state_dict()
+        return state
+
+    def load_training_state(self, state):
+        self.q_net.load_state_dict(state["q_net"])
+        self.target_q_net.load_state_dict(state["target_q_net"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.epsilon = state["epsilon"]
+        self.train_steps = state["train_steps"]
+        if "replay_buffer" in state:
+            with self._buffer_lock():
+                self.replay_buffer.load_state_dict(state["replay_buffer"])
+        rng = state["rng"]
+        random.setstate(rng["python"])
+        np.random.set_state(rng["numpy"])
+        torch.set_rng_state(rng["torch"])
+        if rng["cuda"] is not None and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(rng["cuda"])
+
+    def _rebuild_networks(self, hidden_dims):
+        # fresh online / target networks (and optimizer) of another width, for checkpoints trained with other hidden_dims
+        self.hidden_dims = tuple(hidden_dims)
+        self.q_net = QNetwork(self.obs_dim, self.action_dim, hidden_dims=self.hidden_dims).to(self.device)
+        self.target_q_net = QNetwork(self.obs_dim, self.action_dim, hidden_dims=self.hidden_dims).to(self.device)
+        self.target_q_net.eval()
+        self.optimizer = type(self.optimizer)(self.q_net.parameters(), **self.optimizer.defaults)
+        self._online_params = list(self.q_net.parameters())
+        self._target_params = list(self.target_q_net.parameters())
+
+    def load(self, path):
+        checkpoint = torch.load(path, map_location=self.device)
+        if tuple(checkpoint.get("hidden_dims", self.hidden_dims)) != self.hidden_dims:
+            self._rebuild_networks(checkpoint["hidden_dims"])
+        self.q_net.load_state_dict(checkpoint["q_net"])
+        self.target_q_net.load_state_dict(checkpoint["target_q_net"])
+        self.epsilon = checkpoint.get("epsilon", self.epsilon)
+
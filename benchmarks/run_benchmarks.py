@@ -0,0 +1,215 @@
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+
+import numpy as np
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agents.dqn_agent import DQNAgent
+from agents.double_dqn_agent import DoubleDQNAgent
+from environments.clean_env import CleanEnv
+from environments.drifted_env import DriftedEnv
+from replay.replay_buffer import ReplayBuffer, ArrayReplayBuffer
+from networks.numpy_policy import NumpyPolicy
+from evaluation.stress_test import run_policy
+from training.train import train
+
+# every hot-path benchmark is CPU only so results are comparable across machines without accelerators
+DEVICE = "cpu"
+
+
+def _best_rate(fn, number, repeat):
+    # calls per second of the fastest of `repeat` runs of `number` calls (least disturbed by noise)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return number / best
+
+
+def _result(value, unit, higher_is_better=True):
+    return {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def _fill(buffer, n):
+    obs = np.zeros(2, dtype=np.float32)
+    for i in range(n):
+        buffer.push(obs, i % 2, -1.0, obs, False)
+
+
+def _agent(agent_cls, batch_size=64, **agent_kwargs):
+    agent = agent_cls(obs_dim=1, action_dim=2, batch_size=batch_size, device=DEVICE, **agent_kwargs)
+    _fill(agent.replay_buffer, 10 * batch_size)
+    return agent
+
+
+def bench_env_step(scale):
+    results = {}
+    for name, env in (("CleanEnv", CleanEnv()), ("DriftedEnv", DriftedEnv(target_drift_per_step=0.1, drift_start_step=1))):
+        env.reset()
+        # a finished episode just keeps stepping, which is what the benchmark needs
+        results[f"env_step/{name}"] = _result(_best_rate(lambda: env.step(1), 2000 * scale, 3), "steps/s")
+    return results
+
+
+def bench_replay(scale, capacities=(10_000, 100_000, 1_000_000), batch_sizes=(32, 64, 256)):
+    results = {}
+    obs = np.zeros(2, dtype=np.float32)
+    for cls in (ReplayBuffer, ArrayReplayBuffer):
+        for capacity in capacities:
+            buffer = cls(capacity, DEVICE)
+            _fill(buffer, min(capacity, 20_000))
+            results[f"replay_push/{cls.__name__}/cap={capacity}"] = _result(
+                _best_rate(lambda: buffer.push(obs, 1, -1.0, obs, False), 2000 * scale, 3), "push/s")
+            for batch_size in batch_sizes:
+                results[f"replay_sample/{cls.__name__}/cap={capacity}/bs={batch_size}"] = _result(
+                    _best_rate(lambda: buffer.sample(batch_size), 100 * scale, 3), "batches/s")
+    return results
+
+
+def bench_select_action(scale):
+    agent = _agent(DQNAgent)
+    obs = np.zeros(2, dtype=np.float32)
+    rate = _best_rate(lambda: agent.select_action(obs, explore=False), 500 * scale, 3)
+    policy = NumpyPolicy.from_state_dict(agent.q_net.state_dict())
+    numpy_rate = _best_rate(lambda: policy.act(obs), 500 * scale, 3)
+    return {
+        "select_action/DQNAgent": _result(1e6 / rate, "us/call", higher_is_better=False),
+        "select_action/NumpyPolicy": _result(1e6 / numpy_rate, "us/call", higher_is_better=False),
+    }
+
+
+def bench_train_step(scale):
+    results = {}
+    for cls in (DQNAgent, DoubleDQNAgent):
+        for variant, kwargs in (("", {}), ("/fused", {"fused": True}), ("/polyak", {"tau": 0.005})):
+            agent = _agent(cls, **kwargs)
+            rate = _best_rate(agent.train_step, 50 * scale, 3)
+            results[f"train_step/{cls.__name__}{variant}"] = _result(1e6 / rate, "us/call", higher_is_better=False)
+    return results
+
+
+def bench_train_episodes(scale):
+    episodes = 5 * scale
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        train(agent_type="dqn", num_episodes=episodes, log_intervals=episodes, save_path=os.path.join(tmp, "dqn.pt"), seed=0)
+        elapsed = time.perf_counter() - start
+    return {"train/episodes": _result(episodes / elapsed, "episodes/s")}
+
+
+def bench_run_policy(scale):
+    agent = _agent(DQNAgent)
+    agent.epsilon = 0.0
+    env = DriftedEnv(target_drift_per_step=0.1, drift_start_step=1)
+    episodes = 5 * scale
+    start = time.perf_counter()
+    run_policy(env, agent, num_episodes=episodes)
+    return {"stress_test/run_policy": _result(episodes / (time.perf_counter() - start), "episodes/s")}
+
+
+BENCHMARKS = {
+    "env": bench_env_step,
+    "replay": bench_replay,
+    "select_action": bench_select_action,
+    "train_step": bench_train_step,
+    "train": bench_train_episodes,
+    "run_policy": bench_run_policy,
+}
+
+
+def run(selected=None, scale=1, threads=1):
+    torch.set_num_threads(threads)
+    np.random.seed(0)
+    torch.manual_seed(0)
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        start = time.perf_counter()
+        results.update(bench(scale))
+        print(f"{name:<15} done in {time.perf_counter() - start:6.1f}s")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "torch_threads": threads,
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    # relative change per metric, oriented so that negative always means slower
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["value"] == 0:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        if not cur["higher_is_better"]:
+            change = -change
+        rows.append((name, base["value"], cur["value"], cur["unit"], change, change < -threshold))
+    return rows
+
+
+def print_report(results, comparison=None):
+    if comparison is None:
+        for name, r in results["results"].items():
+            print(f"{name:<55}{r['value']:>14.1f} {r['unit']}")
+        return
+    print(f"{'benchmark':<55}{'baseline':>14}{'current':>14}  {'unit':<10}{'change':>9}")
+    for name, base, cur, unit, change, regressed in comparison:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<55}{base:>14.1f}{cur:>14.1f}  {unit:<10}{change:>+9.1%}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", type=str, nargs="+", default=None, choices=list(BENCHMARKS), help="subset of benchmarks to run")
+    parser.add_argument("--scale", type=int, default=1, help="multiplies iteration counts (higher = slower, less noisy)")
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    parser.add_argument("--out", type=str, default="results/benchmarks.json", help="where to write this run's results")
+    parser.add_argument("--baseline", type=str, default="benchmarks/baseline.json", help="stored baseline to compare against")
+    parser.add_argument("--save_baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    current = run(selected=args.only, scale=args.scale, threads=args.threads)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(current, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print_report(current)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison = compare(current, baseline, threshold=args.threshold)
+        print_report(current, comparison)
+        regressions = [row for row in comparison if row[-1]]
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+    else:
+        print_report(current)
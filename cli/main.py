@@ -0,0 +1,253 @@
+import os
+import sys
+import argparse
+import runpy
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# `sentinelrl <command>`: one entry point for the training / evaluation scripts.
+# only the standard library is imported here, torch / gymnasium / matplotlib are imported by the command that needs them,
+# so `--help` and argument errors return immediately
+
+
+def add_train_arguments(parser):
+    parser.add_argument("--agent", type=str, default="dqn", choices=["dqn", "double_dqn"], help="Agent type to train")
+    parser.add_argument("--episodes", type=int, default=500)
+    parser.add_argument("--buffer", type=str, default="deque", choices=["deque", "array", "prioritized", "mmap", "episode"], help="Replay buffer storage backend")
+    parser.add_argument("--buffer_capacity", type=int, default=100000, help="Replay buffer capacity (transitions)")
+    parser.add_argument("--buffer_dir", type=str, default=None, help="Directory of the memory-mapped replay buffer (reopened if it exists)")
+    parser.add_argument("--num_envs", type=int, default=1, help="Number of environments stepped in lock-step (>1 enables vectorized training)")
+    parser.add_argument("--env_workers", type=int, default=0, help="Worker processes stepping the --num_envs envs over shared memory (0 steps them in-process)")
+    parser.add_argument("--updates_per_batch", type=int, default=1, help="Gradient updates per collected batch in vectorized training")
+    parser.add_argument("--prefetch", type=int, default=0, help="Minibatches sampled ahead in a background thread (0 disables)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for python, numpy and torch RNGs")
+    parser.add_argument("--checkpoint_dir", type=str, default=None, help="Directory for periodic full-state checkpoints")
+    parser.add_argument("--checkpoint_every", type=int, default=0, help="Episodes between full-state checkpoints (0 disables)")
+    parser.add_argument("--keep_checkpoints", type=int, default=3, help="Number of most recent checkpoints to retain")
+    parser.add_argument("--resume", action="store_true", help="Continue from the latest checkpoint in --checkpoint_dir")
+    parser.add_argument("--profile", action="store_true", help="Record per-phase timings and throughput (JSONL/CSV + summary table)")
+    parser.add_argument("--profile_dir", type=str, default="results/profile", help="Output directory for profiler records")
+    parser.add_argument("--actors", type=int, default=0, help="Number of actor processes (>0 enables asynchronous actor-learner training)")
+    parser.add_argument("--sync_interval", type=int, default=100, help="Learner updates between actor weight syncs")
+    parser.add_argument("--queue_size", type=int, default=64, help="Max transition chunks buffered between actors and learner")
+    parser.add_argument("--lr", type=float, default=1e-4, help="Adam learning rate")
+    parser.add_argument("--gamma", type=float, default=0.99, help="Discount factor")
+    parser.add_argument("--epsilon_decay", type=float, default=0.995, help="Multiplicative epsilon decay per update")
+    parser.add_argument("--target_update_freq", type=int, default=1000, help="Updates between hard target network syncs")
+    parser.add_argument("--tau", type=float, default=0.0, help="Polyak coefficient for soft target updates every step (0 = hard copy every target_update_freq steps)")
+    parser.add_argument("--fused", action="store_true", help="Use the fused single-kernel Adam instead of the foreach one")
+    parser.add_argument("--compile", action="store_true", help="Compile the forward/target/loss computation with torch.compile")
+    parser.add_argument("--precision", type=str, default="fp32", choices=["fp32", "bf16"], help="bf16: bfloat16 autocast forward passes in train_step (loss and weights stay float32)")
+    parser.add_argument("--n_step", type=int, default=1, help="Return horizon of n-step targets (requires --buffer episode)")
+    parser.add_argument("--batch_size", type=int, default=64, help="Minibatch size (the global minibatch, split over the ranks, with --world_size)")
+    parser.add_argument("--hidden_dims", type=int, nargs="+", default=[128, 128], help="Hidden layer widths of the Q network")
+    parser.add_argument("--world_size", type=int, default=1, help="Data-parallel learner processes (>1 enables gloo all-reduce training, one replay shard per rank)")
+    parser.add_argument("--torch_threads", type=int, default=1, help="torch threads per rank with --world_size")
+
+
+# flags each training mode does not use. set away from their defaults they are an error instead of being dropped
+UNUSED_TRAIN_FLAGS = {
+    "serial": ("env_workers", "updates_per_batch", "sync_interval", "queue_size", "torch_threads"),
+    "vectorized (--num_envs)": ("checkpoint_dir", "checkpoint_every", "keep_checkpoints", "resume", "sync_interval", "queue_size", "torch_threads"),
+    "actor-learner (--actors)": ("num_envs", "env_workers", "updates_per_batch", "world_size", "checkpoint_dir", "checkpoint_every", "keep_checkpoints", "resume", "profile", "profile_dir", "torch_threads"),
+    "data-parallel (--world_size)": ("num_envs", "env_workers", "updates_per_batch", "checkpoint_dir", "checkpoint_every", "keep_checkpoints", "resume", "profile", "profile_dir", "sync_interval", "queue_size"),
+}
+
+
+def train_mode(args):
+    if args.actors > 0:
+        return "actor-learner (--actors)"
+    if args.world_size > 1:
+        return "data-parallel (--world_size)"
+    if args.num_envs > 1:
+        return "vectorized (--num_envs)"
+    return "serial"
+
+
+def check_train_arguments(args):
+    parser = argparse.ArgumentParser(prog="sentinelrl train")
+    add_train_arguments(parser)
+    defaults = parser.parse_args([])
+    mode = train_mode(args)
+    unused = [f"--{name}" for name in UNUSED_TRAIN_FLAGS[mode] if getattr(args, name) != getattr(defaults, name)]
+    if unused:
+        parser.error(f"{', '.join(unused)} not supported in {mode} training")
+    if args.n_step != 1 and args.buffer != "episode":
+        parser.error("--n_step requires --buffer episode")
+    return mode
+
+
+def run_train(args):
+    mode = check_train_arguments(args)
+    if mode == "actor-learner (--actors)":
+        from training.actor_learner import train_actor_learner
+        train_actor_learner(
+            agent_type=args.agent, num_episodes=args.episodes, buffer_type=args.buffer, num_actors=args.actors,
+            sync_interval=args.sync_interval, queue_size=args.queue_size, seed=args.seed,
+            buffer_capacity=args.buffer_capacity, buffer_dir=args.buffer_dir, prefetch=args.prefetch,
+            tau=args.tau, fused=args.fused, compile_step=args.compile,
+            lr=args.lr, gamma=args.gamma, epsilon_decay=args.epsilon_decay, target_update_freq=args.target_update_freq,
+            n_step=args.n_step, precision=args.precision, batch_size=args.batch_size, hidden_dims=args.hidden_dims,
+        )
+    elif mode == "data-parallel (--world_size)":
+        from training.distributed import train_distributed
+        train_distributed(agent_type=args.agent, num_episodes=args.episodes, world_size=args.world_size, buffer_type=args.buffer, buffer_capacity=args.buffer_capacity, buffer_dir=args.buffer_dir, batch_size=args.batch_size, hidden_dims=args.hidden_dims, seed=args.seed, lr=args.lr, gamma=args.gamma, epsilon_decay=args.epsilon_decay, target_update_freq=args.target_update_freq, tau=args.tau, fused=args.fused, n_step=args.n_step, precision=args.precision, torch_threads=args.torch_threads, prefetch=args.prefetch, compile_step=args.compile)
+    elif mode == "vectorized (--num_envs)":
+        from training.train import train_vectorized
+        train_vectorized(agent_type=args.agent, num_episodes=args.episodes, buffer_type=args.buffer, num_envs=args.num_envs, updates_per_batch=args.updates_per_batch, prefetch=args.prefetch, buffer_capacity=args.buffer_capacity, buffer_dir=args.buffer_dir, profile=args.profile, profile_dir=args.profile_dir, tau=args.tau, fused=args.fused, compile_step=args.compile, lr=args.lr, gamma=args.gamma, epsilon_decay=args.epsilon_decay, target_update_freq=args.target_update_freq, n_step=args.n_step, env_workers=args.env_workers, precision=args.precision, batch_size=args.batch_size, hidden_dims=args.hidden_dims, seed=args.seed)
+    else:
+        from training.train import train
+        train(
+            agent_type=args.agent, num_episodes=args.episodes, buffer_type=args.buffer, prefetch=args.prefetch,
+            buffer_capacity=args.buffer_capacity, buffer_dir=args.buffer_dir, seed=args.seed,
+            checkpoint_dir=args.checkpoint_dir, checkpoint_every=args.checkpoint_every,
+            keep_checkpoints=args.keep_checkpoints, resume=args.resume,
+            profile=args.profile, profile_dir=args.profile_dir,
+            tau=args.tau, fused=args.fused, compile_step=args.compile,
+            lr=args.lr, gamma=args.gamma, epsilon_decay=args.epsilon_decay, target_update_freq=args.target_update_freq,
+            n_step=args.n_step, precision=args.precision, batch_size=args.batch_size, hidden_dims=args.hidden_dims,
+        )
+
+
+def add_evaluate_arguments(parser):
+    parser.add_argument("--checkpoint", type=str, default="models/dqn_checkpoint.pt", help="path to model checkpoint")
+    parser.add_argument("--episodes", type=int, default=50, help="Number of evaulation episodes")
+    parser.add_argument("--int8", action="store_true", help="Evaluate a dynamic int8 quantized copy of the network")
+    parser.add_argument("--no_cache", "--no-cache", dest="no_cache", action="store_true", help="Always re-run rollouts, bypassing the result cache")
+    parser.add_argument("--cache_dir", type=str, default="results/cache", help="Result cache directory")
+
+
+def run_evaluate(args, agent=None):
+    from evaluation.evaluate import evaluate
+    evaluate(args.checkpoint, num_episodes=args.episodes, use_cache=not args.no_cache, cache_dir=args.cache_dir, quantize=args.int8, agent=agent)
+
+
+def add_stress_test_arguments(parser):
+    parser.add_argument("--checkpoint", type=str, required=True, help="path to model checkpoint")
+    parser.add_argument("--episodes", type=int, default=50, help="Number of evaulation episodes")
+    parser.add_argument("--reward_flip", action="store_true", help="Enable reward sign flip")
+    parser.add_argument("--reward_scale", type=float, default=1.0, help="Scale factor for reward under drift")
+    parser.add_argument("--drift_start", type=int, default=1, help="Step at which drift begin")
+    parser.add_argument("--target_drift", type=float, default=0.0, help="target drift value")
+    parser.add_argument("--sequential", action="store_true", help="Play episodes one at a time instead of the batched lock-step engine")
+    parser.add_argument("--env_workers", type=int, default=0, help="Worker processes stepping the lock-step episodes over shared memory (0 steps them in-process)")
+    parser.add_argument("--policy_table", action="store_true", help="Act through a greedy lookup table compiled over the reachable positions")
+    parser.add_argument("--int8", action="store_true", help="Evaluate a dynamic int8 quantized copy of the network")
+    parser.add_argument("--profile", action="store_true", help="Record per-phase timings and throughput")
+    parser.add_argument("--profile_dir", type=str, default="results/profile", help="Output directory for profiler records")
+    parser.add_argument("--no_cache", "--no-cache", dest="no_cache", action="store_true", help="Always re-run rollouts, bypassing the result cache")
+    parser.add_argument("--cache_dir", type=str, default="results/cache", help="Result cache directory")
+
+
+def run_stress_test(args, agent=None):
+    from evaluation.stress_test import stress_test
+    stress_test(checkpoint_path=args.checkpoint, num_episodes=args.episodes, reward_flip=args.reward_flip, reward_scale=args.reward_scale, drift_start_step=args.drift_start, target_drift=args.target_drift, profile=args.profile, profile_dir=args.profile_dir, batched=not args.sequential, use_cache=not args.no_cache, cache_dir=args.cache_dir, policy_table=args.policy_table, quantize=args.int8, agent=agent, env_workers=args.env_workers)
+
+
+def add_visualize_arguments(parser):
+    parser.add_argument("--table", type=str, default="results/sweep.csv", help="sweep table written by evaluation.sweep")
+    # evaluation.sweep.GRID_KEYS, repeated so --help does not import the sweep module
+    parser.add_argument("--x", type=str, default="target_drift", choices=["reward_flip", "reward_scale", "drift_start_step", "target_drift"], help="drift parameter on the x axis")
+    parser.add_argument("--y", type=str, default="drifted_mean", help="metric column on the y axis")
+
+
+def run_visualize(args):
+    from evaluation.visualizer import generate_degradation_plots
+    generate_degradation_plots(table_path=args.table, x=args.x, y=args.y)
+
+
+def add_worker_arguments(parser):
+    parser.add_argument("action", choices=["start", "stop", "status"], help="start (foreground unless --detach), stop or query the warm worker")
+    parser.add_argument("--detach", action="store_true", help="start the worker in the background and return once it accepts requests")
+
+
+def run_worker(args):
+    from cli import worker
+    if args.action == "start":
+        worker.start(args.socket, detach=args.detach)
+    elif args.action == "stop":
+        worker.stop(args.socket)
+    else:
+        worker.status(args.socket)
+
+
+def add_timings_arguments(parser):
+    parser.add_argument("--checkpoint", type=str, default=None, help="also time a cached stress test of this checkpoint, cold and through the warm worker")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is reported)")
+
+
+def run_timings(args):
+    from cli.timings import startup_timings
+    startup_timings(args.checkpoint, socket_path=args.socket, repeat=args.repeat)
+
+
+# name -> (help, add_arguments, run, runs in the warm worker)
+COMMANDS = {
+    "train": ("train a DQN / Double DQN agent", add_train_arguments, run_train, False),
+    "evaluate": ("greedy evaluation of a checkpoint on the clean env", add_evaluate_arguments, run_evaluate, True),
+    "stress-test": ("clean vs drifted robustness metrics of a checkpoint", add_stress_test_arguments, run_stress_test, True),
+    "visualize": ("degradation curves from a sweep table", add_visualize_arguments, run_visualize, False),
+    "worker": ("persistent warm worker for evaluate / stress-test", add_worker_arguments, run_worker, False),
+    "timings": ("startup time of the CLI, the scripts and the warm worker", add_timings_arguments, run_timings, False),
+}
+
+# the remaining scripts keep their own argument parsers and run as `python -m <module>` would
+PASSTHROUGH = {
+    "sweep": ("evaluation.sweep", "parallel drift sweep over checkpoints"),
+    "multi-eval": ("evaluation.multi_checkpoint_eval", "stacked evaluation of many checkpoints"),
+    "precision-report": ("evaluation.precision_report", "fp32 / bf16 / int8 parity report"),
+    "schedule": ("training.scheduler", "multi-seed successive-halving search"),
+    "scaling": ("training.distributed", "data-parallel learner scaling efficiency"),
+    "export": ("networks.numpy_policy", "export a checkpoint to a numpy policy"),
+    "policy-table": ("networks.policy_table", "compile a greedy lookup table"),
+    "serve": ("serving.policy_server", "micro-batching policy server"),
+    "benchmark": ("benchmarks.run_benchmarks", "hot path micro-benchmarks"),
+}
+
+
+def default_socket():
+    return os.environ.get("SENTINELRL_SOCKET", os.path.join("/tmp", f"sentinelrl-{os.getuid()}.sock"))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sentinelrl", description="SentinelRL training, evaluation and robustness tooling")
+    parser.add_argument("--warm", action="store_true", help="run evaluate / stress-test in the warm worker when one is running")
+    parser.add_argument("--socket", type=str, default=default_socket(), help="unix socket of the warm worker")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (help_text, add_arguments, _, _) in COMMANDS.items():
+        add_arguments(subparsers.add_parser(name, help=help_text))
+    for name, (module, help_text) in PASSTHROUGH.items():
+        subparsers.add_parser(name, help=f"{help_text} ({module})", add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+
+    if args.command in PASSTHROUGH:
+        module = PASSTHROUGH[args.command][0]
+        sys.argv = [f"sentinelrl {args.command}", *rest]
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+        return 0
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    _, _, run, warm_capable = COMMANDS[args.command]
+    if args.warm and warm_capable:
+        from cli import worker
+        # argv without the global options, parsed again by the worker
+        command_argv = argv[argv.index(args.command):]
+        code = worker.run_remote(args.socket, command_argv)
+        if code is not None:
+            return code
+        print(f"no warm worker on {args.socket}, running in this process")
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
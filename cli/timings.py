@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import shlex
+import subprocess
+
+from cli import worker
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _best_seconds(argv, repeat=3):
+    # wall time of a fresh interpreter running argv, best of `repeat`
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def startup_timings(checkpoint=None, socket_path=None, repeat=3):
+    from cli.main import default_socket
+
+    socket_path = socket_path or default_socket()
+    python = sys.executable
+    cli = [python, "-m", "cli.main"]
+    cases = [
+        ("sentinelrl --help", cli + ["--help"]),
+        ("sentinelrl stress-test --help", cli + ["stress-test", "--help"]),
+        # what every script paid before: importing its module pulls in torch / gymnasium (matplotlib for the visualizer)
+        ("eager import evaluation.stress_test", [python, "-c", "import evaluation.stress_test"]),
+        ("eager import evaluation.visualizer", [python, "-c", "import evaluation.visualizer"]),
+    ]
+
+    started_worker = False
+    if checkpoint is not None:
+        stress = ["stress-test", "--checkpoint", os.path.abspath(checkpoint)]
+        # first run fills the result cache, so every timed run below is a cached-result lookup
+        subprocess.run(cli + stress, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, check=True)
+        cases.append(("stress-test, cached results (cold process)", cli + stress))
+        if worker.request(socket_path, {"cmd": "status"}, timeout=1.0) is None:
+            worker.start(socket_path, detach=True)
+            started_worker = True
+        warm = cli + ["--warm", "--socket", socket_path] + stress
+        # the first warm call loads the checkpoint into the worker
+        subprocess.run(warm, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, check=True)
+        cases.append(("stress-test, cached results (--warm)", warm))
+
+    try:
+        rows = [(name, argv, _best_seconds(argv, repeat=repeat)) for name, argv in cases]
+    finally:
+        if started_worker:
+            worker.stop(socket_path)
+
+    print(f"{'startup':<46}{'seconds':>9}")
+    for name, _, seconds in rows:
+        print(f"{name:<46}{seconds:>9.3f}")
+    for name, argv, _ in rows:
+        print(f"  {name}: {' '.join(shlex.quote(a) for a in argv)}")
+    return rows
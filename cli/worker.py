@@ -0,0 +1,184 @@
+import os
+import io
+import sys
+import json
+import time
+import socket
+import argparse
+import contextlib
+import subprocess
+import socketserver
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# persistent process that keeps torch, the evaluation modules and every checkpoint it has loaded resident,
+# so repeated `sentinelrl --warm stress-test ...` calls skip interpreter start, imports and checkpoint loading.
+# protocol: one JSON object per line over a unix socket, one JSON reply per request
+
+
+class WarmWorker:
+    def __init__(self):
+        # imported once, up front: this is the cost the worker exists to pay only once
+        from environments.clean_env import CleanEnv
+        from evaluation import evaluate, stress_test
+
+        env = CleanEnv()
+        self.obs_dim = env.observation_space.shape[0]
+        self.action_dim = env.action_space.n
+        self.loaders = {
+            "evaluate": evaluate.load_agent,
+            "stress-test": lambda path, quantize: stress_test.build_agent_from_checkpoint(path, self.obs_dim, self.action_dim, quantize=quantize),
+        }
+        # (command, checkpoint path, mtime, int8) -> agent. a rewritten checkpoint gets a new mtime and is reloaded
+        self.agents = {}
+        self.started = time.time()
+        self.requests = 0
+        self.stopped = False
+
+    def _agent(self, command, args):
+        path = os.path.abspath(args.checkpoint)
+        key = (command, path, os.stat(path).st_mtime_ns, args.int8)
+        if key not in self.agents:
+            self.agents = {k: v for k, v in self.agents.items() if k[:2] != key[:2]}
+            self.agents[key] = self.loaders[command](path, args.int8)
+        return self.agents[key]
+
+    def run(self, argv, cwd):
+        from cli.main import COMMANDS
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        code = 0
+        previous_cwd = os.getcwd()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                os.chdir(cwd)
+                command = argv[0]
+                if command not in self.loaders:
+                    raise ValueError(f"the warm worker runs {sorted(self.loaders)}, not {command!r}")
+                _, add_arguments, run, _ = COMMANDS[command]
+                parser = argparse.ArgumentParser(prog=f"sentinelrl {command}")
+                add_arguments(parser)
+                args = parser.parse_args(argv[1:])
+                run(args, agent=self._agent(command, args))
+            except SystemExit as exc:
+                code = exc.code if isinstance(exc.code, int) else 1
+            except Exception as exc:
+                print(f"{type(exc).__name__}: {exc}")
+                code = 1
+            finally:
+                os.chdir(previous_cwd)
+        self.requests += 1
+        return {"code": code, "output": output.getvalue(), "seconds": time.perf_counter() - start}
+
+    def handle(self, request):
+        cmd = request.get("cmd")
+        if cmd == "run":
+            return self.run(request["argv"], request.get("cwd", os.getcwd()))
+        if cmd == "status":
+            return {
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "requests": self.requests,
+                "checkpoints": sorted({f"{k[1]} ({k[0]}{', int8' if k[3] else ''})" for k in self.agents}),
+            }
+        if cmd == "shutdown":
+            self.stopped = True
+            return {"stopping": True}
+        return {"error": f"unknown command {cmd!r}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.worker.handle(json.loads(line))
+            except (ValueError, KeyError) as exc:
+                response = {"error": f"bad request: {exc}"}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+            self.wfile.flush()
+            if self.server.worker.stopped:
+                return
+
+
+def request(socket_path, message, timeout=None):
+    # one request / reply round trip, None when no worker is listening
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall((json.dumps(message) + "\n").encode())
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+    except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+        return None
+    return json.loads(line) if line else None
+
+
+def run_remote(socket_path, argv):
+    # exit code of the command run in the worker, None when there is no worker to run it
+    response = request(socket_path, {"cmd": "run", "argv": list(argv), "cwd": os.getcwd()})
+    if response is None:
+        return None
+    sys.stdout.write(response["output"])
+    print(f"[warm worker: {response['seconds']:.2f}s]")
+    return response["code"]
+
+
+def serve(socket_path):
+    if request(socket_path, {"cmd": "status"}, timeout=1.0) is not None:
+        raise RuntimeError(f"a worker is already listening on {socket_path}")
+    if os.path.exists(socket_path):
+        # stale socket file of a worker that is gone
+        os.unlink(socket_path)
+    worker = WarmWorker()
+    server = socketserver.UnixStreamServer(socket_path, _Handler)
+    server.worker = worker
+    print(f"warm worker {os.getpid()} listening on {socket_path}", flush=True)
+    try:
+        # one request at a time: loaded agents and the cwd are shared state
+        while not worker.stopped:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def start(socket_path, detach=False, timeout=120.0):
+    if not detach:
+        serve(socket_path)
+        return
+    log_path = os.path.splitext(socket_path)[0] + ".log"
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "cli.main", "--socket", socket_path, "worker", "start"],
+            cwd=PROJECT_ROOT, stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True,
+        )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = request(socket_path, {"cmd": "status"}, timeout=1.0)
+        if status is not None:
+            print(f"warm worker {status['pid']} ready on {socket_path} (log: {log_path})")
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"warm worker did not come up within {timeout:.0f}s, see {log_path}")
+
+
+def stop(socket_path):
+    if request(socket_path, {"cmd": "shutdown"}, timeout=5.0) is None:
+        print(f"no warm worker on {socket_path}")
+    else:
+        print(f"warm worker on {socket_path} stopped")
+
+
+def status(socket_path):
+    response = request(socket_path, {"cmd": "status"}, timeout=5.0)
+    if response is None:
+        print(f"no warm worker on {socket_path}")
+        return
+    print(f"warm worker {response['pid']} on {socket_path}: up {response['uptime']:.0f}s, {response['requests']} requests")
+    for checkpoint in response["checkpoints"]:
+        print(f"  resident: {checkpoint}")
@@ -0,0 +1,273 @@
+import copy
+import functools
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import gymnasium as gym
+from gymnasium.vector.utils import batch_space
+
+from environments.vector_env import _AUTORESET_METADATA
+
+
+def _attach(specs):
+    # map the parent's shared memory blocks into this process as numpy arrays
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return blocks, arrays
+
+
+def _worker(env_fn, env_ids, conn, specs):
+    # hosts the envs env_ids, steps them on command and writes results straight into the shared arrays.
+    # finished envs are reset in the same step, their last observation goes to final_obs
+    blocks, arrays = _attach(specs)
+    actions, obs, final_obs = arrays["actions"], arrays["obs"], arrays["final_obs"]
+    rewards, terminated, truncated = arrays["rewards"], arrays["terminated"], arrays["truncated"]
+    envs = {}
+    try:
+        envs = {i: env_fn() for i in env_ids}
+        conn.send(("ok", None))
+        while True:
+            cmd, payload = conn.recv()
+            if cmd == "step":
+                for i, env in envs.items():
+                    ob, reward, term, trunc, _ = env.step(actions[i])
+                    if term or trunc:
+                        final_obs[i] = ob
+                        ob, _ = env.reset()
+                    obs[i] = ob
+                    rewards[i] = reward
+                    terminated[i] = term
+                    truncated[i] = trunc
+            elif cmd == "reset":
+                for i, seed in payload:
+                    obs[i], _ = envs[i].reset(seed=seed)
+            elif cmd == "drift":
+                ids, kwargs = payload
+                for i in ids:
+                    envs[i].inject_drift(**kwargs)
+            elif cmd == "close":
+                break
+            conn.send(("ok", None))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        # reported to the parent, which restarts this worker
+        try:
+            conn.send(("error", traceback.format_exc()))
+        except (BrokenPipeError, OSError):
+            pass
+    finally:
+        for env in envs.values():
+            env.close()
+        conn.close()
+        for shm in blocks:
+            shm.close()
+
+
+class EnvPool(gym.vector.VectorEnv):
+    # runs num_envs copies of any BaseEnv subclass in num_workers processes, stepped in lock-step.
+    # observations, rewards and done flags come back through shared memory arrays, only commands go over pipes.
+    # same interface as VectorCleanEnv: finished sub-envs are reset in the same step, their last observation is in
+    # infos["final_obs"] (rows selected by infos["_final_obs"]).
+    #
+    # a worker that crashes, raises or (with step_timeout) hangs is restarted: its envs are rebuilt, reset, get their
+    # injected drift replayed, and are reported as truncated for that step (infos["restarted"] marks them)
+
+    metadata = {"render_modes": [None], **_AUTORESET_METADATA}
+
+    def __init__(self, env_fn, num_envs, num_workers=None, obs_shape=None, context="spawn", step_timeout=None, max_restarts=10):
+        # env_fn: picklable zero-argument factory, e.g. functools.partial(DriftedEnv, reward_scale=2.0)
+        self.env_fn = env_fn
+        self.num_envs = int(num_envs)
+        self.num_workers = min(int(num_workers or mp.cpu_count()), self.num_envs)
+        self.render_mode = None
+        self.step_timeout = step_timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.closed = False
+
+        # spaces (and the real observation shape, which may differ from the declared space) from one local env
+        probe = env_fn()
+        self.single_observation_space = probe.observation_space
+        self.single_action_space = probe.action_space
+        if obs_shape is None:
+            obs_shape = np.shape(probe.reset()[0])
+        probe.close()
+        self.observation_space = batch_space(self.single_observation_space, self.num_envs)
+        self.action_space = batch_space(self.single_action_space, self.num_envs)
+
+        obs_dtype = self.single_observation_space.dtype or np.float32
+        layout = {
+            "actions": ((self.num_envs,), np.int64),
+            "obs": ((self.num_envs, *obs_shape), obs_dtype),
+            "final_obs": ((self.num_envs, *obs_shape), obs_dtype),
+            "rewards": ((self.num_envs,), np.float64),
+            "terminated": ((self.num_envs,), bool),
+            "truncated": ((self.num_envs,), bool),
+        }
+        self._blocks = []
+        self._specs = {}
+        for name, (shape, dtype) in layout.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+            self._blocks.append(shm)
+            self._specs[name] = (shm.name, shape, np.dtype(dtype))
+            setattr(self, f"_{name}", np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+        self._last_obs = np.zeros_like(self._obs)
+
+        # contiguous env slices per worker, and the drift injected into each env (replayed after a restart)
+        self.worker_envs = [ids.tolist() for ids in np.array_split(np.arange(self.num_envs), self.num_workers)]
+        self._worker_of = np.concatenate([np.full(len(ids), w) for w, ids in enumerate(self.worker_envs)])
+        self._drift = [{} for _ in range(self.num_envs)]
+
+        self._ctx = mp.get_context(context)
+        self._procs = [None] * self.num_workers
+        self._conns = [None] * self.num_workers
+        for w in range(self.num_workers):
+            self._start_worker(w)
+        failed = self._wait(range(self.num_workers))
+        if failed:
+            self.close()
+            raise RuntimeError(f"env workers {failed} failed to start")
+
+    @classmethod
+    def from_env(cls, env, num_envs, num_workers=None, **kwargs):
+        # pool of independent copies of an already configured env instance
+        return cls(functools.partial(copy.deepcopy, env), num_envs, num_workers=num_workers, **kwargs)
+
+    def _start_worker(self, w):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker, args=(self.env_fn, self.worker_envs[w], child_conn, self._specs), daemon=True)
+        proc.start()
+        child_conn.close()
+        self._procs[w] = proc
+        self._conns[w] = parent_conn
+
+    def _wait(self, workers):
+        # collect one ack per worker, returns the workers that died, raised or timed out
+        failed = []
+        for w in workers:
+            conn = self._conns[w]
+            try:
+                if self.step_timeout is not None and not conn.poll(self.step_timeout):
+                    raise TimeoutError(f"no reply within {self.step_timeout}s")
+                status, message = conn.recv()
+            except (EOFError, OSError, TimeoutError) as exc:
+                status, message = "error", repr(exc)
+            if status != "ok":
+                print(f"EnvPool worker {w} failed (envs {self.worker_envs[w]}): {message}")
+                failed.append(w)
+        return failed
+
+    def _send(self, workers, cmd, payloads=None):
+        # returns the workers whose pipe is already broken
+        broken = []
+        for w in workers:
+            try:
+                self._conns[w].send((cmd, None if payloads is None else payloads[w]))
+            except (BrokenPipeError, OSError):
+                broken.append(w)
+        return broken
+
+    def _restart(self, w):
+        self.restarts += 1
+        if self.restarts > self.max_restarts:
+            raise RuntimeError(f"EnvPool exceeded max_restarts={self.max_restarts}")
+        proc, conn = self._procs[w], self._conns[w]
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        conn.close()
+
+        self._start_worker(w)
+        ids = self.worker_envs[w]
+        commands = [("reset", [(i, None) for i in ids])]
+        commands += [("drift", ([i], self._drift[i])) for i in ids if self._drift[i]]
+        for cmd, payload in commands:
+            if self._wait([w]) or self._send([w], cmd, {w: payload}):
+                raise RuntimeError(f"env worker {w} failed again while restarting")
+        if self._wait([w]):
+            raise RuntimeError(f"env worker {w} failed again while restarting")
+
+    def _run(self, workers, cmd, payloads=None):
+        broken = self._send(workers, cmd, payloads)
+        failed = sorted(set(broken) | set(self._wait([w for w in workers if w not in broken])))
+        for w in failed:
+            self._restart(w)
+        return failed
+
+    def reset(self, *, seed=None, options=None):
+        # seed: int (sub-env i gets seed + i) or one seed per sub-env. options={"env_ids": [...]} resets only those
+        env_ids = (options or {}).get("env_ids")
+        ids = np.arange(self.num_envs) if env_ids is None else np.asarray(env_ids, dtype=np.int64)
+        if seed is None:
+            seeds = [None] * len(ids)
+        elif np.ndim(seed) == 0:
+            seeds = [int(seed) + int(i) for i in ids]
+        else:
+            seeds = list(seed)
+        payloads = {}
+        for i, s in zip(ids.tolist(), seeds):
+            payloads.setdefault(int(self._worker_of[i]), []).append((i, s))
+        # restarted workers come back freshly reset, which is what was asked for anyway
+        self._run(list(payloads), "reset", payloads)
+        self._last_obs[:] = self._obs
+        return self._obs.copy(), {}
+
+    def step(self, actions):
+        self._actions[:] = actions
+        failed = self._run(range(self.num_workers), "step")
+
+        restarted = np.zeros(self.num_envs, dtype=bool)
+        for w in failed:
+            # the interrupted episodes end here: truncated, no reward, last known observation as final_obs
+            ids = self.worker_envs[w]
+            restarted[ids] = True
+            self._final_obs[ids] = self._last_obs[ids]
+            self._rewards[ids] = 0.0
+            self._terminated[ids] = False
+            self._truncated[ids] = True
+
+        infos = {}
+        done = self._terminated | self._truncated
+        if done.any():
+            infos["final_obs"] = self._final_obs.copy()
+            infos["_final_obs"] = done
+        if failed:
+            infos["restarted"] = restarted
+        self._last_obs[:] = self._obs
+        return self._obs.copy(), self._rewards.copy(), self._terminated.copy(), self._truncated.copy(), infos
+
+    def inject_drift(self, env_ids=None, **kwargs):
+        # forwarded to the selected sub-envs (all when env_ids is None), only their workers are messaged
+        ids = range(self.num_envs) if env_ids is None else np.asarray(env_ids, dtype=np.int64).reshape(-1).tolist()
+        payloads = {}
+        for i in ids:
+            self._drift[i].update(kwargs)
+            payloads.setdefault(int(self._worker_of[i]), ([], kwargs))[0].append(i)
+        # a restarted worker already replayed the recorded drift, including this call
+        self._run(list(payloads), "drift", payloads)
+
+    def close_extras(self, **kwargs):
+        for w, conn in enumerate(self._conns):
+            if conn is None:
+                continue
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for w, proc in enumerate(self._procs):
+            if proc is None:
+                continue
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+            self._conns[w].close()
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
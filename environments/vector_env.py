@@ -0,0 +1,157 @@
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector.utils import batch_space
+
+# python float <-> np.float32 arithmetic in CleanEnv promotes to float32 under NEP 50 (numpy >= 2)
+# and to float64 before it. computing rewards in the same dtype keeps them bit-identical to the scalar envs
+REWARD_DTYPE = np.dtype(type(np.float32(1.0) - 1.0))
+
+try:
+    from gymnasium.vector import AutoresetMode
+    _AUTORESET_METADATA = {"autoreset_mode": AutoresetMode.SAME_STEP}
+except ImportError:
+    # gymnasium < 1.0 always resets in the same step
+    _AUTORESET_METADATA = {}
+
+
+class VectorCleanEnv(gym.vector.VectorEnv):
+    # N independent CleanEnv copies held as (N,) arrays and stepped in one vectorized call.
+    # finished sub-envs are reset in the same step, their last observation is returned in
+    # infos["final_obs"] (rows selected by the infos["_final_obs"] mask)
+
+    metadata = {"render_modes": [None], **_AUTORESET_METADATA}
+
+    def __init__(self, num_envs, target_position=10.0, max_steps=200, render_mode=None, terminate_on_goal=True):
+        self.num_envs = int(num_envs)
+        self.render_mode = render_mode
+        self.max_steps = max_steps
+        self.terminate_on_goal = terminate_on_goal
+
+        self.single_observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(1,), dtype=np.float32)
+        self.single_action_space = spaces.Discrete(2)
+        self.observation_space = batch_space(self.single_observation_space, self.num_envs)
+        self.action_space = batch_space(self.single_action_space, self.num_envs)
+
+        self.initial_target = self._per_env(target_position, np.float64)
+        self.target_position = self.initial_target.copy()
+        self.state = np.zeros((self.num_envs, 1), dtype=np.float32)
+        self.steps = np.zeros(self.num_envs, dtype=np.int64)
+        self.closed = False
+
+    def _per_env(self, value, dtype):
+        # accept a scalar (shared by all sub-envs) or one value per sub-env
+        return np.broadcast_to(np.asarray(value, dtype=dtype), (self.num_envs,)).copy()
+
+    def _env_index(self, env_ids):
+        if env_ids is None:
+            return np.arange(self.num_envs)
+        return np.asarray(env_ids, dtype=np.int64)
+
+    def _reset_envs(self, selected):
+        # selected is a boolean mask or an index array over sub-envs
+        self.state[selected] = 0.0
+        self.steps[selected] = 0
+        self.target_position[selected] = self.initial_target[selected]
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self._np_random, self._np_random_seed = gym.utils.seeding.np_random(seed)
+        # options={"env_ids": [...]} resets only the selected sub-envs
+        env_ids = (options or {}).get("env_ids")
+        self._reset_envs(self._env_index(env_ids))
+        return self.state.copy(), {}
+
+    def _transition(self, actions):
+        self.steps += 1
+        self.state[:, 0] += np.where(actions == 0, np.float32(-1.0), np.float32(1.0))
+
+        dist = np.abs(self.target_position.astype(REWARD_DTYPE) - self.state[:, 0].astype(REWARD_DTYPE))
+        rewards = -dist
+
+        if self.terminate_on_goal:
+            terminated = dist < 0.5
+        else:
+            terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = self.steps >= self.max_steps
+        return rewards, terminated, truncated
+
+    def _autoreset(self, terminated, truncated, infos):
+        done = terminated | truncated
+        if done.any():
+            infos["final_obs"] = self.state.copy()
+            infos["_final_obs"] = done
+            self._reset_envs(done)
+        return infos
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        rewards, terminated, truncated = self._transition(actions)
+        infos = self._autoreset(terminated, truncated, {})
+        return self.state.copy(), rewards, terminated, truncated, infos
+
+    def inject_drift(self, env_ids=None, **kwargs):
+        # clean environment does not support drift
+        # only to mirror the BaseEnv contract
+        pass
+
+
+class VectorDriftedEnv(VectorCleanEnv):
+    # vectorized DriftedEnv. every drift parameter is an (N,) array so sub-envs can drift differently
+
+    def __init__(
+            self,
+            num_envs,
+            target_position=10.0,
+            max_steps=200,
+            render_mode=None,
+            drift_start_step=100,
+            reward_flip=False,
+            reward_scale=1.0,
+            target_drift_per_step=0.0,
+    ):
+        super().__init__(num_envs, target_position=target_position, max_steps=max_steps, render_mode=render_mode)
+        # drift config
+        self.drift_start_step = self._per_env(drift_start_step, np.int64)
+        self.reward_flip = self._per_env(reward_flip, bool)
+        self.reward_scale = self._per_env(reward_scale, np.float64)
+        self.target_drift_per_step = self._per_env(target_drift_per_step, np.float64)
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        # global step after this transition, same ordering as DriftedEnv.step
+        drifting = self.steps + 1 >= self.drift_start_step
+
+        #apply drift
+        self.target_position[drifting] += self.target_drift_per_step[drifting]
+
+        #base transition
+        rewards, terminated, truncated = self._transition(actions)
+
+        #apply reward distortion
+        rewards = np.where(drifting & self.reward_flip, rewards - rewards, rewards)
+        rewards = np.where(drifting, rewards * self.reward_scale.astype(REWARD_DTYPE), rewards)
+
+        infos = {"current_target": self.target_position.copy()}
+        infos = self._autoreset(terminated, truncated, infos)
+        return self.state.copy(), rewards, terminated, truncated, infos
+
+    def inject_drift(
+            self,
+            env_ids=None,
+            *,
+            reward_flip=None,
+            reward_scale=None,
+            target_drift_per_step=None,
+            drift_start_step=None,
+    ):
+        # dynamically modify drift parameters of the selected sub-envs (all when env_ids is None)
+        ids = self._env_index(env_ids)
+        if reward_flip is not None:
+            self.reward_flip[ids] = reward_flip
+        if reward_scale is not None:
+            self.reward_scale[ids] = reward_scale
+        if target_drift_per_step is not None:
+            self.target_drift_per_step[ids] = target_drift_per_step
+        if drift_start_step is not None:
+            self.drift_start_step[ids] = drift_start_step
@@ -0,0 +1,63 @@
+import numpy as np
+
+from environments.clean_env import CleanEnv
+from environments.drifted_env import DriftedEnv
+from environments.vector_env import VectorCleanEnv, VectorDriftedEnv, REWARD_DTYPE
+from profiling.profiler import NULL_PROFILER
+
+
+def vector_env_like(env, num_envs):
+    # vectorized twin of a scalar CleanEnv / DriftedEnv with identical parameters
+    if isinstance(env, DriftedEnv):
+        venv = VectorDriftedEnv(
+            num_envs,
+            target_position=env.initial_target,
+            max_steps=env.max_steps,
+            drift_start_step=env.drift_start_step,
+            reward_flip=env.reward_flip,
+            reward_scale=env.reward_scale,
+            target_drift_per_step=env.target_drift_per_step,
+        )
+        venv.terminate_on_goal = env.terminate_on_goal
+        return venv
+    if isinstance(env, CleanEnv):
+        return VectorCleanEnv(num_envs, target_position=env.target_position, max_steps=env.max_steps, terminate_on_goal=env.terminate_on_goal)
+    raise TypeError(f"No vectorized counterpart for {type(env).__name__}")
+
+
+def supports_batched(env):
+    # subclasses may change the dynamics, only the exact built-in envs have a vector twin
+    return type(env) in (CleanEnv, DriftedEnv)
+
+
+def run_policy_batched(env, agent, num_episodes=50, max_steps=200, profiler=NULL_PROFILER, venv=None):
+    # plays all episodes in lock-step: one greedy forward per time step over the still-running episodes.
+    # returns the same per-episode rewards (values and dtype) as stress_test.run_policy.
+    # venv: a prepared vector env of num_episodes copies (e.g. an EnvPool for envs without a vector twin)
+    if venv is None:
+        venv = vector_env_like(env, num_episodes)
+    with profiler.phase("env_reset"):
+        obs, _ = venv.reset()
+
+    # reproduce the scalar engine's reward dtype: the built-in envs (vector twins, or pooled copies) sum in
+    # REWARD_DTYPE, other envs keep their own
+    builtin = isinstance(venv, VectorCleanEnv) or isinstance(env, CleanEnv)
+    episode_rewards = np.zeros(num_episodes, dtype=REWARD_DTYPE if builtin else np.float64)
+    active = np.ones(num_episodes, dtype=bool)
+    actions = np.zeros(num_episodes, dtype=np.int64)
+
+    for _ in range(max_steps):
+        with profiler.phase("select_action"):
+            actions[active] = agent.select_actions(obs[active], explore=False)
+        with profiler.phase("env_step"):
+            obs, rewards, terminated, truncated, _ = venv.step(actions)
+        profiler.count("env_steps", int(active.sum()))
+
+        # finished episodes were auto-reset by the vector env, keep them out of the totals
+        episode_rewards[active] += rewards[active]
+        active &= ~(terminated | truncated)
+        if not active.any():
+            break
+
+    profiler.count("episodes", num_episodes)
+    return episode_rewards
@@ -1,50 +1,50 @@
-import numpy as np
-import torch
-import os
-import sys
-
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
-from environments.clean_env import CleanEnv
-from agents.dqn_agent import DQNAgent
-
-def evaluate(checkpoint_path, num_episodes=50, max_steps=200,):
-    env = CleanEnv(max_steps=max_steps)
-    obs_dim = env.observation_space.shape[0]
-    action_dim = env.action_space.n
-
-    agent = DQNAgent(obs_dim=obs_dim, action_dim=action_dim,)
-    agent.load(checkpoint_path)
-    agent.epsilon = 0.0 #disable exploration
-
-    rewards = []
-    print("Evaluating trained policy (no exploration)")
-
-    for ep in range(1, max_steps+1):
-        obs, _ = env.reset()
-        episode_reward = 0.0
-
-        for _ in range(max_steps):
-            action = agent.select_action(obs, explore=True)
-            obs, reward, terminated, truncated, _ = env.step(action)
-            episode_reward += reward
-            if truncated or terminated:
-                break
-        
-        rewards.append(episode_reward)
-        print(f"Episode {ep:3d} | Reward: {episode_reward:8.2f}")
-    
-    rewards = np.array(reward)
-    print("Summary")
-    print("-"*60)
-    print(f"Mean Reward : {rewards.mean():.2f}")
-    print(f"Std Reward : {rewards.std():.2f}")
-    print(f"Min Reward : {rewards.min():.2f}")
-    print(f"Max Reward : {rewards.max():.2f}")
-
-    return rewards
-
-if __name__ == "__main__":
-    evaluate("models/dqn_checkpoint.pt")
\ No newline at end of file
+import numpy as np
+import torch
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from environments.clean_env import CleanEnv
+from agents.dqn_agent import DQNAgent
+from evaluation.stress_test import evaluate_policy
+from evaluation.result_cache import ResultCache
+
+def load_agent(checkpoint_path, quantize=False):
+    env = CleanEnv()
+    agent = DQNAgent(obs_dim=env.observation_space.shape[0], action_dim=env.action_space.n,)
+    agent.load(checkpoint_path)
+    agent.epsilon = 0.0 #disable exploration
+    if quantize:
+        agent.quantize()
+    return agent
+
+def evaluate(checkpoint_path, num_episodes=50, max_steps=200, batched=True, use_cache=True, cache_dir="results/cache", quantize=False, agent=None):
+    # agent: an already loaded agent for checkpoint_path (the warm worker keeps them resident)
+    env = CleanEnv(max_steps=max_steps)
+    if agent is None:
+        agent = load_agent(checkpoint_path, quantize=quantize)
+
+    print("Evaluating trained policy (no exploration)")
+
+    # all episodes run in lock-step with one greedy forward per step
+    cache = ResultCache(cache_dir) if use_cache else None
+    rewards = evaluate_policy(env, agent, num_episodes=num_episodes, max_steps=max_steps, batched=batched, cache=cache)
+    for ep, episode_reward in enumerate(rewards, start=1):
+        print(f"Episode {ep:3d} | Reward: {episode_reward:8.2f}")
+    
+    print("Summary")
+    print("-"*60)
+    print(f"Mean Reward : {rewards.mean():.2f}")
+    print(f"Std Reward : {rewards.std():.2f}")
+    print(f"Min Reward : {rewards.min():.2f}")
+    print(f"Max Reward : {rewards.max():.2f}")
+
+    return rewards
+
+if __name__ == "__main__":
+    # arguments are defined once, in the unified CLI (`sentinelrl evaluate`)
+    from cli.main import main
+    sys.exit(main(["evaluate", *sys.argv[1:]]))
@@ -1,27 +1,200 @@
-import numpy as np
-
-def compute_regret(rewards, optimal_reward):
-    rewards = np.asarray(rewards)
-    regret = optimal_reward-rewards
-    return{
-        "mean_regret":float(regret.mean()),
-        "max_regret":float(regret.max()),
-        "min_regret":float(regret.min()),
-    }
-
-def collapse_rate(rewards, threshold):
-    rewards = np.asarray(rewards)
-    return float(np.mean(rewards < threshold))
-
-def reward_variance(rewards):
-    rewards = np.asarray(rewards)
-    return float(np.var(rewards))
-
-def summarize(rewards, name="env"):
-    rewards = np.asarray(rewards)
-    return{
-        f"{name}_mean":float(rewards.mean()),
-        f"{name}_std":float(rewards.std()),
-        f"{name}_min":float(rewards.min()),
-        f"{name}_max":float(rewards.max()),
-    }
\ No newline at end of file
+import numpy as np
+
+def compute_regret(rewards, optimal_reward):
+    rewards = np.asarray(rewards)
+    regret = optimal_reward-rewards
+    return{
+        "mean_regret":float(regret.mean()),
+        "max_regret":float(regret.max()),
+        "min_regret":float(regret.min()),
+    }
+
+def collapse_rate(rewards, threshold):
+    rewards = np.asarray(rewards)
+    return float(np.mean(rewards < threshold))
+
+def reward_variance(rewards):
+    rewards = np.asarray(rewards)
+    return float(np.var(rewards))
+
+def summarize(rewards, name="env"):
+    rewards = np.asarray(rewards)
+    return{
+        f"{name}_mean":float(rewards.mean()),
+        f"{name}_std":float(rewards.std()),
+        f"{name}_min":float(rewards.min()),
+        f"{name}_max":float(rewards.max()),
+    }
+
+class RewardAccumulator:
+    # streaming episode-reward statistics: fed one episode (or one batch) at a time, mergeable across workers.
+    # mean / variance via Welford (Chan et al. for batches and merges), exact min / max / collapse counts,
+    # quantiles approximated from a uniform reservoir sample of at most reservoir_size rewards
+
+    def __init__(self, collapse_threshold=None, reservoir_size=1024, seed=None):
+        self.collapse_threshold = collapse_threshold
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(seed)
+
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.collapses = 0
+        self.reservoir = np.empty(reservoir_size, dtype=np.float64)
+
+    def update(self, reward):
+        self.update_batch(np.asarray([reward], dtype=np.float64))
+
+    def update_batch(self, rewards):
+        rewards = np.asarray(rewards, dtype=np.float64).reshape(-1)
+        n = len(rewards)
+        if n == 0:
+            return
+        self._sample_into_reservoir(rewards)
+        batch_mean = rewards.mean()
+        self._combine(n, batch_mean, float(((rewards - batch_mean) ** 2).sum()))
+        self.min = min(self.min, float(rewards.min()))
+        self.max = max(self.max, float(rewards.max()))
+        if self.collapse_threshold is not None:
+            self.collapses += int(np.count_nonzero(rewards < self.collapse_threshold))
+
+    def _combine(self, n, mean, m2):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def _sample_into_reservoir(self, rewards):
+        # algorithm R, vectorized: fill the free slots, then reward number t replaces a random slot with probability k / (t + 1)
+        k = self.reservoir_size
+        free = max(0, min(k - self.count, len(rewards)))
+        self.reservoir[self.count:self.count + free] = rewards[:free]
+        rest = rewards[free:]
+        if len(rest):
+            seen = self.count + free + np.arange(len(rest))
+            slots = self.rng.integers(0, seen + 1)
+            accepted = slots < k
+            # later rewards win on repeated slots, same as the sequential algorithm
+            self.reservoir[slots[accepted]] = rest[accepted]
+
+    def merge(self, other):
+        if self.collapse_threshold != other.collapse_threshold:
+            raise ValueError("cannot merge accumulators with different collapse thresholds")
+        if other.count == 0:
+            return self
+        k = min(self.reservoir_size, self.count + other.count)
+        if k == self.count + other.count and other.count <= other.reservoir_size:
+            # every reward still fits, keep them all and in order
+            merged_reservoir = np.concatenate([self.samples(), other.samples()])
+        else:
+            # a side that already subsampled can give at most its own reservoir, so a smaller
+            # reservoir on the other accumulator caps the merged sample (and shrinks this one)
+            for side in (self, other):
+                if side.count > side.reservoir_size:
+                    k = min(k, side.reservoir_size)
+            # each side contributes to the merged sample in proportion to the episodes it has seen
+            from_self = self.rng.hypergeometric(self.count, other.count, k)
+            merged_reservoir = np.concatenate([
+                self.rng.choice(self.samples(), from_self, replace=False),
+                self.rng.choice(other.samples(), k - from_self, replace=False),
+            ])
+            if k < self.reservoir_size:
+                self.reservoir_size = k
+                self.reservoir = np.empty(k, dtype=np.float64)
+        self._combine(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.collapses += other.collapses
+        self.reservoir[:len(merged_reservoir)] = merged_reservoir
+        return self
+
+    def samples(self):
+        return self.reservoir[:min(self.count, self.reservoir_size)]
+
+    def variance(self):
+        # population variance, same convention as reward_variance / np.var
+        return self.m2 / self.count if self.count else 0.0
+
+    def std(self):
+        return float(np.sqrt(self.variance()))
+
+    def quantile(self, q):
+        return np.quantile(self.samples(), q) if self.count else np.nan
+
+    def collapse_rate(self):
+        return self.collapses / self.count if self.count else 0.0
+
+    def regret(self, optimal_reward):
+        return {
+            "mean_regret": float(optimal_reward - self.mean),
+            "max_regret": float(optimal_reward - self.min),
+            "min_regret": float(optimal_reward - self.max),
+        }
+
+    def summarize(self, name="env"):
+        return {
+            f"{name}_mean": float(self.mean),
+            f"{name}_std": self.std(),
+            f"{name}_min": float(self.min),
+            f"{name}_max": float(self.max),
+        }
+
+
+_STATISTICS = {
+    "mean": np.mean,
+    "median": np.median,
+    "std": np.std,
+}
+
+
+def _resampled_statistic(values, statistic, num_resamples, rng, max_elements):
+    # all resamples drawn as one (num_resamples, n) index matrix, chunked only to bound memory
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+    if len(values) == 0:
+        raise ValueError("bootstrap needs at least one value")
+    stat = _STATISTICS[statistic] if isinstance(statistic, str) else statistic
+    chunk = max(1, max_elements // len(values))
+    out = np.empty(num_resamples)
+    for start in range(0, num_resamples, chunk):
+        stop = min(start + chunk, num_resamples)
+        idx = rng.integers(0, len(values), size=(stop - start, len(values)))
+        out[start:stop] = stat(values[idx], axis=1)
+    return out
+
+
+def bootstrap_ci(values, statistic="mean", num_resamples=10000, confidence=0.95, seed=None, max_elements=10_000_000):
+    # percentile bootstrap confidence interval. statistic is "mean" / "median" / "std" or any f(x, axis=1)
+    rng = np.random.default_rng(seed)
+    stat = _STATISTICS[statistic] if isinstance(statistic, str) else statistic
+    resampled = _resampled_statistic(values, statistic, num_resamples, rng, max_elements)
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(resampled, [alpha, 1.0 - alpha])
+    return {
+        "estimate": float(stat(np.asarray(values, dtype=np.float64).reshape(1, -1), axis=1)[0]),
+        "ci_low": float(low),
+        "ci_high": float(high),
+    }
+
+
+def bootstrap_diff_ci(values_a, values_b, statistic="mean", num_resamples=10000, confidence=0.95, seed=None, max_elements=10_000_000):
+    # CI of statistic(a) - statistic(b) with both groups resampled independently (e.g. DQN vs Double DQN rewards).
+    # the difference is significant at this level when the interval excludes 0
+    rng = np.random.default_rng(seed)
+    stat = _STATISTICS[statistic] if isinstance(statistic, str) else statistic
+    diff = (
+        _resampled_statistic(values_a, statistic, num_resamples, rng, max_elements)
+        - _resampled_statistic(values_b, statistic, num_resamples, rng, max_elements)
+    )
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(diff, [alpha, 1.0 - alpha])
+    a = np.asarray(values_a, dtype=np.float64).reshape(1, -1)
+    b = np.asarray(values_b, dtype=np.float64).reshape(1, -1)
+    return {
+        "estimate": float(stat(a, axis=1)[0] - stat(b, axis=1)[0]),
+        "ci_low": float(low),
+        "ci_high": float(high),
+        "significant": bool(low > 0 or high < 0),
+    }
@@ -0,0 +1,112 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import numpy as np
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__),".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from environments.clean_env import CleanEnv
+from environments.drifted_env import DriftedEnv
+from environments.vector_env import REWARD_DTYPE
+from evaluation.batched_eval import vector_env_like
+from evaluation.stress_test import robustness_metrics
+from evaluation.metrics import bootstrap_diff_ci
+from networks.stacked_q_network import StackedQNetwork
+
+
+def load_stacked(checkpoint_paths, device="cpu"):
+    state_dicts = [torch.load(path, map_location=device)["q_net"] for path in checkpoint_paths]
+    return StackedQNetwork(state_dicts).to(device)
+
+
+def run_stacked_policies(env, stacked_net, num_episodes=50, max_steps=200):
+    # M policies x num_episodes episodes in one vector env, one stacked greedy forward per step.
+    # returns per-episode rewards of shape (M, num_episodes)
+    num_models = stacked_net.num_models
+    device = stacked_net.weights[0].device
+    # first layer weights are (M, obs_dim, hidden)
+    obs_dim = stacked_net.weights[0].shape[1]
+    venv = vector_env_like(env, num_models * num_episodes)
+    obs, _ = venv.reset()
+
+    episode_rewards = np.zeros(num_models * num_episodes, dtype=REWARD_DTYPE)
+    active = np.ones(num_models * num_episodes, dtype=bool)
+
+    with torch.no_grad():
+        for _ in range(max_steps):
+            x = torch.as_tensor(obs, dtype=torch.float32, device=device)
+            x = x.view(num_models, num_episodes, -1)[..., :obs_dim]
+            actions = torch.argmax(stacked_net(x), dim=-1).reshape(-1).cpu().numpy()
+            obs, rewards, terminated, truncated, _ = venv.step(actions)
+
+            # finished episodes were auto-reset, keep them out of the totals
+            episode_rewards[active] += rewards[active]
+            active &= ~(terminated | truncated)
+            if not active.any():
+                break
+
+    return episode_rewards.reshape(num_models, num_episodes)
+
+
+def evaluate_checkpoints(checkpoint_paths, num_episodes=50, collapse_threshold=200.0, optimal_reward=-45.0, reward_flip=False, reward_scale=1.0, drift_start_step=1, target_drift=0.0, device="cpu"):
+    # one clean and one drifted stacked rollout for all checkpoints, reduced to one metrics row per checkpoint
+    clean_env = CleanEnv(terminate_on_goal=True)
+    drifted_env = DriftedEnv(reward_flip=reward_flip, reward_scale=reward_scale, drift_start_step=drift_start_step, target_drift_per_step=target_drift)
+
+    stacked = load_stacked(checkpoint_paths, device=device)
+    clean_rewards = run_stacked_policies(clean_env, stacked, num_episodes=num_episodes)
+    drifted_rewards = run_stacked_policies(drifted_env, stacked, num_episodes=num_episodes)
+
+    rows = []
+    for i, path in enumerate(checkpoint_paths):
+        clean = robustness_metrics(clean_rewards[i], collapse_threshold=collapse_threshold, optimal_reward=optimal_reward, name="clean")
+        drifted = robustness_metrics(drifted_rewards[i], collapse_threshold=collapse_threshold, optimal_reward=optimal_reward, name="drifted")
+        # drifted mean reward relative to the first checkpoint, with a bootstrap interval of the difference
+        diff = bootstrap_diff_ci(drifted_rewards[i], drifted_rewards[0], num_resamples=2000, seed=0)
+        rows.append({
+            "checkpoint": path,
+            "clean_mean": clean["clean_mean"],
+            "clean_std": clean["clean_std"],
+            **drifted,
+            "diff_vs_first": diff["estimate"],
+            "diff_vs_first_ci_low": diff["ci_low"],
+            "diff_vs_first_ci_high": diff["ci_high"],
+            "diff_vs_first_significant": diff["significant"],
+        })
+    return rows
+
+
+def write_table(rows, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoints", type=str, nargs="+", required=True, help="checkpoints sharing one QNetwork architecture")
+    parser.add_argument("--episodes", type=int, default=50, help="Number of evaulation episodes per checkpoint")
+    parser.add_argument("--reward_flip", action="store_true", help="Enable reward sign flip")
+    parser.add_argument("--reward_scale", type=float, default=1.0, help="Scale factor for reward under drift")
+    parser.add_argument("--drift_start", type=int, default=1, help="Step at which drift begin")
+    parser.add_argument("--target_drift", type=float, default=0.0, help="target drift value")
+    parser.add_argument("--out", type=str, default="results/multi_checkpoint.csv", help="per-checkpoint metrics table")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = evaluate_checkpoints(args.checkpoints, num_episodes=args.episodes, reward_flip=args.reward_flip, reward_scale=args.reward_scale, drift_start_step=args.drift_start, target_drift=args.target_drift)
+    write_table(rows, args.out)
+
+    print(f"{'checkpoint':<40}{'clean_mean':>12}{'drifted_mean':>14}{'mean_regret':>13}{'collapse':>10}{'vs first (95% CI)':>36}")
+    for row in rows:
+        marker = "*" if row["diff_vs_first_significant"] else ""
+        vs_first = f"{row['diff_vs_first']:+.2f} [{row['diff_vs_first_ci_low']:.2f}, {row['diff_vs_first_ci_high']:.2f}]{marker}"
+        print(f"{os.path.basename(row['checkpoint']):<40}{row['clean_mean']:>12.2f}{row['drifted_mean']:>14.2f}{row['mean_regret']:>13.2f}{row['collapse_rate']:>10.2f}{vs_first:>36}")
+    print(f"{len(rows)} checkpoints evaluated in {time.perf_counter() - start:.2f}s -> {args.out}")
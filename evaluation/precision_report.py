@@ -0,0 +1,184 @@
+import os
+import io
+import sys
+import csv
+import json
+import time
+import argparse
+import numpy as np
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from environments.clean_env import CleanEnv
+from evaluation.stress_test import build_agent_from_checkpoint, evaluate_policy, drift_metrics
+
+REPORT_COLUMNS = (
+    "agent", "train_precision", "inference", "target_drift",
+    "clean_mean", "drifted_mean", "mean_regret", "collapse_rate",
+    "action_agreement", "batch_agreement", "train_seconds", "act_us", "act_batch_us", "model_bytes",
+)
+
+
+def _model_bytes(module):
+    # serialized size of the network weights (int8 packed params for quantized networks)
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.tell()
+
+
+def _best_us(fn, number=500, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / number
+
+
+def _greedy_actions(agent, probe, batch_size=1):
+    # int8 activation scales depend on the batch, so actions are taken with the batch shape evaluation uses:
+    # batch_size 1 goes through select_action, larger sizes through select_actions in run_policy_batched sized chunks
+    if batch_size == 1:
+        return np.array([agent.select_action(obs, explore=False) for obs in probe])
+    return np.concatenate([agent.select_actions(probe[i : i + batch_size], explore=False) for i in range(0, len(probe), batch_size)])
+
+
+def train_variants(agent_types=("dqn", "double_dqn"), precisions=("fp32", "bf16"), num_episodes=150, seed=0, out_dir="results/precision", max_steps=200):
+    # one checkpoint per (agent, training precision), all from the same seed. returns {path: (agent, precision, seconds)}
+    from training.train import train
+
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoints = {}
+    for agent_type in agent_types:
+        for precision in precisions:
+            path = os.path.join(out_dir, f"{agent_type}_{precision}.pt")
+            start = time.perf_counter()
+            train(agent_type=agent_type, num_episodes=num_episodes, max_steps=max_steps, save_path=path, buffer_type="array", seed=seed, precision=precision, log_intervals=num_episodes)
+            checkpoints[path] = (agent_type, precision, time.perf_counter() - start)
+    return checkpoints
+
+
+def parity_rows(checkpoints, target_drifts=(0.0, 0.5), num_episodes=50, collapse_threshold=200.0, optimal_reward=-45.0):
+    # every checkpoint evaluated through its float network and through a dynamic int8 copy
+    clean_env = CleanEnv(terminate_on_goal=True)
+    obs_dim = clean_env.observation_space.shape[0]
+    action_dim = clean_env.action_space.n
+    # every reachable position (where the policy actually acts) plus random off-grid ones
+    reachable = np.arange(-clean_env.max_steps, clean_env.max_steps + 1, dtype=np.float32).reshape(-1, 1).repeat(obs_dim, axis=1)
+    probe = np.concatenate([reachable, np.random.default_rng(0).uniform(-200, 200, size=(1024, obs_dim)).astype(np.float32)])
+
+    rows = []
+    for path, (agent_type, train_precision, train_seconds) in checkpoints.items():
+        reference_actions = None
+        for inference in ("fp32", "int8"):
+            agent = build_agent_from_checkpoint(path, obs_dim, action_dim, quantize=inference == "int8")
+            actions = _greedy_actions(agent, probe)
+            # the lock-step engine acts on num_episodes observations at a time
+            batch_actions = _greedy_actions(agent, probe, batch_size=num_episodes)
+            if reference_actions is None:
+                reference_actions = actions
+            single = probe[0]
+            latency = _best_us(lambda: agent.select_action(single, explore=False))
+            batch_latency = _best_us(lambda: agent.select_actions(probe[:64], explore=False), number=200)
+            clean_mean = float(np.mean(evaluate_policy(clean_env, agent, num_episodes=num_episodes)))
+            for target_drift in target_drifts:
+                drifted = drift_metrics(agent, num_episodes=num_episodes, collapse_threshold=collapse_threshold, optimal_reward=optimal_reward, target_drift=target_drift)
+                rows.append({
+                    "agent": agent_type,
+                    "train_precision": train_precision,
+                    "inference": inference,
+                    "target_drift": target_drift,
+                    "clean_mean": clean_mean,
+                    "drifted_mean": drifted["drifted_mean"],
+                    "mean_regret": drifted["mean_regret"],
+                    "collapse_rate": drifted["collapse_rate"],
+                    # greedy actions identical to the fp32 network's select_action, one observation at a time
+                    # and in batches of num_episodes
+                    "action_agreement": float(np.mean(actions == reference_actions)),
+                    "batch_agreement": float(np.mean(batch_actions == reference_actions)),
+                    "train_seconds": train_seconds,
+                    "act_us": latency,
+                    "act_batch_us": batch_latency,
+                    "model_bytes": _model_bytes(agent.q_net),
+                })
+    return rows
+
+
+def conclusions(rows):
+    # DQN vs Double DQN verdict per (train precision, inference, drift), checked against the fp32 / fp32 verdict
+    by_setting = {}
+    for row in rows:
+        by_setting.setdefault((row["train_precision"], row["inference"], row["target_drift"]), {})[row["agent"]] = row
+    verdicts = []
+    for (train_precision, inference, target_drift), agents in sorted(by_setting.items(), key=lambda item: str(item[0])):
+        if "dqn" not in agents or "double_dqn" not in agents:
+            continue
+        metrics = {}
+        for metric, higher_is_better in (("drifted_mean", True), ("mean_regret", False), ("collapse_rate", False)):
+            diff = agents["double_dqn"][metric] - agents["dqn"][metric]
+            better = "tie" if diff == 0 else ("double_dqn" if (diff > 0) == higher_is_better else "dqn")
+            metrics[metric] = better
+        verdicts.append({"train_precision": train_precision, "inference": inference, "target_drift": target_drift, **metrics})
+
+    baseline = {v["target_drift"]: v for v in verdicts if v["train_precision"] == "fp32" and v["inference"] == "fp32"}
+    for v in verdicts:
+        base = baseline.get(v["target_drift"])
+        v["matches_fp32"] = base is not None and all(v[m] == base[m] for m in ("drifted_mean", "mean_regret", "collapse_rate"))
+    return verdicts
+
+
+def write_report(rows, verdicts, out_dir="results/precision"):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "precision_parity.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(out_dir, "precision_parity.json"), "w") as f:
+        json.dump({"rows": rows, "conclusions": verdicts}, f, indent=2)
+
+
+def print_report(rows, verdicts):
+    print(f"{'agent':<12}{'train':>7}{'infer':>7}{'drift':>7}{'clean':>9}{'drifted':>9}{'regret':>9}{'collapse':>9}{'agree':>7}{'b agree':>8}{'train s':>9}{'act us':>9}{'b64 us':>9}{'KiB':>7}")
+    for r in rows:
+        print(
+            f"{r['agent']:<12}{r['train_precision']:>7}{r['inference']:>7}{r['target_drift']:>7.2f}"
+            f"{r['clean_mean']:>9.2f}{r['drifted_mean']:>9.2f}{r['mean_regret']:>9.2f}{r['collapse_rate']:>9.2f}"
+            f"{r['action_agreement']:>7.2f}{r['batch_agreement']:>8.2f}{r['train_seconds']:>9.1f}{r['act_us']:>9.1f}{r['act_batch_us']:>9.1f}{r['model_bytes'] / 1024:>7.1f}"
+        )
+    print("DQN vs Double DQN (better agent per metric)")
+    for v in verdicts:
+        print(
+            f"  train {v['train_precision']:>4} | infer {v['inference']:>4} | drift {v['target_drift']:.2f} | "
+            f"reward {v['drifted_mean']:<10} regret {v['mean_regret']:<10} collapse {v['collapse_rate']:<10} | "
+            f"{'same as fp32' if v['matches_fp32'] else 'DIFFERS from fp32'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoints", type=str, nargs="*", default=None, help="evaluate existing checkpoints instead of training (bf16 ones have 'bf16' in the name)")
+    parser.add_argument("--agents", type=str, nargs="+", default=["dqn", "double_dqn"], choices=["dqn", "double_dqn"])
+    parser.add_argument("--train_episodes", type=int, default=150, help="episodes per trained variant")
+    parser.add_argument("--episodes", type=int, default=50, help="evaluation episodes per setting")
+    parser.add_argument("--target_drifts", type=float, nargs="+", default=[0.0, 0.5], help="target drift per step of the drifted evaluations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out_dir", type=str, default="results/precision")
+    args = parser.parse_args()
+
+    if args.checkpoints:
+        checkpoints = {
+            path: ("double_dqn" if "double" in os.path.basename(path).lower() else "dqn", "bf16" if "bf16" in os.path.basename(path).lower() else "fp32", float("nan"))
+            for path in args.checkpoints
+        }
+    else:
+        checkpoints = train_variants(agent_types=args.agents, num_episodes=args.train_episodes, seed=args.seed, out_dir=args.out_dir)
+
+    rows = parity_rows(checkpoints, target_drifts=args.target_drifts, num_episodes=args.episodes)
+    verdicts = conclusions(rows)
+    write_report(rows, verdicts, out_dir=args.out_dir)
+    print_report(rows, verdicts)
+    print(f"Report written to {args.out_dir}/precision_parity.csv and precision_parity.json")
@@ -0,0 +1,144 @@
+import os
+import json
+import glob
+import hashlib
+
+import numpy as np
+
+# bump when rollout semantics change so stale entries are never served
+CACHE_VERSION = 1
+
+# constructor-level env parameters that decide the rewards of a greedy rollout.
+# DriftedEnv moves target_position while it runs, its configured target is initial_target
+ENV_PARAMS = (
+    "target_position",
+    "initial_target",
+    "max_steps",
+    "terminate_on_goal",
+    "drift_start_step",
+    "reward_flip",
+    "reward_scale",
+    "target_drift_per_step",
+)
+
+
+def _policy_arrays(agent):
+    # (name, array) pairs of everything that defines the greedy policy
+    if hasattr(agent, "q_table"):
+        # a compiled PolicyTable acts exactly like the network it was compiled from
+        return _policy_arrays(agent.source)
+    if getattr(agent, "quantized", False):
+        # int8 agents are identified by the float weights they were quantized from, key() marks the precision
+        return [(name, tensor.numpy()) for name, tensor in agent.fp32_state_dict.items()]
+    if hasattr(agent, "q_net"):
+        return [(name, tensor.detach().cpu().numpy()) for name, tensor in agent.q_net.state_dict().items()]
+    # exported NumpyPolicy
+    return [(f"weight_{i}", w) for i, w in enumerate(agent.weights)] + [(f"bias_{i}", b) for i, b in enumerate(agent.biases)]
+
+
+def weights_fingerprint(agent):
+    digest = hashlib.sha256()
+    for name, array in _policy_arrays(agent):
+        array = np.ascontiguousarray(array)
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def env_config(env):
+    config = {name: getattr(env, name) for name in ENV_PARAMS if hasattr(env, name)}
+    if "initial_target" in config:
+        del config["target_position"]
+    # numpy scalars -> plain python so the key is stable json
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in config.items()}
+
+
+class ResultCache:
+    # content-addressed store of per-episode evaluation rewards.
+    # one .npz per (weights, agent class, env class + params, episodes, max_steps, seed) key.
+    # file mtime doubles as the LRU clock, so concurrent sweep workers share a directory without a central index
+
+    def __init__(self, directory="results/cache", max_bytes=256 * 1024 ** 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, agent, env, num_episodes, max_steps, seed=None):
+        description = {
+            "version": CACHE_VERSION,
+            "weights": weights_fingerprint(agent),
+            "agent": f"{type(agent).__module__}.{type(agent).__qualname__}",
+            "env": f"{type(env).__module__}.{type(env).__qualname__}",
+            "env_config": env_config(env),
+            "num_episodes": int(num_episodes),
+            "max_steps": int(max_steps),
+            "seed": seed,
+        }
+        # a PolicyTable compiled from an int8 agent acts like that int8 agent
+        if getattr(getattr(agent, "source", agent), "quantized", False):
+            # only added for quantized agents so existing float entries keep their keys
+            description["inference"] = "int8"
+        encoded = json.dumps(description, sort_keys=True)
+        return hashlib.sha256(encoded.encode()).hexdigest(), encoded
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key[0]}.npz")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                # a hash collision would have to match the full description as well
+                if str(data["description"]) != key[1]:
+                    self.misses += 1
+                    return None
+                rewards = data["rewards"]
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return rewards
+
+    def put(self, key, rewards):
+        path = self._path(key)
+        # np.savez appends .npz to names without it, keep the suffix on the temp name
+        tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, rewards=np.asarray(rewards), description=np.asarray(key[1]))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        # (mtime, size, path), least recently used first
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.npz")):
+            if ".tmp." in path:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # another worker evicted it first
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -1,81 +1,167 @@
-import os
-import sys
-import numpy as np
-import argparse
-
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__),".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
-from agents.dqn_agent import DQNAgent
-from agents.double_dqn_agent import DoubleDQNAgent
-from environments.clean_env import CleanEnv
-from environments.drifted_env import DriftedEnv
-from evaluation.metrics import (compute_regret, collapse_rate, reward_variance, summarize,)
-
-def build_agent_from_checkpoint(checkpoint_path, obs_dim, action_dim):
-    if "double" in checkpoint_path.lower():
-        agent = DoubleDQNAgent(obs_dim=obs_dim, action_dim=action_dim)
-    else:
-        agent = DQNAgent(obs_dim=obs_dim, action_dim=action_dim)
-    agent.load(checkpoint_path)
-    agent.epsilon = 0.0
-    return agent
-
-
-def run_policy(env, agent, num_episodes=50, max_steps=200):
-    rewards = []
-    for _ in range(num_episodes):
-        obs, _ = env.reset()
-        episode_reward = 0.0
-
-        for _ in range(max_steps):
-            action = agent.select_action(obs, explore=False)
-            obs, reward, terminated, truncated, _ = env.step(action)
-            episode_reward += reward
-            if terminated or truncated:
-                break
-        rewards.append(episode_reward)
-    return np.array(rewards)
-
-def stress_test(checkpoint_path, num_episodes=50, collapse_threshold=200.0, optimal_reward=-45.0, reward_flip=False, reward_scale=1.0, drift_start_step=1, target_drift=0.0, ):
-    # load agent
-    clean_env = CleanEnv(terminate_on_goal=True)
-    obs_dim = clean_env.observation_space.shape[0]
-    action_dim = clean_env.action_space.n
-
-    agent = build_agent_from_checkpoint(checkpoint_path=checkpoint_path, obs_dim=obs_dim, action_dim=action_dim)
-
-    print("SentinelRL STRESS TEST (metrics enabled)")
-
-    clean_rewards = run_policy(clean_env, agent, num_episodes=num_episodes)
-    
-    drifted_env = DriftedEnv(reward_flip=reward_flip, reward_scale=reward_scale, drift_start_step=drift_start_step, target_drift_per_step=target_drift)
-    # drifted_env.terminate_on_goal=False
-    drifted_rewards = run_policy(drifted_env, agent, num_episodes=num_episodes)
-
-    # print metrics
-    print("CLEAN ENV METRICS")
-    for k,v in summarize(clean_rewards, name="clean").items():
-        print(f"{k:>15}:{v:8.2f}")
-    print(f"{'variance':>15}:{reward_variance(clean_rewards):8.2f}")
-
-    print("DRIFTED ENV METRICS")
-    for k,v in summarize(drifted_rewards, name="drifted").items():
-        print(f" {k:>15}:{v:8.2f}")
-    print(f" {'variance':>15}:{reward_variance(drifted_rewards):8.2f}")
-
-    print("Robustness Indicators")
-    print(f" {'mean_regret':>15}: {compute_regret(drifted_rewards, optimal_reward)['mean_regret']:8.2f}")
-    print(f" {'collapse_rate':>15}: {collapse_rate(drifted_rewards, collapse_threshold):8.2f}")
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--checkpoint", type=str, required=True, help="path to model checkpoint")
-    parser.add_argument("--episodes", type=int, default=50, help="Number of evaulation episodes")
-    parser.add_argument("--reward_flip", action="store_true", help="Enable reward sign flip")
-    parser.add_argument("--reward_scale", type=float, default=1.0, help="Scale factor for reward under drift")
-    parser.add_argument("--drift_start", type=int, default=1, help="Step at which drift begin")
-    parser.add_argument("--target_drift", type=float, default=0.0, help="target drift value")
-    args = parser.parse_args()
-    stress_test(checkpoint_path=args.checkpoint, num_episodes=args.episodes, reward_flip=args.reward_flip, reward_scale=args.reward_scale, drift_start_step=args.drift_start, target_drift=args.target_drift )
\ No newline at end of file
+import os
+import sys
+import numpy as np
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__),".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agents.dqn_agent import DQNAgent
+from agents.double_dqn_agent import DoubleDQNAgent
+from environments.clean_env import CleanEnv
+from environments.drifted_env import DriftedEnv
+from evaluation.metrics import (RewardAccumulator, reward_variance, summarize, bootstrap_ci,)
+from evaluation.batched_eval import run_policy_batched, supports_batched
+from evaluation.result_cache import ResultCache
+from environments.env_pool import EnvPool
+from networks.policy_table import PolicyTable
+from profiling.profiler import NULL_PROFILER, Profiler
+
+def build_agent_from_checkpoint(checkpoint_path, obs_dim, action_dim, quantize=False):
+    if "double" in checkpoint_path.lower():
+        agent = DoubleDQNAgent(obs_dim=obs_dim, action_dim=action_dim)
+    else:
+        agent = DQNAgent(obs_dim=obs_dim, action_dim=action_dim)
+    agent.load(checkpoint_path)
+    agent.epsilon = 0.0
+    if quantize:
+        agent.quantize()
+    return agent
+
+
+def run_policy(env, agent, num_episodes=50, max_steps=200, profiler=NULL_PROFILER):
+    rewards = []
+    for _ in range(num_episodes):
+        with profiler.phase("env_reset"):
+            obs, _ = env.reset()
+        episode_reward = 0.0
+
+        for _ in range(max_steps):
+            with profiler.phase("select_action"):
+                action = agent.select_action(obs, explore=False)
+            with profiler.phase("env_step"):
+                obs, reward, terminated, truncated, _ = env.step(action)
+            profiler.count("env_steps")
+            episode_reward += reward
+            if terminated or truncated:
+                break
+        rewards.append(episode_reward)
+        profiler.count("episodes")
+    return np.array(rewards)
+
+def evaluate_policy(env, agent, num_episodes=50, max_steps=200, batched=True, profiler=NULL_PROFILER, cache=None, seed=None, env_workers=0):
+    # lock-step batched engine for the built-in envs, episode-by-episode otherwise.
+    # with env_workers > 0 any env (built-in or custom) runs lock-step in an EnvPool of env_workers processes.
+    # with a ResultCache, a rollout already done for the same weights / env config / episodes / seed is read back instead
+    if cache is not None:
+        key = cache.key(agent, env, num_episodes, max_steps, seed)
+        rewards = cache.get(key)
+        if rewards is not None:
+            profiler.count("cache_hits")
+            return rewards
+        profiler.count("cache_misses")
+
+    if seed is not None:
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+    # all engines give identical rewards, so they share cache entries
+    restarted = False
+    if batched and env_workers > 0:
+        pool = EnvPool.from_env(env, num_episodes, num_workers=env_workers)
+        try:
+            rewards = run_policy_batched(env, agent, num_episodes=num_episodes, max_steps=max_steps, profiler=profiler, venv=pool)
+            # a worker restart cuts its episodes short (truncated, partial reward), such a rollout is not cached
+            restarted = pool.restarts > 0
+        finally:
+            pool.close()
+    elif batched and supports_batched(env):
+        rewards = run_policy_batched(env, agent, num_episodes=num_episodes, max_steps=max_steps, profiler=profiler)
+    else:
+        rewards = run_policy(env, agent, num_episodes=num_episodes, max_steps=max_steps, profiler=profiler)
+
+    if cache is not None and not restarted:
+        cache.put(key, rewards)
+    return rewards
+
+def drift_accumulator(agent, num_episodes=50, collapse_threshold=200.0, reward_flip=False, reward_scale=1.0, drift_start_step=1, target_drift=0.0, batched=True, profiler=NULL_PROFILER, cache=None, seed=None, env_workers=0):
+    # evaluate one drift setting and fold its episode rewards into a mergeable accumulator
+    drifted_env = DriftedEnv(reward_flip=reward_flip, reward_scale=reward_scale, drift_start_step=drift_start_step, target_drift_per_step=target_drift)
+    # drifted_env.terminate_on_goal=False
+    drifted_rewards = evaluate_policy(drifted_env, agent, num_episodes=num_episodes, batched=batched, profiler=profiler, cache=cache, seed=seed, env_workers=env_workers)
+    # the rollout is in memory anyway: keep every reward so the bootstrap interval is exact and reproducible
+    accumulator = RewardAccumulator(collapse_threshold=collapse_threshold, reservoir_size=max(1, len(drifted_rewards)), seed=seed)
+    accumulator.update_batch(drifted_rewards)
+    return accumulator
+
+def drift_metrics(agent, num_episodes=50, collapse_threshold=200.0, optimal_reward=-45.0, reward_flip=False, reward_scale=1.0, drift_start_step=1, target_drift=0.0, batched=True, profiler=NULL_PROFILER, cache=None, seed=None, env_workers=0):
+    # evaluate one drift setting and reduce it to the robustness metrics table row
+    accumulator = drift_accumulator(agent, num_episodes=num_episodes, collapse_threshold=collapse_threshold, reward_flip=reward_flip, reward_scale=reward_scale, drift_start_step=drift_start_step, target_drift=target_drift, batched=batched, profiler=profiler, cache=cache, seed=seed, env_workers=env_workers)
+    return accumulator_metrics(accumulator, optimal_reward=optimal_reward)
+
+def robustness_metrics(rewards, collapse_threshold=200.0, optimal_reward=-45.0, name="drifted"):
+    # the rewards are already in memory, so the reservoir keeps all of them and the interval stays exact
+    rewards = np.asarray(rewards, dtype=np.float64).reshape(-1)
+    accumulator = RewardAccumulator(collapse_threshold=collapse_threshold, reservoir_size=max(1, len(rewards)))
+    accumulator.update_batch(rewards)
+    return accumulator_metrics(accumulator, optimal_reward=optimal_reward, name=name)
+
+def accumulator_metrics(accumulator, optimal_reward=-45.0, name="drifted"):
+    metrics = accumulator.summarize(name=name)
+    metrics[f"{name}_variance"] = float(accumulator.variance())
+    # 95% bootstrap interval of the mean reward, fixed seed so tables are reproducible.
+    # exact while the episodes fit in the reservoir, resampled from the reservoir sample beyond that
+    ci = bootstrap_ci(accumulator.samples(), num_resamples=2000, seed=0)
+    metrics[f"{name}_mean_ci_low"] = ci["ci_low"]
+    metrics[f"{name}_mean_ci_high"] = ci["ci_high"]
+    metrics["mean_regret"] = accumulator.regret(optimal_reward)["mean_regret"]
+    metrics["collapse_rate"] = float(accumulator.collapse_rate())
+    return metrics
+
+def stress_test(checkpoint_path, num_episodes=50, collapse_threshold=200.0, optimal_reward=-45.0, reward_flip=False, reward_scale=1.0, drift_start_step=1, target_drift=0.0, profile=False, profile_dir="results/profile", batched=True, use_cache=True, cache_dir="results/cache", policy_table=False, quantize=False, agent=None, env_workers=0):
+    # load agent (unless the caller passes one already loaded from checkpoint_path)
+    clean_env = CleanEnv(terminate_on_goal=True)
+    obs_dim = clean_env.observation_space.shape[0]
+    action_dim = clean_env.action_space.n
+
+    if agent is None:
+        agent = build_agent_from_checkpoint(checkpoint_path=checkpoint_path, obs_dim=obs_dim, action_dim=action_dim, quantize=quantize)
+    if policy_table:
+        # same greedy actions over every reachable position, looked up instead of recomputed
+        agent = PolicyTable.for_env(agent, clean_env)
+
+    print("SentinelRL STRESS TEST (metrics enabled)")
+    prof = Profiler(enabled=profile)
+    cache = ResultCache(cache_dir) if use_cache else None
+
+    clean_rewards = evaluate_policy(clean_env, agent, num_episodes=num_episodes, batched=batched, profiler=prof, cache=cache, env_workers=env_workers)
+    
+    drifted = drift_metrics(agent, num_episodes=num_episodes, collapse_threshold=collapse_threshold, optimal_reward=optimal_reward, reward_flip=reward_flip, reward_scale=reward_scale, drift_start_step=drift_start_step, target_drift=target_drift, batched=batched, profiler=prof, cache=cache, env_workers=env_workers)
+    if cache is not None:
+        print(f"result cache: {cache.hits} hits, {cache.misses} misses ({cache_dir})")
+
+    # print metrics
+    print("CLEAN ENV METRICS")
+    for k,v in summarize(clean_rewards, name="clean").items():
+        print(f"{k:>15}:{v:8.2f}")
+    print(f"{'variance':>15}:{reward_variance(clean_rewards):8.2f}")
+
+    print("DRIFTED ENV METRICS")
+    for k in ("drifted_mean", "drifted_std", "drifted_min", "drifted_max"):
+        print(f" {k:>15}:{drifted[k]:8.2f}")
+    print(f" {'variance':>15}:{drifted['drifted_variance']:8.2f}")
+    print(f" {'mean 95% CI':>15}: [{drifted['drifted_mean_ci_low']:.2f}, {drifted['drifted_mean_ci_high']:.2f}]")
+
+    print("Robustness Indicators")
+    print(f" {'mean_regret':>15}: {drifted['mean_regret']:8.2f}")
+    print(f" {'collapse_rate':>15}: {drifted['collapse_rate']:8.2f}")
+
+    if profile:
+        prof.write_jsonl(os.path.join(profile_dir, "stress_test_profile.jsonl"), checkpoint=checkpoint_path)
+        prof.write_csv(os.path.join(profile_dir, "stress_test_profile.csv"))
+        print(prof.summary())
+
+if __name__ == "__main__":
+    # arguments are defined once, in the unified CLI (`sentinelrl stress-test`)
+    from cli.main import main
+    sys.exit(main(["stress-test", *sys.argv[1:]]))
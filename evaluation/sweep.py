@@ -0,0 +1,174 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__),".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+GRID_KEYS = ("reward_flip", "reward_scale", "drift_start_step", "target_drift")
+
+# checkpoints already loaded by this worker process, keyed by path
+_WORKER_AGENTS = {}
+
+
+def build_grid(checkpoints, reward_flip=(False,), reward_scale=(1.0,), drift_start_step=(1,), target_drift=(0.0,)):
+    # full cartesian product of checkpoints and drift settings, one dict per cell
+    return [
+        {"checkpoint": c, "reward_flip": f, "reward_scale": s, "drift_start_step": d, "target_drift": t}
+        for c, f, s, d, t in itertools.product(checkpoints, reward_flip, reward_scale, drift_start_step, target_drift)
+    ]
+
+
+def _init_worker(torch_threads):
+    # cap intra-op threads so N workers do not oversubscribe the cores
+    import torch
+    torch.set_num_threads(torch_threads)
+
+
+def _evaluate_chunk(cell, num_episodes, collapse_threshold, cache_dir=None, seed=None, env_workers=0):
+    # imported here so reading tables (e.g. from the visualizer) does not pull in torch
+    from environments.clean_env import CleanEnv
+    from evaluation.stress_test import build_agent_from_checkpoint, drift_accumulator
+    from evaluation.result_cache import ResultCache
+
+    path = cell["checkpoint"]
+    agent = _WORKER_AGENTS.get(path)
+    if agent is None:
+        env = CleanEnv()
+        agent = build_agent_from_checkpoint(checkpoint_path=path, obs_dim=env.observation_space.shape[0], action_dim=env.action_space.n)
+        _WORKER_AGENTS[path] = agent
+
+    # workers share the cache directory, a repeated sweep only rolls out cells it has not seen
+    cache = ResultCache(cache_dir) if cache_dir else None
+    start = time.perf_counter()
+    accumulator = drift_accumulator(
+        agent,
+        num_episodes=num_episodes,
+        collapse_threshold=collapse_threshold,
+        **{k: cell[k] for k in GRID_KEYS},
+        cache=cache,
+        seed=seed,
+        env_workers=env_workers,
+    )
+    # only the accumulator goes back to the parent, never the per-episode rewards
+    return accumulator, type(agent).__name__, time.perf_counter() - start, bool(cache is not None and cache.hits)
+
+
+def _chunks(num_episodes, episodes_per_task):
+    # (episodes, seed) per task. a cell in one task keeps the unseeded rollout (and its cache entry),
+    # split cells seed each chunk by its index so the chunks are distinct rollouts
+    if not episodes_per_task or episodes_per_task >= num_episodes:
+        return [(num_episodes, None)]
+    return [(min(episodes_per_task, num_episodes - start), i) for i, start in enumerate(range(0, num_episodes, episodes_per_task))]
+
+
+def run_sweep(cells, out_path="results/sweep.csv", num_workers=None, torch_threads=1, num_episodes=50, collapse_threshold=200.0, optimal_reward=-45.0, cache_dir="results/cache", episodes_per_task=None, env_workers=0):
+    # fans the cells out over a process pool (split into chunks of episodes_per_task episodes), merges each
+    # cell's chunk accumulators and streams the finished row into one CSV table
+    from evaluation.stress_test import accumulator_metrics
+    from evaluation.metrics import RewardAccumulator
+
+    num_workers = num_workers or os.cpu_count() or 1
+    if os.path.dirname(out_path):
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    chunks = _chunks(num_episodes, episodes_per_task)
+    rows = []
+    start = time.perf_counter()
+    # spawn: never fork a parent that may already hold torch thread pools
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx, initializer=_init_worker, initargs=(torch_threads,)) as pool, \
+            open(out_path, "w", newline="") as f:
+        futures = {
+            pool.submit(_evaluate_chunk, cell, episodes, collapse_threshold, cache_dir, seed, env_workers): (c, i)
+            for c, cell in enumerate(cells)
+            for i, (episodes, seed) in enumerate(chunks)
+        }
+        pending = [[None] * len(chunks) for _ in cells]
+        writer = None
+        done = 0
+        for future in as_completed(futures):
+            c, i = futures[future]
+            pending[c][i] = future.result()
+            if any(part is None for part in pending[c]):
+                continue
+            # merged in chunk order into a reservoir sized for the whole cell, so every reward is kept
+            # and the row does not depend on which chunk finished first
+            parts, pending[c] = pending[c], None
+            accumulator = RewardAccumulator(collapse_threshold=collapse_threshold, reservoir_size=num_episodes)
+            for part in parts:
+                accumulator.merge(part[0])
+            row = {
+                **cells[c],
+                "agent": parts[0][1],
+                "num_episodes": num_episodes,
+                **accumulator_metrics(accumulator, optimal_reward=optimal_reward),
+                "seconds": sum(part[2] for part in parts),
+                "cached": all(part[3] for part in parts),
+            }
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            f.flush()
+            rows.append(row)
+            done += 1
+            print(
+                f"[{done:4d}/{len(cells)}] {os.path.basename(row['checkpoint'])} | "
+                + " ".join(f"{k}={row[k]}" for k in GRID_KEYS)
+                + f" | mean {row['drifted_mean']:9.2f}"
+                + (" (cached)" if row["cached"] else "")
+            )
+
+    print(f"Sweep of {len(cells)} cells finished in {time.perf_counter() - start:.1f}s -> {out_path}")
+    return rows
+
+
+def load_table(path):
+    # read a sweep table back with numeric / boolean columns restored
+    rows = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            parsed = {}
+            for k, v in row.items():
+                if v in ("True", "False"):
+                    parsed[k] = v == "True"
+                else:
+                    try:
+                        parsed[k] = float(v)
+                    except ValueError:
+                        parsed[k] = v
+            rows.append(parsed)
+    return rows
+
+
+def _str2bool(value):
+    return value.lower() in ("1", "true", "yes", "y")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoints", type=str, nargs="+", required=True, help="paths to model checkpoints")
+    parser.add_argument("--reward_flip", type=_str2bool, nargs="+", default=[False], help="reward flip values (true/false)")
+    parser.add_argument("--reward_scale", type=float, nargs="+", default=[1.0], help="reward scale values")
+    parser.add_argument("--drift_start", type=int, nargs="+", default=[1], help="drift start steps")
+    parser.add_argument("--target_drift", type=float, nargs="+", default=[0.0], help="target drift values")
+    parser.add_argument("--episodes", type=int, default=50, help="Number of evaulation episodes per cell")
+    parser.add_argument("--episodes_per_task", type=int, default=None, help="split each cell into pool tasks of at most this many episodes (default: one task per cell)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: cpu count)")
+    parser.add_argument("--env_workers", type=int, default=0, help="env worker processes per sweep worker (0 steps the episodes in-process)")
+    parser.add_argument("--torch_threads", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--out", type=str, default="results/sweep.csv", help="output table")
+    parser.add_argument("--no_cache", "--no-cache", dest="no_cache", action="store_true", help="Always re-run rollouts, bypassing the result cache")
+    parser.add_argument("--cache_dir", type=str, default="results/cache", help="Result cache directory")
+    args = parser.parse_args()
+
+    cells = build_grid(args.checkpoints, args.reward_flip, args.reward_scale, args.drift_start, args.target_drift)
+    run_sweep(cells, out_path=args.out, num_workers=args.workers, torch_threads=args.torch_threads, num_episodes=args.episodes, cache_dir=None if args.no_cache else args.cache_dir, episodes_per_task=args.episodes_per_task, env_workers=args.env_workers)
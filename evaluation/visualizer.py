@@ -1,33 +1,79 @@
-import os 
-import numpy as np
-import matplotlib.pyplot as plt
-
-def generate_degradation_plots():
-    drift_values = np.array([0.0, 0.1, 0.2, 0.5])
-    dqn_rewards = np.array([-45.0, -50.6, -57.6, -95.0])
-    double_dqn_rewards = np.array([-45.0, -50.6, -57.6, -8512])
-
-    results_dir = os.path.join(os.getcwd(), "results")
-    os.makedirs(results_dir, exist_ok=True)
-
-    plt.figure()
-    plt.plot(drift_values, dqn_rewards)
-    plt.xlabel("Target drift per step")
-    plt.ylabel("Mean Episode Reward")
-    plt.title("DQN Robustness under target drift")
-    plt.savefig(os.path.join(results_dir, "dqn_degration_curve.png"))
-    plt.close()
-
-
-    plt.figure()
-    plt.plot(drift_values, double_dqn_rewards)
-    plt.xlabel("Target drift per step")
-    plt.ylabel("Mean episode reward")
-    plt.title("Double DQN Robustness under target drift")
-    plt.savefig(os.path.join(results_dir, "double_dqn_degradation_curve.png"))
-    plt.close()
-
-    print("Plots Done")
-
-if __name__ == "__main__":
-    generate_degradation_plots()
\ No newline at end of file
+import os 
+import sys
+from collections import defaultdict
+import numpy as np
+import matplotlib.pyplot as plt
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from evaluation.sweep import GRID_KEYS, load_table
+
+AXIS_LABELS = {
+    "target_drift": "Target drift per step",
+    "reward_scale": "Reward scale under drift",
+    "drift_start_step": "Drift start step",
+    "reward_flip": "Reward flip",
+}
+
+METRIC_LABELS = {
+    "drifted_mean": "Mean Episode Reward",
+    "clean_mean": "Mean Episode Reward (clean)",
+}
+
+def degradation_curves(rows, x="target_drift", y="drifted_mean"):
+    # group sweep rows into one curve per (checkpoint, remaining drift params), sorted along x
+    curves = defaultdict(list)
+    for row in rows:
+        fixed = tuple((k, row[k]) for k in GRID_KEYS if k != x)
+        curves[(row["checkpoint"], fixed)].append((row[x], row[y]))
+    return {key: np.array(sorted(points), dtype=float) for key, points in curves.items()}
+
+def _label(fixed, varying):
+    return ", ".join(f"{k}={v}" for k, v in fixed if k in varying)
+
+def generate_degradation_plots(table_path="results/sweep.csv", x="target_drift", y="drifted_mean"):
+    rows = load_table(table_path)
+    curves = degradation_curves(rows, x=x, y=y)
+    # only name the non-x params that actually vary across the table
+    varying = {k for k in GRID_KEYS if k != x and len({row[k] for row in rows}) > 1}
+
+    results_dir = os.path.join(os.getcwd(), "results")
+    os.makedirs(results_dir, exist_ok=True)
+
+    by_checkpoint = defaultdict(list)
+    for (checkpoint, fixed), points in curves.items():
+        by_checkpoint[checkpoint].append((fixed, points))
+
+    for checkpoint, checkpoint_curves in by_checkpoint.items():
+        name = os.path.splitext(os.path.basename(checkpoint))[0]
+        plt.figure()
+        for fixed, points in checkpoint_curves:
+            plt.plot(points[:, 0], points[:, 1], marker="o", label=_label(fixed, varying) or None)
+        plt.xlabel(AXIS_LABELS.get(x, x))
+        plt.ylabel(METRIC_LABELS.get(y, y))
+        plt.title(f"{name} Robustness under {AXIS_LABELS.get(x, x).lower()}")
+        if varying:
+            plt.legend()
+        plt.savefig(os.path.join(results_dir, f"{name}_degradation_curve.png"))
+        plt.close()
+
+    plt.figure()
+    for (checkpoint, fixed), points in curves.items():
+        name = os.path.splitext(os.path.basename(checkpoint))[0]
+        suffix = _label(fixed, varying)
+        plt.plot(points[:, 0], points[:, 1], marker="o", label=f"{name} ({suffix})" if suffix else name)
+    plt.xlabel(AXIS_LABELS.get(x, x))
+    plt.ylabel(METRIC_LABELS.get(y, y))
+    plt.title("Robustness comparison")
+    plt.legend()
+    plt.savefig(os.path.join(results_dir, "degradation_comparison.png"))
+    plt.close()
+
+    print("Plots Done")
+
+if __name__ == "__main__":
+    # arguments are defined once, in the unified CLI (`sentinelrl visualize`)
+    from cli.main import main
+    sys.exit(main(["visualize", *sys.argv[1:]]))
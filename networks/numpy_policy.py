@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# deliberately torch free at import time: deployed policies only need numpy.
+# torch is imported lazily by the export and benchmark helpers
+
+
+def export_checkpoint(checkpoint_path, out_path):
+    # freezes the online QNetwork of a DQN / Double DQN checkpoint into a small .npz
+    import torch
+
+    state_dict = torch.load(checkpoint_path, map_location="cpu")["q_net"]
+    policy = NumpyPolicy.from_state_dict(state_dict)
+    policy.save(out_path)
+    return policy
+
+
+class NumpyPolicy:
+    # greedy forward of the QNetwork MLP (Linear -> ReLU -> ... -> Linear) in plain numpy.
+    # weights are stored transposed (in, out) so a forward is x @ w + b per layer
+
+    def __init__(self, weights, biases):
+        if len(weights) != len(biases) or not weights:
+            raise ValueError("NumpyPolicy needs one bias per weight matrix")
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.obs_dim = self.weights[0].shape[0]
+        self.action_dim = self.weights[-1].shape[1]
+
+    @classmethod
+    def from_state_dict(cls, state_dict):
+        # QNetwork keeps its Linear layers at even positions of self.model (ReLU in between)
+        layer_ids = sorted({int(k.split(".")[1]) for k in state_dict if k.endswith(".weight")})
+        weights = [state_dict[f"model.{i}.weight"].detach().cpu().numpy().T for i in layer_ids]
+        biases = [state_dict[f"model.{i}.bias"].detach().cpu().numpy() for i in layer_ids]
+        return cls(weights, biases)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            num_layers = int(data["num_layers"])
+            weights = [data[f"weight_{i}"] for i in range(num_layers)]
+            biases = [data[f"bias_{i}"] for i in range(num_layers)]
+        return cls(weights, biases)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"num_layers": np.int64(len(self.weights))}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"weight_{i}"] = w
+            arrays[f"bias_{i}"] = b
+        np.savez(path, **arrays)
+
+    def q_values(self, observations):
+        # observations: (B, >= obs_dim) -> (B, action_dim)
+        x = np.asarray(observations, dtype=np.float32).reshape(len(observations), -1)[:, : self.obs_dim]
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w
+            x += b
+            if i < last:
+                np.maximum(x, 0.0, out=x)
+        return x
+
+    def act(self, observation):
+        # single observation, 1-D all the way through (no batch axis to build or strip)
+        x = np.asarray(observation, dtype=np.float32).reshape(-1)[: self.obs_dim]
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w
+            x += b
+            if i < last:
+                np.maximum(x, 0.0, out=x)
+        return int(x.argmax())
+
+    def act_batch(self, observations):
+        return self.q_values(observations).argmax(axis=1)
+
+    # agent-compatible entry points so the policy drops into run_policy / run_policy_batched.
+    # exported policies are greedy, `explore` is accepted and ignored
+    def select_action(self, observation, explore=False):
+        return self.act(observation)
+
+    def select_actions(self, observations, explore=False):
+        return self.act_batch(observations)
+
+
+def _best_latency(fn, number=2000, repeat=5):
+    # microseconds per call of the fastest run
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / number
+
+
+def _startup_seconds(code, repeat=3):
+    # fresh interpreter each time so nothing is already imported
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(checkpoint_path, policy_path, batch_size=256):
+    import torch
+    from evaluation.stress_test import build_agent_from_checkpoint
+
+    torch.set_num_threads(1)
+    policy = NumpyPolicy.load(policy_path)
+    agent = build_agent_from_checkpoint(checkpoint_path, policy.obs_dim, policy.action_dim)
+
+    rng = np.random.default_rng(0)
+    single = rng.normal(size=policy.obs_dim).astype(np.float32)
+    batch = rng.normal(scale=10.0, size=(batch_size, policy.obs_dim)).astype(np.float32)
+    agreement = float(np.mean(policy.act_batch(batch) == agent.select_actions(batch, explore=False)))
+
+    rows = [
+        ("single obs latency (us)", _best_latency(lambda: agent.select_action(single, explore=False)), _best_latency(lambda: policy.act(single))),
+        (f"batch {batch_size} latency (us)", _best_latency(lambda: agent.select_actions(batch, explore=False), number=200), _best_latency(lambda: policy.act_batch(batch), number=200)),
+        ("startup to first action (s)",
+         _startup_seconds(f"from evaluation.stress_test import build_agent_from_checkpoint; a = build_agent_from_checkpoint({checkpoint_path!r}, {policy.obs_dim}, {policy.action_dim}); a.select_action([0.0], explore=False)"),
+         _startup_seconds(f"from networks.numpy_policy import NumpyPolicy; NumpyPolicy.load({policy_path!r}).act([0.0])")),
+    ]
+    return rows, agreement
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True, help="DQN / Double DQN checkpoint to export")
+    parser.add_argument("--out", type=str, default=None, help="exported policy (default: checkpoint path with .npz)")
+    parser.add_argument("--bench", action="store_true", help="compare latency and startup against the torch path")
+    parser.add_argument("--batch_size", type=int, default=256, help="batch size for the batched latency comparison")
+    args = parser.parse_args()
+
+    out_path = args.out or os.path.splitext(args.checkpoint)[0] + ".npz"
+    policy = export_checkpoint(args.checkpoint, out_path)
+    print(f"Exported {len(policy.weights)} layers ({policy.obs_dim} -> {policy.action_dim}) to {out_path} ({os.path.getsize(out_path) / 1024:.1f} KiB)")
+
+    if args.bench:
+        rows, agreement = benchmark(args.checkpoint, out_path, batch_size=args.batch_size)
+        print(f"{'':<32}{'torch':>12}{'numpy':>12}{'speedup':>10}")
+        for name, torch_value, numpy_value in rows:
+            print(f"{name:<32}{torch_value:>12.3f}{numpy_value:>12.3f}{torch_value / numpy_value:>9.1f}x")
+        print(f"greedy action agreement on random batch: {agreement:.2%}")
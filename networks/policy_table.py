@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from networks.numpy_policy import NumpyPolicy
+from evaluation.result_cache import weights_fingerprint
+
+
+def _q_values(source, observations):
+    # (P, obs_dim) -> (P, action_dim) float32 from a DQN / Double DQN agent or an exported NumpyPolicy
+    if hasattr(source, "q_net"):
+        import torch
+
+        with torch.no_grad():
+            obs = torch.as_tensor(observations, dtype=torch.float32, device=source.device)
+            if getattr(source, "quantized", False):
+                # int8 activations are quantized per batch, one observation per pass gives select_action's values
+                return np.concatenate([source.q_net(obs[i : i + 1]).cpu().numpy() for i in range(len(obs))])
+            return source.q_net(obs).cpu().numpy()
+    return source.q_values(observations)
+
+
+def _layers(source):
+    if getattr(source, "quantized", False):
+        # a dynamic int8 network has no parameters, its Linear weights are packed: bound the weights it actually uses
+        return [m.weight().dequantize().numpy() for m in source.q_net.modules() if callable(getattr(m, "weight", None))]
+    if hasattr(source, "q_net"):
+        return [p.detach().cpu().numpy() for name, p in source.q_net.named_parameters() if name.endswith("weight")]
+    return source.weights
+
+
+def lipschitz_bound(source):
+    # upper bound on ||q(x) - q(y)||_2 / ||x - y||_2 of the MLP: product of the layers' spectral norms (ReLU is 1-Lipschitz)
+    bound = 1.0
+    for w in _layers(source):
+        bound *= float(np.linalg.norm(np.asarray(w, dtype=np.float64), 2))
+    return bound
+
+
+def _fingerprint(source):
+    # weights fingerprint, marked for int8 sources since their float weights fingerprint the same as the original
+    fingerprint = weights_fingerprint(source)
+    return fingerprint + ":int8" if getattr(source, "quantized", False) else fingerprint
+
+
+class PolicyTable:
+    # greedy policy compiled into a dense (grid..., action) Q table over a regular observation grid.
+    # an observation within `tolerance` (per coordinate) of a grid point is answered from the table when the point's
+    # best-vs-second Q gap exceeds 2 * lipschitz * distance, which guarantees the network would pick the same action.
+    # anything else (outside the grid, too far from a point, too close a call) falls back to the network.
+    #
+    # the table tracks the parameters it was compiled from and recompiles when they change (optimizer steps,
+    # load_state_dict). exported policies are greedy, `explore` is accepted and ignored
+
+    def __init__(self, source, low, high, spacing=1.0, tolerance=0.0, chunk_size=65536):
+        self.source = source
+        self.obs_dim = source.obs_dim
+        self.action_dim = source.action_dim
+        self.low = np.broadcast_to(np.asarray(low, dtype=np.float64), (self.obs_dim,)).copy()
+        self.high = np.broadcast_to(np.asarray(high, dtype=np.float64), (self.obs_dim,)).copy()
+        self.spacing = np.broadcast_to(np.asarray(spacing, dtype=np.float64), (self.obs_dim,)).copy()
+        if np.any(self.high < self.low) or np.any(self.spacing <= 0):
+            raise ValueError("PolicyTable needs low <= high and a positive spacing")
+        self.tolerance = float(tolerance)
+        self.chunk_size = chunk_size
+        self.grid_shape = tuple(int(n) for n in np.floor((self.high - self.low) / self.spacing + 1e-9).astype(np.int64) + 1)
+        self.hits = 0
+        self.fallbacks = 0
+        self.compiles = 0
+        self.compile_seconds = 0.0
+        self.compile()
+
+    @classmethod
+    def for_env(cls, source, env, **kwargs):
+        # reachable set of CleanEnv / DriftedEnv: the position starts at 0 and moves by +-1, so within max_steps
+        # it is an integer in [-max_steps, max_steps] (drift moves the target, never the position)
+        return cls(source, -env.max_steps, env.max_steps, spacing=1.0, **kwargs)
+
+    def _param_version(self):
+        # cheap change detector checked on every lookup: torch bumps a tensor's version on each in-place update.
+        # numpy policies and int8 networks (no parameters, inference only) are replaced rather than mutated,
+        # so their identities stand in
+        if getattr(self.source, "quantized", False):
+            return (id(self.source.q_net), id(self.source.fp32_state_dict))
+        if hasattr(self.source, "q_net"):
+            return tuple((id(p), p._version) for p in self.source.q_net.parameters())
+        return tuple(id(w) for w in self.source.weights + self.source.biases)
+
+    def _check_tolerance(self):
+        # int8 activations are quantized per batch, so the network is not Lipschitz between nearby inputs
+        if self.tolerance > 0 and getattr(self.source, "quantized", False):
+            raise ValueError("PolicyTable tolerance > 0 needs a float source, the Lipschitz guarantee does not hold for int8 networks")
+
+    def grid_points(self):
+        axes = [self.low[d] + self.spacing[d] * np.arange(n) for d, n in enumerate(self.grid_shape)]
+        return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, self.obs_dim)
+
+    def compile(self):
+        self._check_tolerance()
+        start = time.perf_counter()
+        points = self.grid_points().astype(np.float32)
+        q = np.concatenate([_q_values(self.source, points[i : i + self.chunk_size]) for i in range(0, len(points), self.chunk_size)])
+        top2 = np.sort(q, axis=1)[:, -2:] if self.action_dim > 1 else np.concatenate([q, np.full_like(q, -np.inf)], axis=1)
+        self.q_table = q.reshape(*self.grid_shape, self.action_dim)
+        self.actions = q.argmax(axis=1).reshape(self.grid_shape)
+        self.margins = (top2[:, -1] - top2[:, 0]).reshape(self.grid_shape)
+        self.lipschitz = lipschitz_bound(self.source)
+        self.fingerprint = _fingerprint(self.source)
+        self.version = self._param_version()
+        self.compiles += 1
+        self.compile_seconds += time.perf_counter() - start
+        if getattr(self.source, "quantized", False) and self.check_actions():
+            raise RuntimeError("int8 PolicyTable actions differ from the source's select_action on the grid")
+
+    def check_actions(self):
+        # grid points whose table action differs from the source's own single-observation greedy action
+        points = self.grid_points().astype(np.float32)
+        expected = np.array([self.source.select_action(p, explore=False) for p in points])
+        return int(np.count_nonzero(expected != self.actions.reshape(-1)))
+
+    def refresh(self):
+        # recompile if the source parameters changed since the last compile, True when it did
+        version = self._param_version()
+        if version == self.version:
+            return False
+        # a version bump without a value change (e.g. loading the same weights) only updates the version
+        if _fingerprint(self.source) == self.fingerprint:
+            self.version = version
+            return False
+        self.compile()
+        return True
+
+    def _locate(self, x):
+        # x: (B, obs_dim) -> flat table index and a mask of rows the table may answer
+        scaled = (x - self.low) / self.spacing
+        idx = np.rint(scaled)
+        offset = np.abs(scaled - idx) * self.spacing
+        inside = np.all((idx >= 0) & (idx < self.grid_shape), axis=1) & np.all(offset <= self.tolerance, axis=1)
+        idx = np.clip(idx, 0, np.array(self.grid_shape) - 1).astype(np.int64)
+        flat = np.ravel_multi_index(idx.T, self.grid_shape)
+        if self.tolerance > 0:
+            distance = np.sqrt((offset ** 2).sum(axis=1))
+            inside &= self.margins.reshape(-1)[flat] > 2.0 * self.lipschitz * distance
+        return flat, inside
+
+    def act_batch(self, observations):
+        self.refresh()
+        x = np.asarray(observations, dtype=np.float64).reshape(len(observations), -1)[:, : self.obs_dim]
+        flat, inside = self._locate(x)
+        actions = self.actions.reshape(-1)[flat]
+        hits = int(inside.sum())
+        self.hits += hits
+        if hits < len(x):
+            self.fallbacks += len(x) - hits
+            actions[~inside] = _q_values(self.source, x[~inside].astype(np.float32)).argmax(axis=1)
+        return actions
+
+    def act(self, observation):
+        self.refresh()
+        x = np.asarray(observation, dtype=np.float64).reshape(-1)[: self.obs_dim]
+        if self.obs_dim == 1 and self.tolerance == 0:
+            # exact 1-D lookup with python scalars, the common CleanEnv / DriftedEnv case
+            i = (float(x[0]) - self.low[0]) / self.spacing[0]
+            if i.is_integer() and 0 <= i < self.grid_shape[0]:
+                self.hits += 1
+                return int(self.actions[int(i)])
+        else:
+            flat, inside = self._locate(x[None])
+            if inside[0]:
+                self.hits += 1
+                return int(self.actions.reshape(-1)[flat[0]])
+        self.fallbacks += 1
+        return int(_q_values(self.source, x[None].astype(np.float32)).argmax())
+
+    # agent-compatible entry points so the table drops into run_policy / run_policy_batched
+    def select_action(self, observation, explore=False):
+        return self.act(observation)
+
+    def select_actions(self, observations, explore=False):
+        return self.act_batch(observations)
+
+    def save(self, path):
+        # the table alone; load() needs the source again for fallbacks and invalidation
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            low=self.low, high=self.high, spacing=self.spacing, tolerance=self.tolerance,
+            q_table=self.q_table, fingerprint=self.fingerprint,
+        )
+
+    @classmethod
+    def load(cls, path, source):
+        # reuses the saved table when it was compiled from these exact weights, recompiles otherwise
+        table = cls.__new__(cls)
+        with np.load(path) as data:
+            table.source = source
+            table.obs_dim = source.obs_dim
+            table.action_dim = source.action_dim
+            table.low, table.high, table.spacing = data["low"], data["high"], data["spacing"]
+            table.tolerance = float(data["tolerance"])
+            table.chunk_size = 65536
+            q = data["q_table"]
+            fingerprint = str(data["fingerprint"])
+        table.grid_shape = q.shape[:-1]
+        table.hits = table.fallbacks = table.compiles = 0
+        table.compile_seconds = 0.0
+        if fingerprint != _fingerprint(source):
+            table.compile()
+            return table
+        table._check_tolerance()
+        flat = q.reshape(-1, table.action_dim)
+        top2 = np.sort(flat, axis=1)[:, -2:]
+        table.q_table = q
+        table.actions = flat.argmax(axis=1).reshape(table.grid_shape)
+        table.margins = (top2[:, -1] - top2[:, 0]).reshape(table.grid_shape)
+        table.lipschitz = lipschitz_bound(source)
+        table.fingerprint = fingerprint
+        table.version = table._param_version()
+        return table
+
+
+def benchmark(source, env, num_episodes=50, max_steps=200):
+    # greedy rollouts through the network and through the table: wall time and whether every episode reward matches
+    from evaluation.stress_test import run_policy
+    from evaluation.batched_eval import run_policy_batched
+
+    table = PolicyTable.for_env(source, env)
+    rows = []
+    for name, runner in (("sequential", run_policy), ("batched", run_policy_batched)):
+        timings = []
+        rewards = []
+        for policy in (source, table):
+            start = time.perf_counter()
+            rewards.append(runner(env, policy, num_episodes=num_episodes, max_steps=max_steps))
+            timings.append(time.perf_counter() - start)
+        rows.append((name, timings[0], timings[1], bool(np.array_equal(rewards[0], rewards[1]))))
+    return rows, table
+
+
+if __name__ == "__main__":
+    from environments.clean_env import CleanEnv
+    from environments.drifted_env import DriftedEnv
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True, help="DQN / Double DQN checkpoint (.pt) or exported NumpyPolicy (.npz)")
+    parser.add_argument("--out", type=str, default=None, help="compiled table (default: checkpoint path with .table.npz)")
+    parser.add_argument("--max_steps", type=int, default=200, help="episode length, bounds the reachable positions")
+    parser.add_argument("--bench", action="store_true", help="compare greedy rollouts through the network and the table")
+    parser.add_argument("--episodes", type=int, default=50, help="episodes per benchmark rollout")
+    parser.add_argument("--target_drift", type=float, default=0.0, help="benchmark on a DriftedEnv with this target drift")
+    args = parser.parse_args()
+
+    env = CleanEnv(max_steps=args.max_steps) if args.target_drift == 0.0 else DriftedEnv(max_steps=args.max_steps, drift_start_step=1, target_drift_per_step=args.target_drift)
+    if args.checkpoint.endswith(".npz"):
+        source = NumpyPolicy.load(args.checkpoint)
+    else:
+        from evaluation.stress_test import build_agent_from_checkpoint
+
+        source = build_agent_from_checkpoint(args.checkpoint, env.observation_space.shape[0], env.action_space.n)
+
+    table = PolicyTable.for_env(source, env)
+    out_path = args.out or os.path.splitext(args.checkpoint)[0] + ".table.npz"
+    table.save(out_path)
+    print(f"Compiled {table.q_table.size // table.action_dim} states x {table.action_dim} actions in {1e3 * table.compile_seconds:.1f} ms to {out_path}")
+    print(f"{table.check_actions()} grid points disagree with the network's select_action")
+
+    if args.bench:
+        rows, _ = benchmark(source, env, num_episodes=args.episodes, max_steps=args.max_steps)
+        print(f"{'':<14}{'network (s)':>14}{'table (s)':>12}{'speedup':>10}{'identical':>11}")
+        for name, network_seconds, table_seconds, identical in rows:
+            print(f"{name:<14}{network_seconds:>14.4f}{table_seconds:>12.4f}{network_seconds / table_seconds:>9.1f}x{str(identical):>11}")
@@ -1,22 +1,34 @@
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-
-class QNetwork(nn.Module):
-    # simple feed forward Q network
-    def __init__(self, obs_dim, action_dim, hidden_dims=(128,128)):
-        super().__init__()
-
-        layers = []
-        in_dim = obs_dim
-        for h in hidden_dims:
-            layers.append(nn.Linear(in_dim, h))
-            layers.append(nn.ReLU())
-            in_dim = h
-        layers.append(nn.Linear(in_dim, action_dim))
-        self.model = nn.Sequential(*layers)
-
-    def forward(self, x):
-        if not torch.is_tensor(x):
-            x = torch.tensor(x, dtype=torch.float32)
-        return self.model(x)
\ No newline at end of file
+import copy
+import warnings
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+class QNetwork(nn.Module):
+    # simple feed forward Q network
+    def __init__(self, obs_dim, action_dim, hidden_dims=(128,128)):
+        super().__init__()
+
+        layers = []
+        in_dim = obs_dim
+        for h in hidden_dims:
+            layers.append(nn.Linear(in_dim, h))
+            layers.append(nn.ReLU())
+            in_dim = h
+        layers.append(nn.Linear(in_dim, action_dim))
+        self.model = nn.Sequential(*layers)
+
+    def forward(self, x):
+        if not torch.is_tensor(x):
+            x = torch.tensor(x, dtype=torch.float32)
+        return self.model(x)
+
+def quantize_dynamic_int8(model):
+    # post-training dynamic quantization of every Linear: int8 weights, activations quantized per batch at run time.
+    # inference only, on CPU. returns a quantized copy, the float model is left untouched
+    from torch.ao.quantization import quantize_dynamic
+
+    with warnings.catch_warnings():
+        # torch.ao eager quantization is deprecated in favour of torchao, which is not a dependency here
+        warnings.simplefilter("ignore")
+        return quantize_dynamic(copy.deepcopy(model).cpu().eval(), {nn.Linear}, dtype=torch.qint8)
@@ -0,0 +1,36 @@
+import torch
+import torch.nn as nn
+
+class StackedQNetwork(nn.Module):
+    # M QNetworks with identical architecture evaluated as one batched MLP.
+    # each Linear layer becomes an (M, in, out) weight stack (transposed for baddbmm(b, x, w)) and one baddbmm per layer serves all M policies
+
+    def __init__(self, state_dicts):
+        super().__init__()
+        if not state_dicts:
+            raise ValueError("StackedQNetwork needs at least one state dict")
+        reference = state_dicts[0]
+        for i, sd in enumerate(state_dicts[1:], start=1):
+            if sd.keys() != reference.keys() or any(sd[k].shape != reference[k].shape for k in reference):
+                raise ValueError(f"state dict {i} does not match the architecture of state dict 0")
+
+        # QNetwork keeps its Linear layers at even positions of self.model (ReLU in between)
+        layer_ids = sorted({int(k.split(".")[1]) for k in reference if k.endswith(".weight")})
+        self.num_models = len(state_dicts)
+        self.weights = nn.ParameterList(
+            nn.Parameter(torch.stack([sd[f"model.{i}.weight"] for sd in state_dicts]).transpose(1, 2).contiguous(), requires_grad=False)
+            for i in layer_ids
+        )
+        self.biases = nn.ParameterList(
+            nn.Parameter(torch.stack([sd[f"model.{i}.bias"] for sd in state_dicts]).unsqueeze(1), requires_grad=False)
+            for i in layer_ids
+        )
+
+    def forward(self, x):
+        # x: (M, B, obs_dim) -> (M, B, action_dim)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = torch.baddbmm(b, x, w)
+            if i < last:
+                x = torch.relu(x)
+        return x
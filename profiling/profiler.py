@@ -0,0 +1,133 @@
+import os
+import csv
+import json
+import time
+import uuid
+from collections import defaultdict
+
+class _NullPhase:
+    # shared no-op context manager returned while profiling is disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start", "children")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.children = 0.0
+        self.profiler._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        profiler = self.profiler
+        profiler._stack.pop()
+        profiler.totals[self.name] += duration
+        # exclusive time: nested phases are charged to themselves only, so shares add up to at most 100%
+        profiler.self_totals[self.name] += duration - self.children
+        profiler.calls[self.name] += 1
+        if profiler._stack:
+            profiler._stack[-1].children += duration
+        return False
+
+
+class Profiler:
+    # accumulates wall time and call counts per named phase plus throughput counters.
+    # when disabled, phase() returns a shared no-op context and count() returns immediately.
+    # phases may nest (e.g. a train step around its forward / backward): total_s is inclusive, self_s and share
+    # exclude the time of nested phases. phases are tracked per profiler, use one profiler per thread
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.totals = defaultdict(float)
+        self.self_totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.start_time = time.perf_counter()
+        self._stack = []
+        # records of one run go to fresh files, tagged with the run id
+        self.run_id = uuid.uuid4().hex[:12]
+        self._written = set()
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def reset(self):
+        self.totals.clear()
+        self.self_totals.clear()
+        self.calls.clear()
+        self.counters.clear()
+        self.start_time = time.perf_counter()
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            "elapsed_s": elapsed,
+            "phases": {
+                name: {
+                    "calls": self.calls[name],
+                    "total_s": total,
+                    "self_s": self.self_totals[name],
+                    "mean_us": 1e6 * total / max(1, self.calls[name]),
+                    "share": self.self_totals[name] / elapsed if elapsed > 0 else 0.0,
+                }
+                for name, total in self.totals.items()
+            },
+            "counters": dict(self.counters),
+            "rates_per_s": {name: n / elapsed for name, n in self.counters.items()} if elapsed > 0 else {},
+        }
+
+    def write_jsonl(self, path, **fields):
+        # one record per call, e.g. at every logging interval. the first write of this profiler truncates the file,
+        # so records of separate runs never pile up in one file
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        mode = "a" if path in self._written else "w"
+        self._written.add(path)
+        with open(path, mode) as f:
+            f.write(json.dumps({"run_id": self.run_id, **fields, **self.snapshot()}) + "\n")
+
+    def write_csv(self, path):
+        snap = self.snapshot()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "name", "calls", "total_s", "self_s", "mean_us", "share", "per_s"])
+            for name, p in snap["phases"].items():
+                writer.writerow(["phase", name, p["calls"], p["total_s"], p["self_s"], p["mean_us"], p["share"], ""])
+            for name, n in snap["counters"].items():
+                writer.writerow(["counter", name, n, "", "", "", "", snap["rates_per_s"].get(name, "")])
+
+    def summary(self):
+        snap = self.snapshot()
+        lines = [
+            f"{'phase':<20}{'calls':>10}{'total s':>11}{'self s':>10}{'mean us':>11}{'share':>8}",
+            "-" * 70,
+        ]
+        for name, p in sorted(snap["phases"].items(), key=lambda kv: -kv[1]["total_s"]):
+            lines.append(f"{name:<20}{p['calls']:>10d}{p['total_s']:>11.3f}{p['self_s']:>10.3f}{p['mean_us']:>11.1f}{p['share']:>8.1%}")
+        lines.append("-" * 70)
+        for name, n in snap["counters"].items():
+            lines.append(f"{name:<20}{n:>10d}{snap['rates_per_s'].get(name, 0.0):>19.1f} /s")
+        lines.append(f"{'elapsed':<20}{snap['elapsed_s']:>21.3f} s")
+        return "\n".join(lines)
+
+
+# default sink for code paths that were not handed a profiler
+NULL_PROFILER = Profiler(enabled=False)
@@ -0,0 +1,179 @@
+import numpy as np
+
+from replay.replay_buffer import ArrayReplayBuffer
+
+class EpisodeReplayBuffer(ArrayReplayBuffer):
+    # episode-segmented replay: every observation is stored once, next_obs is the row after it.
+    # each row holds an observation plus the transition taken from it (action, reward, done). the observation
+    # an episode ends on is stored as a frame row with valid=False, so an episode of T transitions takes T + 1 rows.
+    # n-step returns, bootstrap observations and bootstrap discounts are computed vectorially at sample time.
+    #
+    # interleaved producers (vectorized envs, actors) each write to their own contiguous sub-ring (`stream`),
+    # which keeps "next row = next observation" true per stream
+
+    def __init__(self, capacity, device, gamma=0.99, n_step=1, num_streams=1, obs_shape=None, pin_memory=False):
+        self.gamma = gamma
+        self.n_step = int(n_step)
+        self.num_streams = int(num_streams)
+        self.stream_capacity = int(capacity) // self.num_streams
+        if self.stream_capacity < self.n_step + 2:
+            raise ValueError(f"capacity {capacity} is too small for {num_streams} streams with n_step={n_step}")
+        # per stream write cursor, filled rows and row of the open episode's last frame (-1: no open episode)
+        self.stream_cursor = np.zeros(self.num_streams, dtype=np.int64)
+        self.stream_size = np.zeros(self.num_streams, dtype=np.int64)
+        self.tail = np.full(self.num_streams, -1, dtype=np.int64)
+        # stored transitions (valid rows), kept up to date on every write so len() is O(1)
+        self.num_valid = 0
+        self.discounts = self.gamma ** np.arange(self.n_step + 1)
+        super().__init__(self.stream_capacity * self.num_streams, device, obs_shape=obs_shape, pin_memory=pin_memory)
+
+    def _allocate(self, obs_shape):
+        self.obs_shape = obs_shape
+        self.obs = np.zeros((self.capacity, *obs_shape), dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=bool)
+        self.valid = np.zeros(self.capacity, dtype=bool)
+
+    def __len__(self):
+        # transitions, frame rows excluded
+        return self.num_valid
+
+    def _claim_rows(self, streams):
+        # next row of each (distinct) stream's sub-ring
+        rows = streams * self.stream_capacity + self.stream_cursor[streams]
+        self.stream_cursor[streams] = (self.stream_cursor[streams] + 1) % self.stream_capacity
+        self.stream_size[streams] = np.minimum(self.stream_size[streams] + 1, self.stream_capacity)
+        return rows
+
+    def _push_streams(self, streams, obs, actions, rewards, next_obs, dones, truncated):
+        # one transition per stream, streams must be distinct
+        tails = self.tail[streams]
+        # a transition continues its stream's episode when it starts from that episode's last frame
+        has_tail = tails >= 0
+        continues = has_tail.copy()
+        if has_tail.any():
+            frames = self.obs[tails[has_tail]].reshape(int(has_tail.sum()), -1)
+            continues[has_tail] = np.all(frames == obs[has_tail].reshape(len(frames), -1), axis=1)
+
+        rows = tails.copy()
+        new = ~continues
+        if new.any():
+            # episode start (or a cut): the previous frame, if any, stays behind as an invalid frame row
+            rows[new] = self._claim_rows(streams[new])
+            self.obs[rows[new]] = obs[new]
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.dones[rows] = dones
+        # claimed rows may overwrite old transitions or frame rows, count only the changes
+        self.num_valid += int(np.count_nonzero(~self.valid[rows]))
+        self.valid[rows] = True
+
+        frame_rows = self._claim_rows(streams)
+        self.obs[frame_rows] = next_obs
+        self.num_valid -= int(np.count_nonzero(self.valid[frame_rows]))
+        self.valid[frame_rows] = False
+        ended = dones | truncated
+        self.tail[streams] = np.where(ended, -1, frame_rows)
+        return rows
+
+    def push(self, obs, action, reward, next_obs, done, truncated=False, stream=0):
+        if self.obs is None:
+            self._allocate(np.shape(obs))
+        return int(self._push_streams(
+            np.array([stream]),
+            np.asarray(obs, dtype=np.float32)[None],
+            np.array([action]),
+            np.array([reward], dtype=np.float32),
+            np.asarray(next_obs, dtype=np.float32)[None],
+            np.array([bool(done)]),
+            np.array([bool(truncated)]),
+        )[0])
+
+    def push_batch(self, obs, actions, rewards, next_obs, dones, truncated=None, streams=None):
+        # one vectorized write when every transition comes from a different stream (one step of a vector env),
+        # otherwise the transitions are consecutive steps and are appended in order
+        obs = np.asarray(obs, dtype=np.float32)
+        if self.obs is None:
+            self._allocate(obs.shape[1:])
+        n = obs.shape[0]
+        actions = np.asarray(actions)
+        rewards = np.asarray(rewards, dtype=np.float32)
+        next_obs = np.asarray(next_obs, dtype=np.float32)
+        dones = np.asarray(dones).astype(bool)
+        truncated = np.zeros(n, dtype=bool) if truncated is None else np.asarray(truncated).astype(bool)
+        streams = np.zeros(n, dtype=np.int64) if streams is None else np.asarray(streams, dtype=np.int64)
+
+        if len(np.unique(streams)) == n:
+            return self._push_streams(streams, obs, actions, rewards, next_obs, dones, truncated)
+        return np.array([
+            self._push_streams(streams[i:i + 1], obs[i:i + 1], actions[i:i + 1], rewards[i:i + 1], next_obs[i:i + 1], dones[i:i + 1], truncated[i:i + 1])[0]
+            for i in range(n)
+        ])
+
+    def sample_indices(self, batch_size):
+        # uniform over stored transitions: draw over filled rows of all streams, redraw frame rows
+        cumulative = np.cumsum(self.stream_size)
+        idx = np.empty(batch_size, dtype=np.int64)
+        pending = np.arange(batch_size)
+        while len(pending):
+            u = np.random.randint(0, cumulative[-1], size=len(pending))
+            streams = np.searchsorted(cumulative, u, side="right")
+            rows = streams * self.stream_capacity + (u - (cumulative[streams] - self.stream_size[streams]))
+            idx[pending] = rows
+            pending = pending[~self.valid[rows]]
+        return idx
+
+    def n_step_targets(self, idx):
+        # for each sampled row: discounted reward sum over up to n transitions of the same episode,
+        # the row of the observation to bootstrap from, and gamma^m (0 when the episode terminated inside the window)
+        streams = idx // self.stream_capacity
+        local = idx % self.stream_capacity
+        rows = streams[:, None] * self.stream_capacity + (local[:, None] + np.arange(self.n_step + 1)) % self.stream_capacity
+
+        valid = self.valid[rows[:, :-1]]
+        dones = self.dones[rows[:, :-1]]
+        # transition k is included while every earlier one was valid and non-terminal
+        included = np.cumprod(valid, axis=1).astype(bool)
+        included[:, 1:] &= np.cumprod(~dones[:, :-1], axis=1).astype(bool)
+
+        returns = (included * self.rewards[rows[:, :-1]] * self.discounts[:-1]).sum(axis=1)
+        steps = included.sum(axis=1)
+        terminated = (included & dones).any(axis=1)
+        bootstrap_rows = rows[np.arange(len(idx)), steps]
+        bootstrap_discounts = np.where(terminated, 0.0, self.discounts[steps])
+        return returns.astype(np.float32), bootstrap_rows, bootstrap_discounts.astype(np.float32)
+
+    def gather(self, idx):
+        # (obs, actions, n-step returns, bootstrap obs, bootstrap discounts): target = returns + discounts * max_a Q(bootstrap obs, a)
+        returns, bootstrap_rows, bootstrap_discounts = self.n_step_targets(idx)
+        return (
+            self._to_tensor(self.obs[idx]),
+            self._to_tensor(self.actions[idx]),
+            self._to_tensor(returns),
+            self._to_tensor(self.obs[bootstrap_rows]),
+            self._to_tensor(bootstrap_discounts),
+        )
+
+    def state_dict(self):
+        state = {
+            "stream_cursor": self.stream_cursor.copy(),
+            "stream_size": self.stream_size.copy(),
+            "tail": self.tail.copy(),
+        }
+        if self.obs is not None:
+            state["obs_shape"] = self.obs_shape
+            for name in ("obs", "actions", "rewards", "dones", "valid"):
+                state[name] = getattr(self, name).copy()
+        return state
+
+    def load_state_dict(self, state):
+        if "obs_shape" in state:
+            if self.obs is None:
+                self._allocate(tuple(state["obs_shape"]))
+            for name in ("obs", "actions", "rewards", "dones", "valid"):
+                getattr(self, name)[:] = state[name]
+            self.num_valid = int(np.count_nonzero(self.valid))
+        self.stream_cursor[:] = state["stream_cursor"]
+        self.stream_size[:] = state["stream_size"]
+        self.tail[:] = state["tail"]
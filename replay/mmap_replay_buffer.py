@@ -0,0 +1,121 @@
+import os
+import json
+
+import numpy as np
+
+from replay.replay_buffer import ArrayReplayBuffer
+
+class MemmapReplayBuffer(ArrayReplayBuffer):
+    # ring buffer whose columns are .npy files memory-mapped from `directory`.
+    # only touched pages are resident, so capacity is bounded by disk rather than RAM.
+    # flush() persists the write cursor; reopening the same directory resumes the buffer without refilling it
+
+    META_FILE = "meta.json"
+    COLUMNS = ("obs", "next_obs", "actions", "rewards", "dones")
+    DTYPES = {"obs": np.float32, "next_obs": np.float32, "actions": np.int64, "rewards": np.float32, "dones": np.float32}
+
+    def __init__(self, capacity, device, directory, obs_shape=None, pin_memory=False):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(capacity, device, pin_memory=pin_memory)
+        # False after reopening: the observation shape came from disk and is checked against the first push
+        self._validated = True
+
+        meta = self._read_meta()
+        if meta is not None:
+            if meta["capacity"] != self.capacity:
+                raise ValueError(f"Replay directory {directory} holds capacity {meta['capacity']}, requested {self.capacity}")
+            self._open(tuple(meta["obs_shape"]))
+            self.cursor = meta["cursor"]
+            self.size = meta["size"]
+        elif obs_shape is not None:
+            self._allocate(tuple(obs_shape))
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def _read_meta(self):
+        path = os.path.join(self.directory, self.META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_meta(self, cursor=None, size=None):
+        # write-then-rename so a crash never leaves a half written cursor behind
+        path = os.path.join(self.directory, self.META_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "capacity": self.capacity,
+                "obs_shape": list(self.obs_shape),
+                "cursor": int(self.cursor if cursor is None else cursor),
+                "size": int(self.size if size is None else size),
+            }, f)
+        os.replace(tmp_path, path)
+
+    def _allocate(self, obs_shape):
+        # files are created sparse, disk blocks are only used as transitions are written
+        self.obs_shape = obs_shape
+        for name in self.COLUMNS:
+            setattr(self, name, np.lib.format.open_memmap(self._path(name), mode="w+", dtype=self.DTYPES[name], shape=self._column_shape(name)))
+        self._write_meta()
+
+    def _column_shape(self, name):
+        return (self.capacity, *self.obs_shape) if name in ("obs", "next_obs") else (self.capacity,)
+
+    def _open(self, obs_shape):
+        self.obs_shape = obs_shape
+        for name in self.COLUMNS:
+            column = np.load(self._path(name), mmap_mode="r+")
+            if column.dtype != self.DTYPES[name] or column.shape != self._column_shape(name):
+                raise ValueError(
+                    f"Replay directory {self.directory}: {name}.npy holds {column.dtype} {column.shape}, "
+                    f"meta.json describes {np.dtype(self.DTYPES[name])} {self._column_shape(name)}"
+                )
+            setattr(self, name, column)
+        self._validated = False
+
+    def _check_obs(self, obs, batched):
+        # first write after a reopen: the caller's observations must match the stored ones
+        obs = np.asarray(obs)
+        shape = obs.shape[1:] if batched else obs.shape
+        if shape != self.obs_shape:
+            raise ValueError(f"Replay directory {self.directory} holds observations of shape {self.obs_shape}, got {shape}")
+        if not np.can_cast(obs.dtype, np.float32, casting="same_kind"):
+            raise ValueError(f"Replay directory {self.directory} stores float32 observations, got {obs.dtype}")
+        self._validated = True
+
+    def push(self, obs, action, reward, next_obs, done):
+        if not self._validated:
+            self._check_obs(obs, batched=False)
+            self._check_obs(next_obs, batched=False)
+        return super().push(obs, action, reward, next_obs, done)
+
+    def push_batch(self, obs, actions, rewards, next_obs, dones):
+        if not self._validated:
+            self._check_obs(obs, batched=True)
+            self._check_obs(next_obs, batched=True)
+        return super().push_batch(obs, actions, rewards, next_obs, dones)
+
+    def flush(self, state=None):
+        # state: a state_dict() snapshot whose cursor is persisted instead of the live one.
+        # safe to call from a checkpoint writer thread while the training thread keeps pushing
+        if self.obs is None:
+            return
+        for name in self.COLUMNS:
+            getattr(self, name).flush()
+        if state is None:
+            self._write_meta()
+        else:
+            self._write_meta(state["cursor"], state["size"])
+
+    def state_dict(self):
+        # the transitions already live on disk, only the cursor goes into checkpoints (flushed by the checkpoint writer).
+        # rows written after the snapshot are not kept: once the ring wraps, a resume from an older checkpoint
+        # samples some transitions that were written after it, so mmap replay resumes but not bit-exactly
+        return {"cursor": self.cursor, "size": self.size}
+
+    def load_state_dict(self, state):
+        self.cursor = state["cursor"]
+        self.size = state["size"]
@@ -0,0 +1,63 @@
+import queue
+import threading
+
+import torch
+
+class PrefetchSampler:
+    # samples minibatches in a background thread and keeps up to `depth` of them ready,
+    # so the learner never waits on index drawing, gathering or host -> device copies.
+    # writers to the replay buffer must hold `lock` while the sampler is running
+
+    def __init__(self, replay_buffer, batch_size, depth=2, pin_memory=False, device=None):
+        self.replay_buffer = replay_buffer
+        self.batch_size = batch_size
+        self.device = torch.device(device) if device is not None else None
+        self.pin_memory = pin_memory and self.device is not None and self.device.type != "cpu"
+        self.lock = threading.Lock()
+
+        self._ready = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replay-prefetch", daemon=True)
+        self._thread.start()
+
+    def _stage(self, item):
+        # pinned host memory lets the copy to the accelerator run asynchronously
+        if not torch.is_tensor(item) or self.device is None or item.device == self.device:
+            return item
+        if self.pin_memory and item.device.type == "cpu":
+            item = item.pin_memory()
+        return item.to(self.device, non_blocking=self.pin_memory)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if len(self.replay_buffer) < self.batch_size:
+                    self._stop.wait(0.001)
+                    continue
+                with self.lock:
+                    batch = self.replay_buffer.sample(self.batch_size)
+                self._put(tuple(self._stage(item) for item in batch))
+        except Exception as exc:
+            # handed to the learner and re-raised by sample(), instead of leaving it blocked on an empty queue
+            self._put(exc)
+
+    def _put(self, item):
+        # with depth >= 2 one batch is consumed while the next is already staged
+        while not self._stop.is_set():
+            try:
+                self._ready.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def sample(self):
+        batch = self._ready.get()
+        if isinstance(batch, Exception):
+            # keep it queued so every later sample() raises it as well
+            self._ready.put(batch)
+            raise batch
+        return batch
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
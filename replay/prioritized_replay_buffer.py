@@ -0,0 +1,110 @@
+import numpy as np
+
+from replay.replay_buffer import ArrayReplayBuffer
+
+class SumTree:
+    # array backed binary sum tree. leaves hold priorities, every internal node holds the sum of its children.
+    # node 1 is the root, node i has children 2i and 2i+1, leaves start at `leaf_offset`
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.leaf_offset = 1
+        while self.leaf_offset < self.capacity:
+            self.leaf_offset *= 2
+        self.depth = int(np.log2(self.leaf_offset))
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    @property
+    def total(self):
+        return float(self.tree[1])
+
+    def __getitem__(self, indices):
+        return self.tree[np.asarray(indices) + self.leaf_offset]
+
+    def update(self, indices, priorities):
+        # bulk O(k log n) update: write the leaves, then recompute each touched parent once per level
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_offset
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        # batched prefix-sum search, all queries descend the tree together one level at a time
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(values.shape[0], dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.leaf_offset
+
+
+class PrioritizedReplayBuffer(ArrayReplayBuffer):
+    # proportional prioritized replay (Schaul et al. 2016) over the array ring buffer.
+    # sample() additionally returns importance weights and the sampled indices for update_priorities()
+
+    def __init__(self, capacity, device, alpha=0.6, beta_start=0.4, beta_frames=100000, eps=1e-6, obs_shape=None, pin_memory=False):
+        super().__init__(capacity, device, obs_shape=obs_shape, pin_memory=pin_memory)
+        self.alpha = alpha
+        self.beta_start = beta_start
+        self.beta_frames = beta_frames
+        self.eps = eps
+        self.tree = SumTree(self.capacity)
+        self.max_priority = 1.0
+        self.sample_calls = 0
+
+    @property
+    def beta(self):
+        # anneal importance sampling correction towards 1 over beta_frames sample calls
+        frac = min(1.0, self.sample_calls / max(1, self.beta_frames))
+        return self.beta_start + frac * (1.0 - self.beta_start)
+
+    def push(self, obs, action, reward, next_obs, done):
+        i = super().push(obs, action, reward, next_obs, done)
+        # new transitions get the current max priority so they are replayed at least once
+        self.tree.update([i], self.max_priority)
+        return i
+
+    def push_batch(self, obs, actions, rewards, next_obs, dones):
+        idx = super().push_batch(obs, actions, rewards, next_obs, dones)
+        self.tree.update(idx, self.max_priority)
+        return idx
+
+    def sample_indices(self, batch_size):
+        # stratified sampling: one uniform draw inside each of batch_size equal slices of the total mass
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        values = np.minimum(values, np.nextafter(total, 0))
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def sample(self, batch_size):
+        idx = self.sample_indices(batch_size)
+        self.sample_calls += 1
+
+        probs = self.tree[idx] / self.tree.total
+        weights = (self.size * probs) ** (-self.beta)
+        weights = (weights / weights.max()).astype(np.float32)
+
+        return (*self.gather(idx), self._to_tensor(weights), idx)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = (np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def state_dict(self):
+        state = super().state_dict()
+        state["priorities"] = self.tree[np.arange(self.size)].copy()
+        state["max_priority"] = self.max_priority
+        state["sample_calls"] = self.sample_calls
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.tree.update(np.arange(self.size), state["priorities"])
+        self.max_priority = state["max_priority"]
+        self.sample_calls = state["sample_calls"]
@@ -1,30 +1,145 @@
-import random
-from collections import deque
-import torch
-import numpy as np
-
-class ReplayBuffer:
-    # fixed size experience replay buffer. stores transitions and supports random minibatch sampling
-
-    def __init__(self, capacity, device):
-        self.capacity = capacity
-        self.device = device
-        self.buffer = deque(maxlen=capacity)
-
-    def __len__(self):
-        return len(self.buffer)
-    
-    def push(self, obs, action, reward, next_obs, done):
-        self.buffer.append((obs, action, reward, next_obs, done))
-
-    def sample(self, batch_size):
-        batch = random.sample(self.buffer, batch_size)
-
-        obs, actions, rewards, next_obs, dones = zip(*batch)
-
-        obs = torch.tensor(np.stack(obs), dtype=torch.float32, device=self.device)
-        actions = torch.tensor(actions, dtype=torch.long, device=self.device)
-        rewards = torch.tensor(rewards, dtype=torch.float32, device=self.device)
-        next_obs = torch.tensor(np.stack(next_obs), dtype=torch.float32, device=self.device)
-        dones = torch.tensor(dones, dtype=torch.float32, device=self.device)
-        return obs, actions, rewards, next_obs, dones
\ No newline at end of file
+import random
+from collections import deque
+import torch
+import numpy as np
+
+class ReplayBuffer:
+    # fixed size experience replay buffer. stores transitions and supports random minibatch sampling
+
+    def __init__(self, capacity, device):
+        self.capacity = capacity
+        self.device = device
+        self.buffer = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def push(self, obs, action, reward, next_obs, done):
+        self.buffer.append((obs, action, reward, next_obs, done))
+
+    def push_batch(self, obs, actions, rewards, next_obs, dones):
+        for transition in zip(obs, actions, rewards, next_obs, dones):
+            self.buffer.append(transition)
+
+    def sample(self, batch_size):
+        batch = random.sample(self.buffer, batch_size)
+
+        obs, actions, rewards, next_obs, dones = zip(*batch)
+
+        obs = torch.tensor(np.stack(obs), dtype=torch.float32, device=self.device)
+        actions = torch.tensor(actions, dtype=torch.long, device=self.device)
+        rewards = torch.tensor(rewards, dtype=torch.float32, device=self.device)
+        next_obs = torch.tensor(np.stack(next_obs), dtype=torch.float32, device=self.device)
+        dones = torch.tensor(dones, dtype=torch.float32, device=self.device)
+        return obs, actions, rewards, next_obs, dones
+
+    def state_dict(self):
+        return {"transitions": list(self.buffer)}
+
+    def load_state_dict(self, state):
+        self.buffer.clear()
+        self.buffer.extend(state["transitions"])
+
+
+class ArrayReplayBuffer:
+    # ring buffer over preallocated typed arrays with a write cursor.
+    # push/sample cost does not depend on capacity, and sampled arrays are handed to torch without extra copies
+
+    def __init__(self, capacity, device, obs_shape=None, pin_memory=False):
+        self.capacity = int(capacity)
+        self.device = torch.device(device) if device is not None else torch.device("cpu")
+        # pinned staging only pays off for host -> accelerator copies
+        self.pin_memory = pin_memory and self.device.type != "cpu"
+        self.cursor = 0
+        self.size = 0
+        self.obs = None
+        if obs_shape is not None:
+            self._allocate(tuple(obs_shape))
+
+    def _allocate(self, obs_shape):
+        # storage is created lazily so the observation shape can be taken from the first transition
+        self.obs_shape = obs_shape
+        self.obs = np.zeros((self.capacity, *obs_shape), dtype=np.float32)
+        self.next_obs = np.zeros((self.capacity, *obs_shape), dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+
+    def __len__(self):
+        return self.size
+
+    def push(self, obs, action, reward, next_obs, done):
+        if self.obs is None:
+            self._allocate(np.shape(obs))
+        i = self.cursor
+        self.obs[i] = obs
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_obs[i] = next_obs
+        self.dones[i] = done
+        self.cursor = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def push_batch(self, obs, actions, rewards, next_obs, dones):
+        # vectorized write of n transitions, wrapping around the end of the ring
+        obs = np.asarray(obs, dtype=np.float32)
+        if self.obs is None:
+            self._allocate(obs.shape[1:])
+        n = obs.shape[0]
+        if n > self.capacity:
+            # only the newest `capacity` transitions would survive anyway
+            sl = slice(n - self.capacity, n)
+            return self.push_batch(obs[sl], np.asarray(actions)[sl], np.asarray(rewards)[sl], np.asarray(next_obs)[sl], np.asarray(dones)[sl])
+        idx = (self.cursor + np.arange(n)) % self.capacity
+        self.obs[idx] = obs
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_obs[idx] = next_obs
+        self.dones[idx] = dones
+        self.cursor = int((self.cursor + n) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def sample_indices(self, batch_size):
+        # one vectorized draw (with replacement) instead of random.sample over python objects
+        return np.random.randint(0, self.size, size=batch_size)
+
+    def _to_tensor(self, array):
+        tensor = torch.from_numpy(array)
+        if self.device.type == "cpu":
+            return tensor
+        if self.pin_memory:
+            tensor = tensor.pin_memory()
+        return tensor.to(self.device, non_blocking=self.pin_memory)
+
+    def gather(self, idx):
+        return (
+            self._to_tensor(self.obs[idx]),
+            self._to_tensor(self.actions[idx]),
+            self._to_tensor(self.rewards[idx]),
+            self._to_tensor(self.next_obs[idx]),
+            self._to_tensor(self.dones[idx]),
+        )
+
+    def sample(self, batch_size):
+        return self.gather(self.sample_indices(batch_size))
+
+    def state_dict(self):
+        # copies of the filled part of the ring, safe to serialize from another thread
+        state = {"cursor": self.cursor, "size": self.size}
+        if self.obs is not None:
+            state["obs_shape"] = self.obs_shape
+            for name in ("obs", "next_obs", "actions", "rewards", "dones"):
+                state[name] = getattr(self, name)[: self.size].copy()
+        return state
+
+    def load_state_dict(self, state):
+        if "obs_shape" in state:
+            if self.obs is None:
+                self._allocate(tuple(state["obs_shape"]))
+            size = state["size"]
+            for name in ("obs", "next_obs", "actions", "rewards", "dones"):
+                getattr(self, name)[:size] = state[name]
+        self.cursor = state["cursor"]
+        self.size = state["size"]
@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter, deque
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from profiling.profiler import NULL_PROFILER
+
+
+def load_policy(path, obs_dim=1, action_dim=2):
+    # exported .npz policies need only numpy, anything else is treated as a torch checkpoint
+    if path.endswith(".npz"):
+        from networks.numpy_policy import NumpyPolicy
+        return NumpyPolicy.load(path)
+    from evaluation.stress_test import build_agent_from_checkpoint
+    return build_agent_from_checkpoint(path, obs_dim, action_dim)
+
+
+class PolicyServer:
+    # coalesces concurrent act() calls into micro-batches: a batch closes when it holds
+    # max_batch_size observations or max_wait_ms after its first request arrived, whichever comes first.
+    # every batch is one greedy select_actions() call on the wrapped policy (agent or NumpyPolicy)
+
+    _STOP = object()
+
+    def __init__(self, policy, max_batch_size=64, max_wait_ms=2.0, latency_window=100_000, profiler=NULL_PROFILER):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.policy = policy
+        self.obs_dim = policy.obs_dim
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.profiler = profiler
+
+        self.latencies = deque(maxlen=latency_window)
+        self.batch_sizes = Counter()
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._batch_loop())
+        return self
+
+    async def close(self):
+        # requests already queued are still answered before the loop exits
+        if self._task is not None:
+            await self._queue.put(self._STOP)
+            await self._task
+            self._task = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+    async def act(self, observation):
+        if self._task is None:
+            raise RuntimeError("PolicyServer is not running, call start() first")
+        # validated per request, so one malformed observation cannot fail the rest of its batch
+        obs = np.asarray(observation, dtype=np.float32).reshape(-1)
+        if obs.size < self.obs_dim:
+            raise ValueError(f"observation has {obs.size} values, the policy expects {self.obs_dim}")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((obs[: self.obs_dim], future, time.perf_counter()))
+        return await future
+
+    async def _next_batch(self):
+        # blocks for the first request, then fills the batch until it is full or the deadline passes
+        first = await self._queue.get()
+        if first is self._STOP:
+            return [], True
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _batch_loop(self):
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        observations, futures, arrivals = zip(*batch)
+        try:
+            with self.profiler.phase("forward"):
+                actions = self.policy.select_actions(np.stack(observations), explore=False)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        for future, action in zip(futures, actions):
+            # callers that gave up (cancelled) simply miss their answer
+            if not future.done():
+                future.set_result(int(action))
+        self.latencies.extend(now - t for t in arrivals)
+        self.batch_sizes[len(batch)] += 1
+        self.profiler.count("requests", len(batch))
+        self.profiler.count("batches")
+
+    def stats(self):
+        requests = sum(size * n for size, n in self.batch_sizes.items())
+        batches = sum(self.batch_sizes.values())
+        latencies_ms = 1000.0 * np.asarray(self.latencies) if self.latencies else np.zeros(1)
+        p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "latency_ms": {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(latencies_ms.max())},
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+        }
+
+    def reset_stats(self):
+        self.latencies.clear()
+        self.batch_sizes.clear()
+
+    # --- unix socket transport: newline delimited json ---
+    # request  {"id": any, "obs": [...]}   -> {"id": any, "action": int}
+    # request  {"id": any, "cmd": "stats"} -> {"id": any, "stats": {...}}
+    # requests on one connection may be pipelined, answers carry the request id
+
+    async def serve_unix(self, path):
+        await self.start()
+        if os.path.exists(path):
+            os.unlink(path)
+        return await asyncio.start_unix_server(self._handle_connection, path=path)
+
+    async def _handle_connection(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._answer(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    async def _answer(self, line, writer):
+        request = None
+        try:
+            request = json.loads(line)
+            if request.get("cmd") == "stats":
+                response = {"id": request.get("id"), "stats": self.stats()}
+            else:
+                response = {"id": request.get("id"), "action": await self.act(request["obs"])}
+        except Exception as e:
+            response = {"id": request.get("id") if isinstance(request, dict) else None, "error": repr(e)}
+        writer.write((json.dumps(response) + "\n").encode())
+
+
+class PolicyClient:
+    # minimal asyncio client for PolicyServer.serve_unix, one request in flight at a time
+
+    def __init__(self, path):
+        self.path = path
+        self._reader = None
+        self._writer = None
+        self._next_id = 0
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        return self
+
+    async def _request(self, payload):
+        self._next_id += 1
+        payload["id"] = self._next_id
+        self._writer.write((json.dumps(payload) + "\n").encode())
+        await self._writer.drain()
+        response = json.loads(await self._reader.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def act(self, observation):
+        return (await self._request({"obs": np.asarray(observation, dtype=np.float32).tolist()}))["action"]
+
+    async def stats(self):
+        return (await self._request({"cmd": "stats"}))["stats"]
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+
+async def load_test(server, num_clients=64, requests_per_client=100, obs_dim=1, socket_path=None):
+    # num_clients concurrent callers each issuing requests back to back, in-process or over the socket
+    rng = np.random.default_rng(0)
+    observations = rng.normal(scale=10.0, size=(num_clients, requests_per_client, obs_dim)).astype(np.float32)
+
+    async def in_process(i):
+        for obs in observations[i]:
+            await server.act(obs)
+
+    async def over_socket(i):
+        client = await PolicyClient(socket_path).connect()
+        try:
+            for obs in observations[i]:
+                await client.act(obs)
+        finally:
+            await client.close()
+
+    server.reset_stats()
+    start = time.perf_counter()
+    await asyncio.gather(*((over_socket if socket_path else in_process)(i) for i in range(num_clients)))
+    elapsed = time.perf_counter() - start
+    stats = server.stats()
+    stats["throughput_per_s"] = stats["requests"] / elapsed
+    return stats
+
+
+def _print_stats(label, stats):
+    lat = stats["latency_ms"]
+    print(
+        f"{label:<22}{stats.get('throughput_per_s', 0.0):>12.0f}{stats['mean_batch_size']:>12.1f}"
+        f"{lat['p50']:>10.2f}{lat['p90']:>10.2f}{lat['p99']:>10.2f}"
+    )
+
+
+async def _main(args):
+    policy = load_policy(args.policy)
+    if not args.load_test:
+        server = PolicyServer(policy, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+        unix_server = await server.serve_unix(args.socket)
+        print(f"Serving {args.policy} on {args.socket} (max_batch_size={args.max_batch_size}, max_wait_ms={args.max_wait_ms})")
+        try:
+            async with unix_server:
+                await unix_server.serve_forever()
+        finally:
+            await server.close()
+        return
+
+    print(f"{args.clients} clients x {args.requests} requests ({'unix socket' if args.transport == 'unix' else 'in-process'})")
+    print(f"{'config':<22}{'req/s':>12}{'mean batch':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for label, max_batch_size in (("batch-1", 1), (f"micro-batch {args.max_batch_size}", args.max_batch_size)):
+        server = PolicyServer(policy, max_batch_size=max_batch_size, max_wait_ms=args.max_wait_ms)
+        if args.transport == "unix":
+            unix_server = await server.serve_unix(args.socket)
+            async with unix_server:
+                stats = await load_test(server, args.clients, args.requests, socket_path=args.socket)
+            os.unlink(args.socket)
+        else:
+            async with server:
+                stats = await load_test(server, args.clients, args.requests)
+        await server.close()
+        _print_stats(label, stats)
+    print(f"batch size histogram: {stats['batch_size_histogram']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--policy", type=str, required=True, help="checkpoint (.pt) or exported numpy policy (.npz)")
+    parser.add_argument("--socket", type=str, default="/tmp/sentinelrl_policy.sock", help="unix socket path")
+    parser.add_argument("--max_batch_size", type=int, default=64, help="largest micro-batch per forward")
+    parser.add_argument("--max_wait_ms", type=float, default=2.0, help="longest a request waits for its batch to fill")
+    parser.add_argument("--load_test", action="store_true", help="run a local load test (batch-1 vs micro-batching) instead of serving")
+    parser.add_argument("--transport", type=str, default="inproc", choices=["inproc", "unix"], help="load test transport")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent load test clients")
+    parser.add_argument("--requests", type=int, default=100, help="requests per load test client")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args))
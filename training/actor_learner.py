@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import queue
+from collections import deque
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from environments.clean_env import CleanEnv
+from agents.dqn_agent import DQNAgent
+from networks.q_network import QNetwork
+
+
+def _publish_weights(agent, shared_net, weights_version, lock, updates):
+    # copy learner weights into the shared-memory network; actors pick them up by version
+    with lock, torch.no_grad():
+        for shared, param in zip(shared_net.parameters(), agent.q_net.parameters()):
+            shared.copy_(param)
+        weights_version.value = updates
+
+
+def actor_worker(actor_id, shared_net, weights_version, epsilon, lock, transition_queue, stop_event, max_steps, chunk_size, seed, hidden_dims=(128, 128)):
+    # runs episodes with a local policy copy and ships transitions to the learner in chunks
+    torch.set_num_threads(1)
+    if seed is not None:
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+
+    env = CleanEnv(max_steps=max_steps)
+    obs_dim = env.observation_space.shape[0]
+    action_dim = env.action_space.n
+    # acting only, the replay buffer lives in the learner
+    policy = DQNAgent(obs_dim=obs_dim, action_dim=action_dim, buffer_capacity=1, device="cpu", hidden_dims=hidden_dims)
+    local_version = -1
+
+    chunk = []
+    finished_rewards = []
+    while not stop_event.is_set():
+        obs, _ = env.reset()
+        episode_reward = 0.0
+
+        for _ in range(max_steps):
+            if weights_version.value != local_version:
+                with lock:
+                    policy.q_net.load_state_dict(shared_net.state_dict())
+                    local_version = weights_version.value
+            policy.epsilon = epsilon.value
+
+            action = policy.select_action(obs, explore=True)
+            next_obs, reward, terminated, truncated, _ = env.step(action)
+            chunk.append((obs, action, reward, next_obs, terminated, truncated))
+            obs = next_obs
+            episode_reward += reward
+            if terminated or truncated:
+                break
+
+            if len(chunk) >= chunk_size:
+                _ship(transition_queue, stop_event, actor_id, local_version, chunk, finished_rewards)
+                chunk, finished_rewards = [], []
+
+        finished_rewards.append(float(episode_reward))
+        _ship(transition_queue, stop_event, actor_id, local_version, chunk, finished_rewards)
+        chunk, finished_rewards = [], []
+
+
+def _ship(transition_queue, stop_event, actor_id, version, chunk, finished_rewards):
+    if not chunk and not finished_rewards:
+        return
+    obs, actions, rewards, next_obs, dones, truncated = zip(*chunk) if chunk else ((),) * 6
+    message = (
+        actor_id,
+        version,
+        np.asarray(obs, dtype=np.float32),
+        np.asarray(actions, dtype=np.int64),
+        np.asarray(rewards, dtype=np.float32),
+        np.asarray(next_obs, dtype=np.float32),
+        np.asarray(dones, dtype=np.float32),
+        np.asarray(truncated, dtype=bool),
+        finished_rewards,
+    )
+    # bounded queue: block (with periodic stop checks) when the learner falls behind
+    while not stop_event.is_set():
+        try:
+            transition_queue.put(message, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _poll(transition_queue, timeout=None):
+    try:
+        if timeout is None:
+            return transition_queue.get_nowait()
+        return transition_queue.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+
+def _check_actors(actors):
+    # actors only return once the learner sets the stop event, so any exit before that is a crash.
+    # without this check a learner whose actors died would keep training on stale replay forever
+    for actor_id, p in enumerate(actors):
+        if p.exitcode not in (None, 0):
+            raise RuntimeError(f"actor {actor_id} exited with code {p.exitcode}")
+    return all(p.exitcode is not None for p in actors)
+
+
+def train_actor_learner(agent_type="dqn", num_episodes=500, max_steps=200, log_intervals=20, save_path="models/dqn_checkpoint.pt", buffer_type="array", num_actors=2, sync_interval=100, queue_size=64, chunk_size=32, seed=None, buffer_capacity=100000, buffer_dir=None, prefetch=0, tau=0.0, fused=False, compile_step=False, lr=1e-4, gamma=0.99, epsilon_decay=0.995, target_update_freq=1000, n_step=1, precision="fp32", batch_size=64, hidden_dims=(128, 128)):
+    # imported here to avoid a circular import with training.train
+    from training.train import build_agent, seed_everything
+
+    if seed is not None:
+        seed_everything(seed)
+    env = CleanEnv(max_steps=max_steps)
+    obs_dim = env.observation_space.shape[0]
+    action_dim = env.action_space.n
+    agent = build_agent(
+        agent_type=agent_type, obs_dim=obs_dim, action_dim=action_dim,
+        lr=lr, gamma=gamma, epsilon_decay=epsilon_decay, target_update_freq=target_update_freq,
+        buffer_type=buffer_type, prefetch=prefetch, buffer_capacity=buffer_capacity, buffer_dir=buffer_dir,
+        tau=tau, fused=fused, compile_step=compile_step, n_step=n_step, precision=precision,
+        batch_size=batch_size, hidden_dims=hidden_dims,
+        # episodic replay keeps one sub-ring per actor so each actor's steps stay contiguous
+        replay_streams=num_actors if buffer_type == "episode" else 1,
+    )
+
+    ctx = mp.get_context("spawn")
+    shared_net = QNetwork(obs_dim, action_dim, hidden_dims=agent.hidden_dims)
+    shared_net.share_memory()
+    # single writer (the learner), so the values need no lock of their own
+    weights_version = ctx.Value("q", 0, lock=False)
+    epsilon = ctx.Value("d", agent.epsilon, lock=False)
+    lock = ctx.Lock()
+    transition_queue = ctx.Queue(maxsize=queue_size)
+    stop_event = ctx.Event()
+    _publish_weights(agent, shared_net, weights_version, lock, 0)
+
+    actors = [
+        ctx.Process(
+            target=actor_worker,
+            args=(i, shared_net, weights_version, epsilon, lock, transition_queue, stop_event, max_steps, chunk_size, None if seed is None else seed + 1 + i, agent.hidden_dims),
+            daemon=True,
+        )
+        for i in range(num_actors)
+    ]
+    for p in actors:
+        p.start()
+
+    print(f"STARTING SentinelRL ACTOR-LEARNER TRAINING SEQUENCE ({num_actors} actors)......")
+
+    reward_window = deque(maxlen=100)
+    lag_window = deque(maxlen=1000)
+    episodes = 0
+    next_log = log_intervals
+    env_steps = 0
+    updates = 0
+    learner_busy = 0.0
+    train_info = None
+    start = time.perf_counter()
+
+    try:
+        while episodes < num_episodes:
+            if _check_actors(actors):
+                print("all actors exited, stopping the learner")
+                break
+            # take at most one chunk per actor between updates, the bounded queue throttles the actors.
+            # block briefly only while there is nothing to learn from yet
+            for _ in range(num_actors):
+                if len(agent.replay_buffer) < agent.batch_size:
+                    message = _poll(transition_queue, timeout=1.0)
+                else:
+                    message = _poll(transition_queue)
+                if message is None:
+                    break
+                actor_id, version, obs, actions, rewards, next_obs, dones, truncated, finished_rewards = message
+                if len(actions):
+                    agent.store_transitions(obs, actions, rewards, next_obs, dones, truncated=truncated, streams=np.full(len(actions), actor_id))
+                    env_steps += len(actions)
+                    lag_window.append(updates - version)
+                reward_window.extend(finished_rewards)
+                episodes += len(finished_rewards)
+
+            t0 = time.perf_counter()
+            info = agent.train_step()
+            learner_busy += time.perf_counter() - t0
+            if info is not None:
+                train_info = info
+                updates += 1
+                epsilon.value = agent.epsilon
+                if updates % sync_interval == 0:
+                    _publish_weights(agent, shared_net, weights_version, lock, updates)
+
+            if episodes >= next_log:
+                next_log += log_intervals
+                elapsed = time.perf_counter() - start
+                loss = float(train_info["loss"]) if train_info else None
+                print(
+                    f"Episode {episodes:4d} | "
+                    f"AvgReward {np.mean(reward_window):8.2f} | "
+                    f"Epsilon {agent.epsilon:6.3f} | "
+                    f"Loss {loss if loss is not None else 'n/a'} | "
+                    f"EnvSteps/s {env_steps / elapsed:8.1f} | "
+                    f"Updates/s {updates / elapsed:7.1f} | "
+                    f"ActorLag {np.mean(lag_window) if lag_window else 0.0:6.1f} | "
+                    f"LearnerUtil {learner_busy / elapsed:5.1%}"
+                )
+    finally:
+        stop_event.set()
+        # unblock actors waiting on a full queue before joining
+        while any(p.is_alive() for p in actors):
+            _poll(transition_queue, timeout=0.1)
+        for p in actors:
+            p.join()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{env_steps} env steps, {updates} updates in {elapsed:.1f}s | "
+        f"EnvSteps/s {env_steps / elapsed:.1f} | Updates/s {updates / elapsed:.1f} | "
+        f"mean ActorLag {np.mean(lag_window) if lag_window else 0.0:.1f} updates | "
+        f"LearnerUtil {learner_busy / elapsed:.1%}"
+    )
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    agent.save(save_path)
+    print(f"{agent_type} saved to {save_path}")
+    return agent
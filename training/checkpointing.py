@@ -0,0 +1,63 @@
+import os
+import glob
+import threading
+
+import torch
+
+class CheckpointManager:
+    # periodic full-state checkpoints written from a background thread.
+    # files are written to a temp name and atomically renamed, only the newest `keep_last` are kept
+
+    def __init__(self, directory, keep_last=3, prefix="checkpoint"):
+        self.directory = directory
+        self.keep_last = keep_last
+        self.prefix = prefix
+        os.makedirs(directory, exist_ok=True)
+        self._thread = None
+        self._error = None
+
+    def _path(self, step):
+        return os.path.join(self.directory, f"{self.prefix}_{step:010d}.pt")
+
+    def checkpoints(self):
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}_*.pt")))
+
+    def latest(self):
+        paths = self.checkpoints()
+        return paths[-1] if paths else None
+
+    def save(self, state, step, before_write=None):
+        # `state` must already be a snapshot (no live tensors/arrays), see DQNAgent.training_state.
+        # before_write runs on the writer thread first (e.g. flushing a disk-backed replay buffer)
+        self.wait()
+        self._thread = threading.Thread(target=self._write, args=(state, step, before_write), name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def _write(self, state, step, before_write=None):
+        path = self._path(step)
+        tmp_path = path + ".tmp"
+        try:
+            if before_write is not None:
+                before_write()
+            torch.save(state, tmp_path)
+            os.replace(tmp_path, path)
+            for old in self.checkpoints()[: -self.keep_last]:
+                os.remove(old)
+        except Exception as e:
+            self._error = e
+
+    def wait(self):
+        # block until the in-flight write is on disk and surface its failure, if any
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def load_latest(self, map_location=None):
+        path = self.latest()
+        if path is None:
+            return None
+        # checkpoints hold RNG states and numpy arrays, not only tensors
+        return torch.load(path, map_location=map_location, weights_only=False)
@@ -0,0 +1,308 @@
+import os
+import sys
+import csv
+import time
+import socket
+import argparse
+import numpy as np
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from environments.clean_env import CleanEnv
+from profiling.profiler import Profiler
+
+# data-parallel learner on one machine: world_size processes joined in a gloo process group.
+# every rank steps its own env into its own replay shard, samples batch_size / world_size transitions of the
+# global minibatch from it and all-reduces (averages) the gradients before the optimizer step,
+# so all replicas apply the same update and stay identical
+
+SCALING_COLUMNS = ("world_size", "mode", "rank_batch", "global_batch", "seconds_per_update", "samples_per_s", "speedup", "efficiency", "allreduce_share")
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class GradientAllReduce:
+    # averages the gradients of every rank with one all-reduce of a flat buffer per update (agent.grad_sync hook)
+    def __init__(self, params, world_size):
+        self.world_size = world_size
+        self.sizes = [p.numel() for p in params]
+        self.flat = torch.empty(sum(self.sizes), dtype=params[0].dtype, device=params[0].device)
+
+    def __call__(self, params):
+        grads = [p.grad for p in params]
+        torch.cat([g.reshape(-1) for g in grads], out=self.flat)
+        dist.all_reduce(self.flat)
+        self.flat.div_(self.world_size)
+        torch._foreach_copy_(grads, [chunk.view_as(g) for chunk, g in zip(torch.split(self.flat, self.sizes), grads)])
+
+
+def broadcast_parameters(agent, src=0):
+    # online and target weights of rank `src` on every rank
+    with torch.no_grad():
+        for param in agent._online_params + agent._target_params:
+            dist.broadcast(param, src=src)
+
+
+def replica_divergence(agent):
+    # largest weight difference to rank 0 over all ranks and the spread of epsilon, both 0 when the replicas agree
+    with torch.no_grad():
+        local = torch.cat([p.detach().reshape(-1) for p in agent._online_params + agent._target_params])
+        reference = local.clone()
+        dist.broadcast(reference, src=0)
+        stats = torch.tensor([(local - reference).abs().max().item(), agent.epsilon, -agent.epsilon], dtype=torch.float64)
+    dist.all_reduce(stats, op=dist.ReduceOp.MAX)
+    return float(stats[0]), float(stats[1] + stats[2])
+
+
+def _init_rank(rank, world_size, port, torch_threads):
+    torch.set_num_threads(torch_threads)
+    dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{port}", rank=rank, world_size=world_size)
+
+
+def _build_rank_agent(rank, world_size, agent_type, obs_dim, action_dim, batch_size, **agent_kwargs):
+    # imported here to avoid a circular import with training.train
+    from training.train import build_agent
+
+    agent = build_agent(agent_type=agent_type, obs_dim=obs_dim, action_dim=action_dim, batch_size=batch_size // world_size, **agent_kwargs)
+    # same starting weights everywhere, then identical averaged updates
+    broadcast_parameters(agent)
+    if world_size > 1:
+        agent.grad_sync = GradientAllReduce(agent._online_params, world_size)
+    return agent
+
+
+def _train_rank(rank, world_size, port, config, results):
+    _init_rank(rank, world_size, port, config["torch_threads"])
+    try:
+        from training.train import seed_everything
+
+        if config["seed"] is not None:
+            # different env / exploration randomness per rank, the weights come from rank 0
+            seed_everything(config["seed"] + rank)
+        max_steps = config["max_steps"]
+        env = CleanEnv(max_steps=max_steps)
+        buffer_dir = config["buffer_dir"]
+        agent = _build_rank_agent(
+            rank, world_size, config["agent_type"], env.observation_space.shape[0], env.action_space.n, config["batch_size"],
+            lr=config["lr"], gamma=config["gamma"], epsilon_decay=config["epsilon_decay"], target_update_freq=config["target_update_freq"],
+            tau=config["tau"], buffer_type=config["buffer_type"], buffer_capacity=config["buffer_capacity"],
+            buffer_dir=os.path.join(buffer_dir, f"rank{rank}") if buffer_dir else None,
+            hidden_dims=config["hidden_dims"], fused=config["fused"], n_step=config["n_step"], precision=config["precision"],
+            prefetch=config["prefetch"], compile_step=config["compile_step"],
+        )
+        prof = Profiler(enabled=True)
+        agent.profiler = prof
+
+        if rank == 0:
+            print(f"STARTING SentinelRL DATA-PARALLEL TRAINING SEQUENCE ({world_size} ranks, {agent.batch_size} samples per rank)......")
+
+        # every rank writes one transition and runs at most one update per iteration, so all ranks start
+        # learning on the same iteration and call the gradient all-reduce the same number of times
+        obs, _ = env.reset()
+        episode_reward = 0.0
+        finished, finished_reward = 0, 0.0
+        episodes, steps, updates = 0, 0, 0
+        # global episode count / reward sum since the last log line
+        window = torch.zeros(2, dtype=torch.float64)
+        next_log = config["log_intervals"]
+        train_info = None
+        start = time.perf_counter()
+        while True:
+            action = agent.select_action(obs, explore=True)
+            next_obs, reward, terminated, truncated, _ = env.step(action)
+            agent.store_transition(obs, action, reward, next_obs, terminated, truncated=truncated)
+            info = agent.train_step()
+            if info is not None:
+                train_info = info
+                updates += 1
+                if updates % config["target_update_freq"] == 0:
+                    # averaged gradients keep the replicas identical, re-anchoring on rank 0 at every
+                    # target sync bounds any floating point drift between them
+                    broadcast_parameters(agent)
+            obs = next_obs
+            episode_reward += reward
+            steps += 1
+            if terminated or truncated:
+                finished += 1
+                finished_reward += episode_reward
+                episode_reward = 0.0
+                obs, _ = env.reset()
+
+            if steps % config["stats_interval"] == 0:
+                # episode counts of all ranks, every rank takes the same stop decision
+                stats = torch.tensor([finished, finished_reward], dtype=torch.float64)
+                dist.all_reduce(stats)
+                episodes += int(stats[0])
+                window += stats
+                finished, finished_reward = 0, 0.0
+                if rank == 0 and episodes >= next_log:
+                    next_log += config["log_intervals"]
+                    elapsed = time.perf_counter() - start
+                    loss = float(train_info["loss"]) if train_info else None
+                    print(
+                        f"Episode {episodes:4d} | "
+                        f"AvgReward {float(window[1] / window[0]):8.2f} | "
+                        f"Epsilon {agent.epsilon:6.3f} | "
+                        f"Loss {loss if loss is not None else 'n/a'} | "
+                        f"EnvSteps/s {world_size * steps / elapsed:9.1f} | "
+                        f"Updates/s {updates / elapsed:7.1f}"
+                    )
+                    window.zero_()
+                if episodes >= config["num_episodes"]:
+                    break
+
+        elapsed = time.perf_counter() - start
+        agent.disable_prefetch()
+        divergence, epsilon_spread = replica_divergence(agent)
+        if rank == 0:
+            backward = prof.totals["backward"] + prof.totals["allreduce"]
+            print(
+                f"{world_size * steps} env steps, {updates} updates in {elapsed:.1f}s | "
+                f"Updates/s {updates / elapsed:.1f} | Samples/s {updates * agent.batch_size * world_size / elapsed:.1f} | "
+                f"AllReduce {prof.totals['allreduce'] / backward if backward else 0.0:5.1%} of backward | "
+                f"replica divergence {divergence:.2e}, epsilon spread {epsilon_spread:.2e}"
+            )
+            save_path = config["save_path"]
+            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+            agent.save(save_path)
+            print(f"{config['agent_type']} saved to {save_path}")
+            if results is not None:
+                results.put({"episodes": episodes, "updates": updates, "seconds": elapsed, "divergence": divergence, "epsilon_spread": epsilon_spread})
+    finally:
+        dist.destroy_process_group()
+
+
+def train_distributed(agent_type="dqn", num_episodes=500, max_steps=200, log_intervals=20, save_path="models/dqn_checkpoint.pt", world_size=2, buffer_type="array", buffer_capacity=100000, buffer_dir=None, batch_size=64, hidden_dims=(128, 128), seed=None, lr=1e-4, gamma=0.99, epsilon_decay=0.995, target_update_freq=1000, tau=0.0, fused=False, n_step=1, precision="fp32", torch_threads=1, stats_interval=50, prefetch=0, compile_step=False):
+    # batch_size is the global minibatch, split evenly over the ranks
+    if batch_size % world_size:
+        raise ValueError(f"batch_size {batch_size} is not divisible by world_size {world_size}")
+    config = {
+        "agent_type": agent_type, "num_episodes": num_episodes, "max_steps": max_steps, "log_intervals": log_intervals,
+        "save_path": save_path, "buffer_type": buffer_type, "buffer_capacity": buffer_capacity, "buffer_dir": buffer_dir,
+        "batch_size": batch_size, "hidden_dims": tuple(hidden_dims), "seed": seed, "lr": lr, "gamma": gamma,
+        "epsilon_decay": epsilon_decay, "target_update_freq": target_update_freq, "tau": tau, "fused": fused,
+        "n_step": n_step, "precision": precision, "torch_threads": torch_threads, "stats_interval": stats_interval,
+        "prefetch": prefetch, "compile_step": compile_step,
+    }
+    ctx = mp.get_context("spawn")
+    results = ctx.SimpleQueue()
+    mp.start_processes(_train_rank, args=(world_size, free_port(), config, results), nprocs=world_size, start_method="spawn")
+    return results.get()
+
+
+def _benchmark_rank(rank, world_size, port, config, results):
+    _init_rank(rank, world_size, port, config["torch_threads"])
+    try:
+        torch.manual_seed(rank)
+        rng = np.random.default_rng(rank)
+        env = CleanEnv()
+        obs_dim = env.observation_space.shape[0]
+        action_dim = env.action_space.n
+        agent = _build_rank_agent(
+            rank, world_size, config["agent_type"], obs_dim, action_dim, config["rank_batch"] * world_size,
+            buffer_type="array", buffer_capacity=config["fill"], hidden_dims=config["hidden_dims"], fused=config["fused"],
+            # keep the target fixed: the benchmark times gradient updates only
+            target_update_freq=10 ** 9,
+        )
+        # learner throughput only: the shard is filled once with random positions of the env's range
+        obs = rng.uniform(-max(env.max_steps, 1), max(env.max_steps, 1), size=(config["fill"], obs_dim)).astype(np.float32)
+        actions = rng.integers(action_dim, size=config["fill"])
+        agent.store_transitions(obs, actions, -np.ones(config["fill"], dtype=np.float32), obs + 1.0, np.zeros(config["fill"], dtype=np.float32))
+
+        for _ in range(config["warmup"]):
+            agent.train_step()
+        prof = Profiler(enabled=True)
+        agent.profiler = prof
+        dist.barrier()
+        start = time.perf_counter()
+        for _ in range(config["updates"]):
+            agent.train_step()
+        dist.barrier()
+        elapsed = time.perf_counter() - start
+        if rank == 0:
+            results.put({"seconds": elapsed, "allreduce": prof.totals["allreduce"]})
+    finally:
+        dist.destroy_process_group()
+
+
+def scaling_efficiency(world_sizes=(1, 2, 4), mode="strong", batch_size=256, hidden_dims=(512, 512), updates=200, warmup=20, agent_type="dqn", torch_threads=1, fused=False):
+    # learner throughput from 1 to N ranks on this machine.
+    # strong: the global minibatch stays batch_size and is split over the ranks. weak: every rank samples batch_size.
+    # efficiency = samples/s at N ranks / (N * samples/s at 1 rank), 1.0 is linear scaling
+    if mode not in ("strong", "weak"):
+        raise ValueError(f"Unknown scaling mode : {mode}")
+    ctx = mp.get_context("spawn")
+    rows = []
+    baseline = None
+    for world_size in world_sizes:
+        rank_batch = batch_size // world_size if mode == "strong" else batch_size
+        if rank_batch < 1:
+            raise ValueError(f"batch_size {batch_size} is too small for {world_size} ranks")
+        config = {
+            "agent_type": agent_type, "rank_batch": rank_batch, "hidden_dims": tuple(hidden_dims), "fill": max(4 * rank_batch, 1024),
+            "updates": updates, "warmup": warmup, "torch_threads": torch_threads, "fused": fused,
+        }
+        results = ctx.SimpleQueue()
+        mp.start_processes(_benchmark_rank, args=(world_size, free_port(), config, results), nprocs=world_size, start_method="spawn")
+        result = results.get()
+        samples_per_s = updates * rank_batch * world_size / result["seconds"]
+        if baseline is None:
+            # per-rank throughput of the first (smallest) world size is the reference
+            baseline = samples_per_s / world_size
+        rows.append({
+            "world_size": world_size,
+            "mode": mode,
+            "rank_batch": rank_batch,
+            "global_batch": rank_batch * world_size,
+            "seconds_per_update": result["seconds"] / updates,
+            "samples_per_s": samples_per_s,
+            "speedup": samples_per_s / (baseline * world_sizes[0]),
+            "efficiency": samples_per_s / (baseline * world_size),
+            "allreduce_share": result["allreduce"] / result["seconds"],
+        })
+    return rows
+
+
+def print_scaling(rows):
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"{'ranks':>6}{'rank batch':>12}{'global':>8}{'ms/update':>11}{'samples/s':>12}{'speedup':>9}{'efficiency':>12}{'allreduce':>11}")
+    for r in rows:
+        print(
+            f"{r['world_size']:>6}{r['rank_batch']:>12}{r['global_batch']:>8}{1000 * r['seconds_per_update']:>11.2f}"
+            f"{r['samples_per_s']:>12.0f}{r['speedup']:>9.2f}{r['efficiency']:>12.1%}{r['allreduce_share']:>11.1%}"
+        )
+    if rows and max(r["world_size"] for r in rows) > cores:
+        print(f"note: more ranks than the {cores} available cores, the extra ranks time-share them")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--world_sizes", type=int, nargs="+", default=[1, 2, 4], help="rank counts to measure")
+    parser.add_argument("--mode", type=str, default="strong", choices=["strong", "weak"], help="strong: fixed global batch split over ranks, weak: fixed batch per rank")
+    parser.add_argument("--batch_size", type=int, default=256, help="global (strong) or per-rank (weak) minibatch")
+    parser.add_argument("--hidden_dims", type=int, nargs="+", default=[512, 512])
+    parser.add_argument("--updates", type=int, default=200, help="timed updates per world size")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--agent", type=str, default="dqn", choices=["dqn", "double_dqn"])
+    parser.add_argument("--torch_threads", type=int, default=1, help="torch threads per rank")
+    parser.add_argument("--fused", action="store_true")
+    parser.add_argument("--out", type=str, default="results/distributed_scaling.csv")
+    args = parser.parse_args()
+
+    rows = scaling_efficiency(world_sizes=args.world_sizes, mode=args.mode, batch_size=args.batch_size, hidden_dims=args.hidden_dims, updates=args.updates, warmup=args.warmup, agent_type=args.agent, torch_threads=args.torch_threads, fused=args.fused)
+    print_scaling(rows)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SCALING_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Scaling table written to {args.out}")
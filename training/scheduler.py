@@ -0,0 +1,295 @@
+import os
+import sys
+import csv
+import json
+import math
+import time
+import argparse
+import itertools
+import contextlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+SEARCH_KEYS = ("agent_type", "lr", "gamma", "epsilon_decay", "target_update_freq", "tau")
+
+
+def build_configs(agent_types=("dqn",), lr=(1e-4,), gamma=(0.99,), epsilon_decay=(0.995,), target_update_freq=(1000,), tau=(0.0,)):
+    # full cartesian product of the hyperparameter values, one dict per configuration
+    return [
+        {"config_id": f"c{i:03d}", **dict(zip(SEARCH_KEYS, values))}
+        for i, values in enumerate(itertools.product(agent_types, lr, gamma, epsilon_decay, target_update_freq, tau))
+    ]
+
+
+def config_label(config):
+    return " ".join(f"{k}={config[k]}" for k in SEARCH_KEYS)
+
+
+def rung_budgets(min_episodes, max_episodes, eta):
+    # cumulative episode budgets min, min*eta, min*eta^2, ... capped at max_episodes.
+    # every rung is a multiple of min_episodes, so the checkpoint written at the end of a rung is where the next one resumes
+    budgets = []
+    budget = min_episodes
+    while budget < max_episodes:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_episodes)
+    return budgets
+
+
+def cpu_sets(num_workers, torch_threads):
+    # disjoint (wrapping when there are more threads than cores) cpu sets, one per worker
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    return [{cpus[(w * torch_threads + j) % len(cpus)] for j in range(torch_threads)} for w in range(num_workers)]
+
+
+def _init_worker(torch_threads, cpu_queue):
+    # cap intra-op threads and pin the worker so concurrent runs do not fight over the same cores
+    import torch
+    torch.set_num_threads(torch_threads)
+    if cpu_queue is not None:
+        os.sched_setaffinity(0, cpu_queue.get())
+
+
+def _run_dir(out_dir, run):
+    return os.path.join(out_dir, "runs", run["run_id"])
+
+
+def _train_segment(run, budget, out_dir, checkpoint_every, score_window, buffer_type, max_steps):
+    # trains `run` up to `budget` total episodes, resuming from the checkpoint its previous rung left behind
+    from training.train import train
+
+    run_dir = _run_dir(out_dir, run)
+    os.makedirs(run_dir, exist_ok=True)
+    start = time.perf_counter()
+    with open(os.path.join(run_dir, "train.log"), "a") as log, contextlib.redirect_stdout(log):
+        rewards = train(
+            agent_type=run["agent_type"],
+            num_episodes=budget,
+            max_steps=max_steps,
+            log_intervals=checkpoint_every,
+            # the agent type in the file name lets build_agent_from_checkpoint pick the right class
+            save_path=os.path.join(run_dir, f"{run['agent_type']}.pt"),
+            buffer_type=buffer_type,
+            seed=run["seed"],
+            checkpoint_dir=os.path.join(run_dir, "checkpoints"),
+            checkpoint_every=checkpoint_every,
+            keep_checkpoints=1,
+            resume=True,
+            lr=run["lr"],
+            gamma=run["gamma"],
+            epsilon_decay=run["epsilon_decay"],
+            target_update_freq=run["target_update_freq"],
+            tau=run["tau"],
+        )
+
+    # the learning curve grows rung by rung
+    curve_path = os.path.join(run_dir, "curve.json")
+    curve = []
+    if os.path.exists(curve_path):
+        with open(curve_path) as f:
+            curve = json.load(f)
+    curve.extend(rewards)
+    with open(curve_path, "w") as f:
+        json.dump(curve, f)
+
+    return {
+        "run_id": run["run_id"],
+        "episodes": len(curve),
+        "score": float(np.mean(curve[-score_window:])),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _stress_run(run, out_dir, target_drifts, num_episodes, cache_dir):
+    from environments.clean_env import CleanEnv
+    from evaluation.stress_test import build_agent_from_checkpoint, drift_metrics
+    from evaluation.result_cache import ResultCache
+
+    env = CleanEnv()
+    path = os.path.join(_run_dir(out_dir, run), f"{run['agent_type']}.pt")
+    agent = build_agent_from_checkpoint(path, env.observation_space.shape[0], env.action_space.n)
+    cache = ResultCache(cache_dir) if cache_dir else None
+    return [
+        {"run_id": run["run_id"], "target_drift": t, **drift_metrics(agent, num_episodes=num_episodes, target_drift=t, cache=cache)}
+        for t in target_drifts
+    ]
+
+
+def successive_halving(configs, seeds, out_dir="results/scheduler", min_episodes=20, max_episodes=160, eta=2, num_workers=None, torch_threads=1, pin_cpus=True, score_window=20, buffer_type="array", max_steps=200, stress_target_drifts=(0.0,), stress_episodes=50, cache_dir="results/cache"):
+    # every (config, seed) run trains to the first rung; after each rung only the best 1/eta of the
+    # configurations (mean score over seeds) continue to the next, larger budget
+    if eta < 2 or int(eta) != eta:
+        raise ValueError("eta must be an integer >= 2")
+    num_workers = num_workers or os.cpu_count() or 1
+    budgets = rung_budgets(min_episodes, max_episodes, eta)
+    runs = {
+        f"{config['config_id']}_s{seed}": {**config, "seed": seed, "run_id": f"{config['config_id']}_s{seed}"}
+        for config in configs for seed in seeds
+    }
+    status = {run_id: {"episodes": 0, "score": None, "pruned_at": None, "rung_scores": []} for run_id in runs}
+    alive = [config["config_id"] for config in configs]
+    os.makedirs(out_dir, exist_ok=True)
+
+    ctx = mp.get_context("spawn")
+    cpu_queue = None
+    sets = cpu_sets(num_workers, torch_threads) if pin_cpus else None
+    if sets is not None:
+        cpu_queue = ctx.Queue()
+        for cpus in sets:
+            cpu_queue.put(cpus)
+
+    start = time.perf_counter()
+    stress_rows = []
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx, initializer=_init_worker, initargs=(torch_threads, cpu_queue)) as pool:
+        for rung, budget in enumerate(budgets):
+            active = [run for run in runs.values() if run["config_id"] in alive]
+            print(f"rung {rung}: {len(alive)} configs x {len(seeds)} seeds -> {budget} episodes")
+            futures = [pool.submit(_train_segment, run, budget, out_dir, min_episodes, score_window, buffer_type, max_steps) for run in active]
+            for future in as_completed(futures):
+                result = future.result()
+                s = status[result["run_id"]]
+                s["episodes"] = result["episodes"]
+                s["score"] = result["score"]
+                s["rung_scores"].append(result["score"])
+                print(f"  {result['run_id']:<12} episodes {result['episodes']:5d} | score {result['score']:9.2f} | {result['seconds']:6.1f}s")
+
+            config_scores = {
+                config_id: float(np.mean([status[r["run_id"]]["score"] for r in active if r["config_id"] == config_id]))
+                for config_id in alive
+            }
+            if rung == len(budgets) - 1:
+                break
+            keep = max(1, math.ceil(len(alive) / eta))
+            ranked = sorted(alive, key=lambda c: config_scores[c], reverse=True)
+            for config_id in ranked[keep:]:
+                for run in active:
+                    if run["config_id"] == config_id:
+                        status[run["run_id"]]["pruned_at"] = budget
+            alive = ranked[:keep]
+
+        # final stress test of the surviving runs
+        survivors = [run for run in runs.values() if run["config_id"] in alive]
+        futures = [pool.submit(_stress_run, run, out_dir, stress_target_drifts, stress_episodes, cache_dir) for run in survivors]
+        for future in as_completed(futures):
+            stress_rows.extend(future.result())
+
+    total_episodes = sum(s["episodes"] for s in status.values())
+    full_episodes = len(runs) * max_episodes
+    print(f"search finished in {time.perf_counter() - start:.1f}s | {total_episodes} episodes trained ({total_episodes / full_episodes:.0%} of running every config to completion)")
+    return write_report(out_dir, configs, runs, status, stress_rows, alive)
+
+
+def _load_curve(out_dir, run):
+    with open(os.path.join(_run_dir(out_dir, run), "curve.json")) as f:
+        return json.load(f)
+
+
+def write_report(out_dir, configs, runs, status, stress_rows, survivors):
+    # runs.csv: one row per run, stress.csv: one row per surviving run and drift setting,
+    # report.json: everything including learning curves, learning_curves.png: mean curve per config
+    run_rows = [
+        {**{k: run[k] for k in ("run_id", "config_id", *SEARCH_KEYS, "seed")},
+         "episodes": status[run_id]["episodes"],
+         "score": status[run_id]["score"],
+         "pruned_at": status[run_id]["pruned_at"] or "",
+         "rung_scores": " ".join(f"{v:.2f}" for v in status[run_id]["rung_scores"])}
+        for run_id, run in runs.items()
+    ]
+    _write_csv(os.path.join(out_dir, "runs.csv"), run_rows)
+    if stress_rows:
+        _write_csv(os.path.join(out_dir, "stress.csv"), sorted(stress_rows, key=lambda r: (r["run_id"], r["target_drift"])))
+
+    curves = {run_id: _load_curve(out_dir, run) for run_id, run in runs.items()}
+    report = {
+        "survivors": survivors,
+        "configs": configs,
+        "runs": run_rows,
+        "stress": stress_rows,
+        "curves": curves,
+    }
+    with open(os.path.join(out_dir, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    plot_learning_curves(configs, runs, curves, survivors, os.path.join(out_dir, "learning_curves.png"))
+
+    print(f"{'config':<8}{'episodes':>10}{'score':>12}{'drifted_mean':>14}  hyperparameters")
+    for config in configs:
+        config_runs = [r for r in run_rows if r["config_id"] == config["config_id"]]
+        drifted = [row["drifted_mean"] for row in stress_rows if row["run_id"].startswith(config["config_id"] + "_")]
+        drifted_text = f"{np.mean(drifted):14.2f}" if drifted else f"{'pruned':>14}"
+        print(
+            f"{config['config_id']:<8}{config_runs[0]['episodes']:>10d}{np.mean([r['score'] for r in config_runs]):>12.2f}"
+            f"{drifted_text}  {config_label(config)}"
+        )
+    print(f"Report written to {out_dir}")
+    return report
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot_learning_curves(configs, runs, curves, survivors, path, smooth=10):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(9, 5))
+    for config in configs:
+        config_curves = [curves[run_id] for run_id, run in runs.items() if run["config_id"] == config["config_id"]]
+        # seeds of one config always share a budget, so their curves have equal length
+        mean_curve = np.mean(config_curves, axis=0)
+        if len(mean_curve) >= smooth:
+            mean_curve = np.convolve(mean_curve, np.ones(smooth) / smooth, mode="valid")
+        style = "-" if config["config_id"] in survivors else ":"
+        plt.plot(np.arange(len(mean_curve)) + 1, mean_curve, style, label=config["config_id"])
+    plt.xlabel("Episode")
+    plt.ylabel(f"Episode Reward (mean over seeds, {smooth}-episode average)")
+    plt.title("Successive halving learning curves (dotted = pruned)")
+    plt.legend(fontsize="small", ncol=2)
+    plt.savefig(path)
+    plt.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=str, nargs="+", default=["dqn"], choices=["dqn", "double_dqn"], help="agent types to search over")
+    parser.add_argument("--lr", type=float, nargs="+", default=[1e-4], help="learning rates")
+    parser.add_argument("--gamma", type=float, nargs="+", default=[0.99], help="discount factors")
+    parser.add_argument("--epsilon_decay", type=float, nargs="+", default=[0.995], help="epsilon decay values")
+    parser.add_argument("--target_update_freq", type=int, nargs="+", default=[1000], help="target sync intervals")
+    parser.add_argument("--tau", type=float, nargs="+", default=[0.0], help="Polyak coefficients (0 = hard sync)")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2], help="seeds per configuration")
+    parser.add_argument("--min_episodes", type=int, default=20, help="episode budget of the first rung")
+    parser.add_argument("--max_episodes", type=int, default=160, help="episode budget of the final rung")
+    parser.add_argument("--eta", type=int, default=2, help="budget growth and pruning factor per rung")
+    parser.add_argument("--score_window", type=int, default=20, help="episodes averaged into a run's score")
+    parser.add_argument("--buffer", type=str, default="array", choices=["deque", "array", "prioritized"], help="replay buffer backend")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: cpu count)")
+    parser.add_argument("--torch_threads", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--no_affinity", action="store_true", help="do not pin workers to cpu cores")
+    parser.add_argument("--stress_target_drift", type=float, nargs="+", default=[0.0, 0.2], help="drift settings of the final stress test")
+    parser.add_argument("--stress_episodes", type=int, default=50, help="evaluation episodes per stress setting")
+    parser.add_argument("--out_dir", type=str, default="results/scheduler", help="run directories and report")
+    args = parser.parse_args()
+
+    configs = build_configs(args.agents, args.lr, args.gamma, args.epsilon_decay, args.target_update_freq, args.tau)
+    successive_halving(
+        configs, args.seeds, out_dir=args.out_dir,
+        min_episodes=args.min_episodes, max_episodes=args.max_episodes, eta=args.eta,
+        num_workers=args.workers, torch_threads=args.torch_threads, pin_cpus=not args.no_affinity,
+        score_window=args.score_window, buffer_type=args.buffer,
+        stress_target_drifts=args.stress_target_drift, stress_episodes=args.stress_episodes,
+    )
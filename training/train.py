@@ -1,73 +1,240 @@
-import numpy as np
-from collections import deque
-import torch
-import os
-import sys
-import argparse
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
-
-from environments.clean_env import CleanEnv
-from agents.dqn_agent import DQNAgent
-from agents.double_dqn_agent import DoubleDQNAgent
-
-def build_agent(agent_type, obs_dim, action_dim):
-    if agent_type == "dqn":
-        return DQNAgent(obs_dim=obs_dim, action_dim=action_dim)
-    elif agent_type == "double_dqn":
-        return DoubleDQNAgent(obs_dim=obs_dim, action_dim=action_dim)
-    else:
-        raise ValueError(f"Unknown agent type : {agent_type}")
-
-def train(agent_type="dqn", num_episodes=500, max_steps=200, log_intervals=20, save_path="models/dqn_checkpoint.pt"):
-    env = CleanEnv(max_steps=max_steps)
-    obs_dim = env.observation_space.shape[0]
-    action_dim = env.action_space.n
-
-    agent = build_agent(agent_type=agent_type, obs_dim=obs_dim, action_dim=action_dim)
-    reward_window = deque(maxlen=100)
-
-    print("STARTING SentinelRL TRAINING SEQUENCE......")
-
-    for episode in range(1, num_episodes+1):
-        obs, _ = env.reset()
-        episode_reward=0.0
-
-        for _ in range(max_steps):
-            action = agent.select_action(obs, explore=True)
-            next_obs, reward, terminated, truncated, _ = env.step(action)
-
-            agent.store_transition(obs, action, reward, next_obs, terminated)
-            train_info = agent.train_step()
-
-            obs = next_obs
-            episode_reward+=reward
-
-            if terminated or truncated:
-                break
-        
-        reward_window.append(episode_reward)
-
-        if episode%log_intervals == 0:
-            avg_reward = np.mean(reward_window)
-            eps = agent.epsilon
-            loss = train_info["loss"] if train_info else None
-
-            print(
-                f"Episode {episode:4d} | "
-                f"AvgReward {avg_reward:8.2f} | "
-                f"Epsilon {eps:6.3f} | "
-                f"Loss {loss if loss is not None else 'n/a'}"
-            )
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    agent.save(save_path)
-    print(f"{agent_type} saved to {save_path}")
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--agent", type=str, default="dqn", choices=["dqn", "double_dqn"], help="Agent type to train")
-    parser.add_argument("--episodes", type=int, default=500)
-    args = parser.parse_args()
-    train(agent_type=args.agent, num_episodes=args.episodes,)
+import numpy as np
+from collections import deque
+import torch
+import random
+import os
+import sys
+import time
+import functools
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+from environments.clean_env import CleanEnv
+from environments.vector_env import VectorCleanEnv
+from environments.env_pool import EnvPool
+from agents.dqn_agent import DQNAgent
+from agents.double_dqn_agent import DoubleDQNAgent
+from training.checkpointing import CheckpointManager
+from profiling.profiler import Profiler
+
+def build_agent(agent_type, obs_dim, action_dim, **agent_kwargs):
+    if agent_type == "dqn":
+        return DQNAgent(obs_dim=obs_dim, action_dim=action_dim, **agent_kwargs)
+    elif agent_type == "double_dqn":
+        return DoubleDQNAgent(obs_dim=obs_dim, action_dim=action_dim, **agent_kwargs)
+    else:
+        raise ValueError(f"Unknown agent type : {agent_type}")
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+def train(agent_type="dqn", num_episodes=500, max_steps=200, log_intervals=20, save_path="models/dqn_checkpoint.pt", buffer_type="deque", prefetch=0, buffer_capacity=100000, buffer_dir=None, seed=None, checkpoint_dir=None, checkpoint_every=0, keep_checkpoints=3, resume=False, profile=False, profile_dir="results/profile", tau=0.0, fused=False, compile_step=False, lr=1e-4, gamma=0.99, epsilon_decay=0.995, target_update_freq=1000, n_step=1, precision="fp32", batch_size=64, hidden_dims=(128, 128)):
+    if seed is not None:
+        seed_everything(seed)
+
+    env = CleanEnv(max_steps=max_steps)
+    obs_dim = env.observation_space.shape[0]
+    action_dim = env.action_space.n
+
+    agent = build_agent(
+        agent_type=agent_type, obs_dim=obs_dim, action_dim=action_dim,
+        lr=lr, gamma=gamma, epsilon_decay=epsilon_decay, target_update_freq=target_update_freq,
+        buffer_type=buffer_type, prefetch=prefetch, buffer_capacity=buffer_capacity, buffer_dir=buffer_dir,
+        tau=tau, fused=fused, compile_step=compile_step, n_step=n_step, precision=precision,
+        batch_size=batch_size, hidden_dims=hidden_dims,
+    )
+    reward_window = deque(maxlen=100)
+    # rewards of the episodes run by this call (after any resume point), returned as the learning curve
+    episode_rewards = []
+    start_episode = 1
+    train_info = None
+
+    checkpoints = CheckpointManager(checkpoint_dir, keep_last=keep_checkpoints) if checkpoint_dir else None
+    if resume:
+        if checkpoints is None:
+            raise ValueError("resume requires checkpoint_dir")
+        state = checkpoints.load_latest(map_location=agent.device)
+        if state is not None:
+            agent.load_training_state(state["agent"])
+            reward_window.extend(state["reward_window"])
+            train_info = state["train_info"]
+            start_episode = state["episode"] + 1
+            print(f"Resumed from {checkpoints.latest()} (episode {state['episode']})")
+
+    prof = Profiler(enabled=profile)
+    agent.profiler = prof
+
+    print("STARTING SentinelRL TRAINING SEQUENCE......")
+
+    for episode in range(start_episode, num_episodes+1):
+        with prof.phase("env_reset"):
+            obs, _ = env.reset()
+        episode_reward=0.0
+
+        for _ in range(max_steps):
+            with prof.phase("select_action"):
+                action = agent.select_action(obs, explore=True)
+            with prof.phase("env_step"):
+                next_obs, reward, terminated, truncated, _ = env.step(action)
+            prof.count("env_steps")
+
+            with prof.phase("store_transition"):
+                agent.store_transition(obs, action, reward, next_obs, terminated, truncated=truncated)
+            with prof.phase("train_step"):
+                train_info = agent.train_step()
+
+            obs = next_obs
+            episode_reward+=reward
+
+            if terminated or truncated:
+                break
+        
+        reward_window.append(episode_reward)
+        episode_rewards.append(float(episode_reward))
+
+        if episode%log_intervals == 0:
+            avg_reward = np.mean(reward_window)
+            eps = agent.epsilon
+            # train_step hands back the loss tensor, it is only materialized here at logging time
+            loss = float(train_info["loss"]) if train_info else None
+
+            print(
+                f"Episode {episode:4d} | "
+                f"AvgReward {avg_reward:8.2f} | "
+                f"Epsilon {eps:6.3f} | "
+                f"Loss {loss if loss is not None else 'n/a'}"
+            )
+            if profile:
+                prof.write_jsonl(os.path.join(profile_dir, "train_profile.jsonl"), episode=episode, avg_reward=float(avg_reward))
+
+        if checkpoints is not None and checkpoint_every and episode%checkpoint_every == 0:
+            # snapshot is taken here, the write happens in the background while training continues
+            agent_state = agent.training_state()
+            # disk-backed replay is flushed by the writer thread too, not by the training loop
+            flush = getattr(agent.replay_buffer, "flush", None)
+            checkpoints.save({
+                "agent": agent_state,
+                "agent_type": agent_type,
+                "episode": episode,
+                "reward_window": list(reward_window),
+                "train_info": train_info,
+            }, step=episode, before_write=functools.partial(flush, agent_state["replay_buffer"]) if flush else None)
+
+    if checkpoints is not None:
+        checkpoints.wait()
+    if profile:
+        prof.write_csv(os.path.join(profile_dir, "train_profile.csv"))
+        print(prof.summary())
+    agent.disable_prefetch()
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    agent.save(save_path)
+    print(f"{agent_type} saved to {save_path}")
+    return episode_rewards
+
+def train_vectorized(agent_type="dqn", num_episodes=500, max_steps=200, log_intervals=20, save_path="models/dqn_checkpoint.pt", buffer_type="array", num_envs=16, updates_per_batch=1, prefetch=0, buffer_capacity=100000, buffer_dir=None, profile=False, profile_dir="results/profile", tau=0.0, fused=False, compile_step=False, lr=1e-4, gamma=0.99, epsilon_decay=0.995, target_update_freq=1000, n_step=1, env_workers=0, precision="fp32", batch_size=64, hidden_dims=(128, 128), seed=None):
+    # drives num_envs environments in lock-step: one batched action selection and one
+    # batched replay write per env step, followed by updates_per_batch gradient updates
+    # env_workers > 0 steps the envs in worker processes instead (for envs heavier than CleanEnv)
+    if seed is not None:
+        seed_everything(seed)
+    if env_workers > 0:
+        envs = EnvPool(functools.partial(CleanEnv, max_steps=max_steps), num_envs, num_workers=env_workers)
+    else:
+        envs = VectorCleanEnv(num_envs, max_steps=max_steps)
+    # the env workers (and their shared memory) are released even when training fails
+    try:
+        obs_dim = envs.single_observation_space.shape[0]
+        action_dim = envs.single_action_space.n
+
+        agent = build_agent(
+            agent_type=agent_type, obs_dim=obs_dim, action_dim=action_dim,
+            lr=lr, gamma=gamma, epsilon_decay=epsilon_decay, target_update_freq=target_update_freq,
+            buffer_type=buffer_type, prefetch=prefetch, buffer_capacity=buffer_capacity, buffer_dir=buffer_dir,
+            tau=tau, fused=fused, compile_step=compile_step, n_step=n_step, precision=precision,
+            batch_size=batch_size, hidden_dims=hidden_dims,
+            # episodic replay keeps one sub-ring per sub-env so each env's steps stay contiguous
+            replay_streams=num_envs if buffer_type == "episode" else 1,
+        )
+        reward_window = deque(maxlen=100)
+        episode_rewards = np.zeros(num_envs)
+        episodes = 0
+        next_log = log_intervals
+        env_steps = 0
+        updates = 0
+        train_info = None
+
+        prof = Profiler(enabled=profile)
+        agent.profiler = prof
+
+        print(f"STARTING SentinelRL VECTORIZED TRAINING SEQUENCE ({num_envs} envs)......")
+
+        obs, _ = envs.reset(seed=seed)
+        env_ids = np.arange(num_envs)
+        start = time.perf_counter()
+        while episodes < num_episodes:
+            with prof.phase("select_action"):
+                actions = agent.select_actions(obs, explore=True)
+            with prof.phase("env_step"):
+                next_obs, rewards, terminated, truncated, infos = envs.step(actions)
+            prof.count("env_steps", num_envs)
+
+            # finished sub-envs were already reset, store their true last observation
+            transition_next_obs = next_obs
+            if "_final_obs" in infos:
+                transition_next_obs = np.where(infos["_final_obs"][:, None], infos["final_obs"], next_obs)
+            with prof.phase("store_transition"):
+                agent.store_transitions(obs, actions, rewards, transition_next_obs, terminated, truncated=truncated, streams=env_ids)
+
+            for _ in range(updates_per_batch):
+                with prof.phase("train_step"):
+                    info = agent.train_step()
+                if info is not None:
+                    train_info = info
+                    updates += 1
+
+            obs = next_obs
+            env_steps += num_envs
+            episode_rewards += rewards
+
+            done = terminated | truncated
+            if done.any():
+                reward_window.extend(episode_rewards[done])
+                episodes += int(done.sum())
+                episode_rewards[done] = 0.0
+
+            if episodes >= next_log:
+                next_log += log_intervals
+                elapsed = time.perf_counter() - start
+                # train_step hands back the loss tensor, it is only materialized here at logging time
+                loss = float(train_info["loss"]) if train_info else None
+                print(
+                    f"Episode {episodes:4d} | "
+                    f"AvgReward {np.mean(reward_window):8.2f} | "
+                    f"Epsilon {agent.epsilon:6.3f} | "
+                    f"Loss {loss if loss is not None else 'n/a'} | "
+                    f"EnvSteps/s {env_steps / elapsed:9.1f} | "
+                    f"Updates/s {updates / elapsed:7.1f}"
+                )
+                if profile:
+                    prof.write_jsonl(os.path.join(profile_dir, "train_profile.jsonl"), episode=episodes, avg_reward=float(np.mean(reward_window)))
+
+        elapsed = time.perf_counter() - start
+        print(f"{env_steps} env steps, {updates} updates in {elapsed:.1f}s | EnvSteps/s {env_steps / elapsed:.1f} | Updates/s {updates / elapsed:.1f}")
+    finally:
+        envs.close()
+    if profile:
+        prof.write_csv(os.path.join(profile_dir, "train_profile.csv"))
+        print(prof.summary())
+    agent.disable_prefetch()
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    agent.save(save_path)
+    print(f"{agent_type} saved to {save_path}")
+
+if __name__ == "__main__":
+    # arguments are defined once, in the unified CLI (`sentinelrl train`)
+    from cli.main import main
+    sys.exit(main(["train", *sys.argv[1:]]))